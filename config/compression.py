@@ -0,0 +1,226 @@
+"""
+Negotiated response compression.
+
+`CompressionMiddleware` compresses API responses with the best coding
+the client accepts: zstd and Brotli when `zstandard` and `brotli` are
+installed, gzip always. Bodies below `COMPRESSION_MIN_SIZE` bytes are
+sent as they are, streamed bodies are compressed chunk by chunk and
+flushed once at least `STREAM_FLUSH_SIZE` bytes went in since the last
+flush, so small chunks such as CSV rows share one compressed block while
+the client still gets the data as it is produced. Responses that already have a
+`Content-Encoding`, such as precompressed cache entries, pass through.
+
+Only JSON, YAML and CSV are compressed. HTML pages of the admin and the
+browsable API carry CSRF tokens, which compression would expose to
+BREACH style attacks.
+"""
+
+import gzip
+import re
+import zlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/vnd.oai.openapi",
+    "text/csv",
+)
+
+# Uncompressed bytes of a streamed body buffered before a flush
+STREAM_FLUSH_SIZE = 16 * 1024
+
+# `compress(data, best)` for whole bodies, `stream()` for a
+# `(compress_chunk, flush, finish)` triple
+Coding = namedtuple("Coding", "compress stream")
+
+ACCEPT_ENCODING_RE = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q=([\d.]+))?")
+
+
+def _gzip_stream():
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _brotli_stream():
+    compressor = brotli.Compressor(quality=5)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+def _zstd_stream():
+    compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# Most preferred first
+CODINGS = {}
+if zstandard:
+    CODINGS["zstd"] = Coding(
+        lambda data, best: zstandard.ZstdCompressor(
+            level=19 if best else 3
+        ).compress(data),
+        _zstd_stream,
+    )
+if brotli:
+    CODINGS["br"] = Coding(
+        lambda data, best: brotli.compress(data, quality=11 if best else 5),
+        _brotli_stream,
+    )
+CODINGS["gzip"] = Coding(
+    lambda data, best: gzip.compress(
+        data, compresslevel=9 if best else 6, mtime=0
+    ),
+    _gzip_stream,
+)
+
+
+def negotiate(accept_encoding):
+    """
+    The supported coding an `Accept-Encoding` header prefers,
+    None when it accepts none of them
+    """
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if not match:
+            continue
+        try:
+            weight = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        weights[match[1].lower()] = weight
+
+    best, best_weight = None, 0.0
+    for name in CODINGS:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def compress(data, coding, best=False):
+    return CODINGS[coding].compress(data, best)
+
+
+def encode_variants(data):
+    """
+    `{coding: body}` of `data` compressed as hard as every supported
+    coding can, for responses compressed once and served many times.
+    Empty for bodies below `COMPRESSION_MIN_SIZE`
+    """
+
+    if len(data) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    return {coding: compress(data, coding, best=True) for coding in CODINGS}
+
+
+class _StreamCompressor:
+    """
+    Compresses chunks, returning output only once `STREAM_FLUSH_SIZE`
+    bytes were fed since the last flush
+    """
+
+    def __init__(self, coding):
+        self._compress, self._flush, self._finish = CODINGS[coding].stream()
+        self._output = []
+        self._pending = 0
+
+    def feed(self, chunk):
+        self._output.append(self._compress(chunk))
+        self._pending += len(chunk)
+        if self._pending < STREAM_FLUSH_SIZE:
+            return b""
+        self._output.append(self._flush())
+        data = b"".join(self._output)
+        self._output, self._pending = [], 0
+        return data
+
+    def close(self):
+        return b"".join(self._output) + self._finish()
+
+
+def _compress_sequence(sequence, coding):
+    compressor = _StreamCompressor(coding)
+    for chunk in sequence:
+        data = compressor.feed(chunk)
+        if data:
+            yield data
+    yield compressor.close()
+
+
+async def _compress_async_sequence(sequence, coding):
+    compressor = _StreamCompressor(coding)
+    async for chunk in sequence:
+        data = compressor.feed(chunk)
+        if data:
+            yield data
+    yield compressor.close()
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip()
+    return content_type in COMPRESSIBLE_TYPES or content_type.endswith("+json")
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or not is_compressible(
+            response
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _compress_async_sequence(
+                    response.streaming_content, coding
+                )
+            else:
+                response.streaming_content = _compress_sequence(
+                    response.streaming_content, coding
+                )
+            del response["Content-Length"]
+        else:
+            compressed = compress(response.content, coding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # The encoded body is not byte-for-byte the one the ETag names
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = coding
+        return response
@@ -0,0 +1,90 @@
+"""
+Prebuilt OpenAPI schema.
+
+The schema is generated once by `manage.py build_schema` and committed as
+`openapi-schema.yaml`. Workers load it into memory together with a copy
+per supported content coding and an ETag, so `/api/schema/` never
+introspects the viewsets nor compresses on request.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from config.compression import encode_variants, negotiate
+
+SCHEMA_PATH = settings.BASE_DIR / "openapi-schema.yaml"
+
+CONTENT_TYPE = "application/vnd.oai.openapi; charset=utf-8"
+
+
+def generate_schema() -> bytes:
+    """
+    Introspect the API and render its OpenAPI schema as YAML
+    """
+
+    # API workers run without drf_spectacular, see `WORKER_PROFILE`
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiYamlRenderer
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+class PrebuiltSchema:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.encoded = encode_variants(content)
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+_schema = None
+_lock = threading.Lock()
+
+
+def get_schema() -> PrebuiltSchema:
+    """
+    Load the committed schema once per process. Falls back to generating
+    it when the file is missing, e.g. in a fresh checkout
+    """
+
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                try:
+                    content = SCHEMA_PATH.read_bytes()
+                except FileNotFoundError:
+                    content = generate_schema()
+                _schema = PrebuiltSchema(content)
+    return _schema
+
+
+@require_safe
+def schema_view(request):
+    """
+    OpenAPI schema as YAML, compressed for clients that accept it
+    """
+
+    schema = get_schema()
+    coding = negotiate(request.headers.get("Accept-Encoding", ""))
+    if schema.etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    elif coding in schema.encoded:
+        response = HttpResponse(
+            schema.encoded[coding], content_type=CONTENT_TYPE
+        )
+        response["Content-Encoding"] = coding
+    else:
+        response = HttpResponse(schema.content, content_type=CONTENT_TYPE)
+
+    response["ETag"] = schema.etag
+    response["Cache-Control"] = "public, max-age=300"
+    response["Content-Disposition"] = (
+        f'inline; filename="{settings.SPECTACULAR_SETTINGS["TITLE"]}.yaml"'
+    )
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
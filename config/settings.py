@@ -29,6 +29,13 @@ ALLOWED_HOSTS = []
 
 INTERNAL_IPS = ["127.0.0.1", ]
 
+# "api" workers only serve the JSON API and the probes. Admin, API docs,
+# debug toolbar and the session stack they need are neither installed
+# nor imported, which keeps cold starts short
+WORKER_PROFILE = os.environ.get("WORKER_PROFILE", "full")
+
+API_WORKER = WORKER_PROFILE == "api"
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -49,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "config.compression.CompressionMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,6 +66,28 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if API_WORKER:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in (
+            "django.contrib.admin",
+            "django.contrib.sessions",
+            "django.contrib.messages",
+            "django.contrib.staticfiles",
+            "drf_spectacular",
+            "debug_toolbar",
+        )
+    ]
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in (
+            "debug_toolbar.middleware.DebugToolbarMiddleware",
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+            "django.contrib.messages.middleware.MessageMiddleware",
+        )
+    ]
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -89,9 +119,31 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("POSTGRES_HOST"),
         "PORT": os.environ.get("POSTGRES_PORT"),
+        "CONN_MAX_AGE": int(os.environ.get("POSTGRES_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/ref/settings/#caches
+# Cached users, seat prices, catalogue lists and the version tokens
+# retiring them must be seen by every worker, so deployments set
+# REDIS_URL. The local memory fallback suits tests and one process
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -114,6 +166,27 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHERS = [
+    "user.hashers.PooledPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Concurrent hashes per worker process (default: CPU count) and how many
+# more may wait before requests are rejected with 503 (default: 2x workers)
+PASSWORD_HASHING_WORKERS = (
+    int(os.environ["PASSWORD_HASHING_WORKERS"])
+    if os.environ.get("PASSWORD_HASHING_WORKERS")
+    else None
+)
+PASSWORD_HASHING_QUEUE_DEPTH = (
+    int(os.environ["PASSWORD_HASHING_QUEUE_DEPTH"])
+    if os.environ.get("PASSWORD_HASHING_QUEUE_DEPTH")
+    else None
+)
+
 AUTH_USER_MODEL = "user.User"
 
 # Internationalization
@@ -143,16 +216,21 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination."
-                                "LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "theatre.pagination."
+                                "EstimatedCountPagination",
     "PAGE_SIZE": 50,
+    # Applies the anon, user and scoped sliding window throttles
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "theatre.throttling.SlidingWindowThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "30/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "10/day",
+        "user": "30/day",
+        "catalogue": "20/hour",
+        "reservations": "10/hour",
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -174,3 +252,45 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
 }
+
+# Seconds a user resolved by `CachedJWTAuthentication` stays cached.
+# Saves and updates invalidate the entry in the cache backend. Without a
+# shared one other workers keep their copy, up to this many seconds
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", 60))
+
+# Seconds a performance's seat prices stay cached, price changes drop
+# the affected entries right away
+PRICE_CACHE_TIMEOUT = int(os.environ.get("PRICE_CACHE_TIMEOUT", 300))
+
+# Minutes a waitlist offer holds its seats
+WAITLIST_HOLD_MINUTES = int(os.environ.get("WAITLIST_HOLD_MINUTES", 15))
+
+# Seconds a popularity leaderboard is served from the cache before it
+# is ranked again from the daily sales counters
+POPULARITY_CACHE_TIMEOUT = int(
+    os.environ.get("POPULARITY_CACHE_TIMEOUT", 60)
+)
+
+# Smallest response body in bytes worth compressing
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+
+# Seconds a rendered catalogue list stays in the response cache. Writes
+# to the catalogue retire every entry right away
+CATALOGUE_CACHE_TIMEOUT = int(
+    os.environ.get("CATALOGUE_CACHE_TIMEOUT", 300)
+)
+
+# Base URLs clients reach the API at, e.g. http://localhost:8000,
+# comma separated. The warm-up caches the catalogue lists for each
+CATALOGUE_WARMUP_URLS = [
+    url for url in os.environ.get("CATALOGUE_WARMUP_URLS", "").split(",")
+    if url
+]
+
+# Threads running the requests of a batch with `parallel` set,
+# 1 runs them one after another
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", 4))
+
+# Key signing ticket codes, shared with door scanners that verify codes
+# offline. Derived from SECRET_KEY when empty
+TICKET_CODE_KEY = os.environ.get("TICKET_CODE_KEY", "")
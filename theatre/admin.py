@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db.models import F
 
+from theatre.cancellation import cancel_reservations, release_tickets
 from theatre.models import (
     Genre,
     Actor,
@@ -7,13 +9,115 @@ from theatre.models import (
     TheatreHall,
     Performance,
     Reservation,
-    Ticket
+    Ticket,
+    CategoryPrice,
+    PerformancePrice,
 )
+from theatre.pagination import EstimatedCountPaginator
 
-admin.site.register(Genre)
-admin.site.register(Actor)
-admin.site.register(Play)
-admin.site.register(TheatreHall)
-admin.site.register(Performance)
-admin.site.register(Reservation)
-admin.site.register(Ticket)
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist of a table with millions of rows: estimated count,
+    no second count of the unfiltered table, ordering by the primary key
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+
+@admin.register(Genre)
+class GenreAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
+
+
+@admin.register(Actor)
+class ActorAdmin(admin.ModelAdmin):
+    list_display = ("first_name", "last_name")
+    search_fields = ("first_name", "last_name")
+
+
+@admin.register(Play)
+class PlayAdmin(admin.ModelAdmin):
+    list_display = ("title", "duration")
+    search_fields = ("title",)
+    list_filter = ("genres",)
+    autocomplete_fields = ("genres", "actors")
+
+
+@admin.register(TheatreHall)
+class TheatreHallAdmin(admin.ModelAdmin):
+    list_display = ("name", "rows", "seats_in_row", "capacity")
+    search_fields = ("name",)
+
+
+@admin.register(Performance)
+class PerformanceAdmin(admin.ModelAdmin):
+    list_display = ("play", "theatre_hall", "show_time", "tickets_available")
+    list_filter = ("theatre_hall",)
+    search_fields = ("play__title",)
+    autocomplete_fields = ("play", "theatre_hall")
+    date_hierarchy = "show_time"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Autocomplete results use this queryset too, `__str__` needs the
+        # play. Availability comes from the listing instead of a ticket count
+        return (
+            super().get_queryset(request)
+            .select_related("play", "theatre_hall")
+            .annotate(tickets_available=F("listing__tickets_available"))
+        )
+
+    @admin.display(ordering="tickets_available")
+    def tickets_available(self, obj):
+        return obj.tickets_available
+
+
+@admin.register(CategoryPrice)
+class CategoryPriceAdmin(admin.ModelAdmin):
+    list_display = ("theatre_hall", "category", "price")
+    list_select_related = ("theatre_hall",)
+    autocomplete_fields = ("theatre_hall",)
+
+
+@admin.register(PerformancePrice)
+class PerformancePriceAdmin(admin.ModelAdmin):
+    list_display = ("performance", "category", "price")
+    list_select_related = ("performance__play",)
+    autocomplete_fields = ("performance",)
+
+
+@admin.register(Reservation)
+class ReservationAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "created_at", "total")
+    search_fields = ("user__email",)
+    autocomplete_fields = ("user",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("user")
+
+    # Deletes release the seats like a cancellation, so counters and
+    # the performance listing stay in sync
+
+    def delete_model(self, request, obj):
+        cancel_reservations(Reservation.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        cancel_reservations(queryset)
+
+
+@admin.register(Ticket)
+class TicketAdmin(LargeTableAdmin):
+    list_display = ("id", "performance", "row", "seat", "price", "reservation")
+    list_select_related = ("performance__play", "reservation__user")
+    search_fields = ("reservation__user__email",)
+    autocomplete_fields = ("performance", "reservation")
+
+    def delete_model(self, request, obj):
+        release_tickets(Ticket.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        release_tickets(queryset)
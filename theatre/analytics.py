@@ -0,0 +1,296 @@
+"""
+Incrementally maintained sales and occupancy summaries.
+
+`PlayDailyStats` and `HallDailyStats` hold one row per play/hall and show
+date. Bookings and cancellations, including reservations deleted with
+their user, adjust the counters inside their own transaction and
+performance changes move seats between rows, so reading
+analytics never aggregates the `Ticket` table. `rebuild_analytics`
+recomputes everything from scratch for verification.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+
+from theatre.archive import count_tickets_sold
+from theatre.models import (
+    ArchivedTicket,
+    Performance,
+    TheatreHall,
+    Ticket,
+    PlayDailyStats,
+    HallDailyStats,
+)
+from theatre.signals import (
+    tickets_booked,
+    tickets_released,
+    performances_scheduled,
+)
+
+COUNTERS = ("performances", "seats_offered", "tickets_sold")
+
+
+def show_date(performance):
+    # `show_time` is whatever was assigned before save, possibly a string
+    return (
+        Performance._meta.get_field("show_time")
+        .to_python(performance.show_time)
+        .date()
+    )
+
+
+def increment_counters(model, lookup, deltas):
+    """
+    Add `deltas` to the counters of the row matching `lookup`,
+    creating it when missing
+    """
+
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    updates = {name: F(name) + value for name, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another transaction created the row in the meantime
+        model.objects.filter(**lookup).update(**updates)
+
+
+def apply_deltas(play_deltas, hall_deltas):
+    """
+    Apply `{(owner_id, date): Counter}` deltas to the summary tables.
+    Rows are updated in key order, so concurrent bookings touching the
+    same rows lock them in the same order and can not deadlock
+    """
+
+    for (play_id, date), deltas in sorted(play_deltas.items()):
+        increment_counters(
+            PlayDailyStats, {"play_id": play_id, "date": date}, deltas
+        )
+    for (hall_id, date), deltas in sorted(hall_deltas.items()):
+        increment_counters(
+            HallDailyStats,
+            {"theatre_hall_id": hall_id, "date": date},
+            deltas,
+        )
+
+
+def _performance_deltas(performances, sign):
+    """
+    Deltas for adding (sign=1) or removing (sign=-1) whole performances,
+    together with the tickets already sold for them
+    """
+
+    play_deltas = defaultdict(Counter)
+    hall_deltas = defaultdict(Counter)
+    for performance, tickets_sold in performances:
+        date = show_date(performance)
+        deltas = {
+            "performances": sign,
+            "seats_offered": sign * performance.theatre_hall.capacity,
+            "tickets_sold": sign * tickets_sold,
+        }
+        play_deltas[(performance.play_id, date)].update(deltas)
+        hall_deltas[(performance.theatre_hall_id, date)].update(deltas)
+    return play_deltas, hall_deltas
+
+
+def record_tickets(tickets, sign):
+    per_performance = Counter()
+    performances = {}
+    for ticket in tickets:
+        per_performance[ticket.performance_id] += 1
+        performances[ticket.performance_id] = ticket.performance
+
+    play_deltas = defaultdict(Counter)
+    hall_deltas = defaultdict(Counter)
+    for performance_id, count in per_performance.items():
+        performance = performances[performance_id]
+        date = show_date(performance)
+        play_deltas[(performance.play_id, date)]["tickets_sold"] += (
+            sign * count
+        )
+        hall_deltas[(performance.theatre_hall_id, date)]["tickets_sold"] += (
+            sign * count
+        )
+    apply_deltas(play_deltas, hall_deltas)
+
+
+def record_performances(performances, sign):
+    """
+    Add or remove a batch of performances, `performances` is a list of
+    `(performance, tickets_sold)` pairs
+    """
+
+    apply_deltas(*_performance_deltas(performances, sign))
+
+
+@receiver(tickets_booked)
+def on_tickets_booked(sender, tickets, **kwargs):
+    record_tickets(tickets, 1)
+
+
+@receiver(tickets_released)
+def on_tickets_released(sender, tickets, **kwargs):
+    record_tickets(tickets, -1)
+
+
+@receiver(performances_scheduled)
+def on_performances_scheduled(sender, performances, **kwargs):
+    record_performances([(performance, 0) for performance in performances], 1)
+
+
+@receiver(pre_save, sender=Performance)
+def remember_previous_schedule(sender, instance, raw=False, **kwargs):
+    instance._previous_schedule = None
+    if instance.pk and not raw:
+        instance._previous_schedule = (
+            Performance.objects
+            .select_related("theatre_hall")
+            .filter(pk=instance.pk)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Performance)
+def on_performance_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_performances([(instance, 0)], 1)
+        return
+
+    previous = getattr(instance, "_previous_schedule", None)
+    if previous is None or (
+        previous.play_id == instance.play_id
+        and previous.theatre_hall_id == instance.theatre_hall_id
+        and show_date(previous) == show_date(instance)
+    ):
+        return
+
+    sold = count_tickets_sold(instance)
+    record_performances([(previous, sold)], -1)
+    record_performances([(instance, sold)], 1)
+
+
+@receiver(pre_save, sender=TheatreHall)
+def remember_previous_capacity(sender, instance, raw=False, **kwargs):
+    instance._previous_capacity = None
+    if instance.pk and not raw:
+        instance._previous_capacity = (
+            TheatreHall.objects
+            .filter(pk=instance.pk)
+            .values_list("capacity", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=TheatreHall)
+def on_theatre_hall_saved(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_capacity", None)
+    if created or raw or previous is None:
+        return
+    delta = instance.capacity - previous
+    if not delta:
+        return
+
+    play_deltas = defaultdict(Counter)
+    hall_deltas = defaultdict(Counter)
+    shows = (
+        Performance.objects
+        .filter(theatre_hall=instance)
+        .annotate(date=TruncDate("show_time"))
+        .values_list("play_id", "date")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for play_id, date, count in shows:
+        play_deltas[(play_id, date)]["seats_offered"] += delta * count
+        hall_deltas[(instance.id, date)]["seats_offered"] += delta * count
+    apply_deltas(play_deltas, hall_deltas)
+
+
+@receiver(pre_delete, sender=Performance)
+def on_performance_deleted(sender, instance, **kwargs):
+    record_performances([(instance, count_tickets_sold(instance))], -1)
+
+
+def compute_stats():
+    """
+    Aggregate the summaries from scratch. Returns
+    `({(play_id, date): counters}, {(hall_id, date): counters})`
+    """
+
+    play_stats = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    hall_stats = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    for owner, stats in (("play", play_stats), ("theatre_hall", hall_stats)):
+        offered = (
+            Performance.objects
+            .annotate(date=TruncDate("show_time"))
+            .values(f"{owner}_id", "date")
+            .annotate(
+                performances=Count("id"),
+                seats_offered=Sum("theatre_hall__capacity"),
+            )
+            .order_by()
+        )
+        for row in offered:
+            key = (row[f"{owner}_id"], row["date"])
+            stats[key]["performances"] = row["performances"]
+            stats[key]["seats_offered"] = row["seats_offered"]
+
+        for model in (Ticket, ArchivedTicket):
+            sold = (
+                model.objects
+                .annotate(date=TruncDate("performance__show_time"))
+                .values(f"performance__{owner}_id", "date")
+                .annotate(tickets_sold=Count("id"))
+                .order_by()
+            )
+            for row in sold:
+                key = (row[f"performance__{owner}_id"], row["date"])
+                stats[key]["tickets_sold"] += row["tickets_sold"]
+
+    return dict(play_stats), dict(hall_stats)
+
+
+def stored_stats():
+    return (
+        {
+            (row.pop("play_id"), row.pop("date")): row
+            for row in PlayDailyStats.objects.values(
+                "play_id", "date", *COUNTERS
+            )
+        },
+        {
+            (row.pop("theatre_hall_id"), row.pop("date")): row
+            for row in HallDailyStats.objects.values(
+                "theatre_hall_id", "date", *COUNTERS
+            )
+        },
+    )
+
+
+def rebuild_stats():
+    play_stats, hall_stats = compute_stats()
+    with transaction.atomic():
+        PlayDailyStats.objects.all().delete()
+        HallDailyStats.objects.all().delete()
+        PlayDailyStats.objects.bulk_create(
+            PlayDailyStats(play_id=play_id, date=date, **counters)
+            for (play_id, date), counters in play_stats.items()
+        )
+        HallDailyStats.objects.bulk_create(
+            HallDailyStats(theatre_hall_id=hall_id, date=date, **counters)
+            for (hall_id, date), counters in hall_stats.items()
+        )
+    return len(play_stats), len(hall_stats)
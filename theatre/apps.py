@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TheatreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "theatre"
+
+    def ready(self):
+        import theatre.analytics  # noqa: F401
+        import theatre.cancellation  # noqa: F401
+        import theatre.catalogue_cache  # noqa: F401
+        import theatre.listing  # noqa: F401
+        import theatre.popularity  # noqa: F401
+        import theatre.pricing  # noqa: F401
+        import theatre.user_summary  # noqa: F401
@@ -0,0 +1,152 @@
+"""
+Archive of past sales.
+
+Reservations whose performances are all over are moved with their
+tickets to `ArchivedReservation` and `ArchivedTicket`, keeping their ids,
+so the live tables and their unique seat index only hold sales that can
+still change. `archive_sales` moves them in short batches, each one
+locking only the tickets it moves. Archiving is not a cancellation: no
+release signal is sent, the read models keep counting the seats, and
+whatever recomputes them from the source tables counts archived
+tickets as sold.
+"""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from theatre.models import (
+    ArchivedReservation,
+    ArchivedTicket,
+    Reservation,
+    Ticket,
+)
+
+TICKET_FIELDS = (
+    "id", "row", "seat", "performance_id", "price", "checked_in_at",
+)
+RESERVATION_FIELDS = ("id", "created_at", "user_id", "total")
+
+EXPORT_COLUMNS = (
+    "ticket",
+    "reservation",
+    "reserved_at",
+    "user",
+    "performance",
+    "play",
+    "show_time",
+    "theatre_hall",
+    "row",
+    "seat",
+    "price",
+    "checked_in_at",
+    "archived",
+)
+
+
+def archived_tickets_count(performance="pk"):
+    """
+    Subquery counting the archived tickets of the outer performance
+    """
+
+    return Coalesce(
+        Subquery(
+            ArchivedTicket.objects
+            .filter(performance=OuterRef(performance))
+            .values("performance")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+def count_tickets_sold(performance):
+    return performance.tickets.count() + performance.archived_tickets.count()
+
+
+def finished_reservations(before):
+    """
+    Reservations with tickets only for performances before `before`
+    """
+
+    return (
+        Reservation.objects
+        .filter(tickets__performance__show_time__lt=before)
+        .exclude(tickets__performance__show_time__gte=before)
+        .distinct()
+    )
+
+
+def archive_batch(before, after_id=0, batch_size=1000):
+    """
+    Move the next `batch_size` finished reservations with ids above
+    `after_id`. Returns the moved reservation ids
+    """
+
+    with transaction.atomic():
+        reservation_ids = list(
+            finished_reservations(before)
+            .filter(id__gt=after_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not reservation_ids:
+            return []
+
+        # Locked like a cancellation does, so a concurrent cancellation
+        # either finishes first or finds the tickets gone
+        tickets = list(
+            Ticket.objects
+            .select_for_update()
+            .filter(reservation_id__in=reservation_ids)
+            .order_by("id")
+            .values_list("reservation_id", *TICKET_FIELDS)
+        )
+        ArchivedReservation.objects.bulk_create(
+            ArchivedReservation(**dict(zip(RESERVATION_FIELDS, row)))
+            for row in Reservation.objects
+            .filter(id__in={ticket[0] for ticket in tickets})
+            .values_list(*RESERVATION_FIELDS)
+        )
+        ArchivedTicket.objects.bulk_create(
+            ArchivedTicket(
+                reservation_id=reservation_id,
+                **dict(zip(TICKET_FIELDS, row)),
+            )
+            for reservation_id, *row in tickets
+        )
+        Ticket.objects.filter(
+            id__in=[ticket[1] for ticket in tickets]
+        ).delete()
+        Reservation.objects.filter(id__in=reservation_ids).delete()
+    return reservation_ids
+
+
+def export_rows(performances):
+    """
+    Live and archived tickets of a performance queryset, as tuples
+    in `EXPORT_COLUMNS` order
+    """
+
+    for model, archived in ((Ticket, False), (ArchivedTicket, True)):
+        rows = (
+            model.objects
+            .filter(performance__in=performances)
+            .order_by("id")
+            .values_list(
+                "id",
+                "reservation_id",
+                "reservation__created_at",
+                "reservation__user__email",
+                "performance_id",
+                "performance__play__title",
+                "performance__show_time",
+                "performance__theatre_hall__name",
+                "row",
+                "seat",
+                "price",
+                "checked_in_at",
+            )
+        )
+        for row in rows.iterator(chunk_size=2000):
+            yield (*row, archived)
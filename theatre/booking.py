@@ -0,0 +1,144 @@
+"""
+Booking.
+
+A reservation may hold tickets for several performances. Booking locks
+the performances in id order, a canonical order every writer of seats
+follows (the waitlist matcher locks the same rows), so concurrent carts
+queue behind each other instead of deadlocking. All seats are then
+checked against sold tickets and waitlist holds with one query each and
+inserted with one bulk insert. The booker's own holds on the seats are
+used up, and waitlist entries with no holds left are booked.
+"""
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from theatre.models import (
+    Performance,
+    Reservation,
+    SeatHold,
+    Ticket,
+    WaitlistEntry,
+)
+from theatre.pricing import price_tickets
+from theatre.signals import tickets_booked
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seats are not available."
+    default_code = "seats_taken"
+
+    def __init__(self, conflicts):
+        super().__init__()
+        # Set directly, so ids and seat numbers stay numbers in the response
+        self.detail = {
+            "detail": self.detail,
+            "conflicts": [
+                {
+                    "performance": performance_id,
+                    "row": row,
+                    "seat": seat,
+                    "reason": reason,
+                }
+                for (performance_id, row, seat), reason in sorted(
+                    conflicts.items()
+                )
+            ],
+        }
+        self.conflicts = conflicts
+
+
+def lock_performances(performance_ids):
+    """
+    Lock the performance rows in canonical (id) order
+    """
+
+    return list(
+        Performance.objects
+        .select_for_update()
+        .filter(id__in=performance_ids)
+        .order_by("id")
+    )
+
+
+def _seats_filter(seats):
+    return reduce(
+        or_,
+        (
+            Q(performance_id=performance_id, row=row, seat=seat)
+            for performance_id, row, seat in seats
+        ),
+    )
+
+
+def find_unavailable(seats, user, now=None):
+    """
+    `{(performance_id, row, seat): reason}` of the seats that are sold
+    or held for another user's waitlist offer
+    """
+
+    now = now or datetime.now()
+    seats_filter = _seats_filter(seats)
+    unavailable = {
+        seat: "sold"
+        for seat in Ticket.objects
+        .filter(seats_filter)
+        .values_list("performance_id", "row", "seat")
+    }
+    for seat in (
+        SeatHold.objects
+        .filter(seats_filter, expires_at__gt=now)
+        .exclude(entry__user=user)
+        .values_list("performance_id", "row", "seat")
+    ):
+        unavailable.setdefault(seat, "held")
+    return unavailable
+
+
+def use_holds(seats, user):
+    """
+    Drop the user's holds on the booked seats and mark the waitlist
+    entries whose held seats are all booked
+    """
+
+    holds = SeatHold.objects.filter(_seats_filter(seats), entry__user=user)
+    entry_ids = set(holds.values_list("entry_id", flat=True))
+    if not entry_ids:
+        return
+    holds.delete()
+    WaitlistEntry.objects.filter(
+        id__in=entry_ids, holds__isnull=True
+    ).update(status=WaitlistEntry.Status.BOOKED)
+
+
+def create_reservation(user, tickets, **fields):
+    """
+    Book unsaved tickets, whose seats are already validated against
+    their halls, in one atomic step. Raises `SeatsTaken`
+    """
+
+    seats = [
+        (ticket.performance_id, ticket.row, ticket.seat) for ticket in tickets
+    ]
+    with transaction.atomic():
+        lock_performances({ticket.performance_id for ticket in tickets})
+        unavailable = find_unavailable(seats, user)
+        if unavailable:
+            raise SeatsTaken(unavailable)
+
+        total = price_tickets(tickets)
+        reservation = Reservation.objects.create(
+            user=user, total=total, **fields
+        )
+        for ticket in tickets:
+            ticket.reservation = reservation
+        Ticket.objects.bulk_create(tickets)
+        use_holds(seats, user)
+        tickets_booked.send(sender=Reservation, tickets=tickets)
+    return reservation
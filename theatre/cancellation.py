@@ -0,0 +1,85 @@
+"""
+Reservation cancellation.
+
+Tickets are released with set-based statements inside one transaction:
+the tickets are locked and deleted by id, reservation totals are
+recalculated with one UPDATE and emptied reservations are deleted.
+`tickets_released` is sent in the same transaction, so availability
+and sales counters change atomically with the seats. Reservations
+deleted any other way, e.g. together with their user, release the
+tickets they still hold before the cascade deletes them.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from theatre.models import ArchivedReservation, Reservation, Ticket
+from theatre.signals import tickets_released
+
+
+def release_tickets(tickets):
+    """
+    Cancel the tickets of a queryset. Returns the released tickets
+    """
+
+    with transaction.atomic():
+        released = list(
+            tickets
+            .select_related("performance", "reservation")
+            .select_for_update(of=("self",))
+            .order_by("id")
+        )
+        if not released:
+            return []
+
+        reservation_ids = {ticket.reservation_id for ticket in released}
+        Ticket.objects.filter(
+            id__in=[ticket.id for ticket in released]
+        ).delete()
+
+        ticket_totals = (
+            Ticket.objects
+            .filter(reservation=OuterRef("pk"))
+            .values("reservation")
+            .annotate(total=Sum("price"))
+            .values("total")
+        )
+        Reservation.objects.filter(id__in=reservation_ids).update(
+            total=Coalesce(Subquery(ticket_totals), Value(Decimal("0")))
+        )
+        Reservation.objects.filter(
+            id__in=reservation_ids, tickets__isnull=True
+        ).delete()
+
+        tickets_released.send(sender=Ticket, tickets=released)
+    return released
+
+
+def cancel_reservations(reservations):
+    """
+    Cancel whole reservations of a queryset. Returns the released tickets
+    """
+
+    with transaction.atomic():
+        released = release_tickets(
+            Ticket.objects.filter(reservation__in=reservations)
+        )
+        # Reservations that had no tickets left
+        reservations.delete()
+    return released
+
+
+@receiver(pre_delete, sender=Reservation)
+@receiver(pre_delete, sender=ArchivedReservation)
+def on_reservation_deleted(sender, instance, **kwargs):
+    # Cancelling and archiving delete the tickets first, so only
+    # cascades get here with tickets left
+    tickets = list(
+        instance.tickets.select_related("performance", "reservation")
+    )
+    if tickets:
+        tickets_released.send(sender=Ticket, tickets=tickets)
@@ -0,0 +1,159 @@
+"""
+Precompressed catalogue responses.
+
+Genre, actor, play and hall lists are the same for every user, so the
+first request for a URL stores the rendered JSON together with a copy
+per supported content coding and an ETag. Repeat requests still pass
+authentication, permissions and throttling, then are answered from the
+entry in the encoding the client prefers, or with 304 Not Modified,
+without touching the catalogue tables, the serializers or a compressor.
+
+Every write to a catalogue model publishes a new version token that is
+part of the cache keys, so entries of an older catalogue are never read
+again and expire after `CATALOGUE_CACHE_TIMEOUT` seconds. Bulk writes
+that send no signals call `bump_catalogue_version` themselves. Entries
+and token live in the default cache, so a write made by one worker or
+by a command such as `import_data` retires the entries of every worker
+sharing it, see `REDIS_URL`.
+Performance lists change with every booking and are not cached.
+"""
+import hashlib
+import json
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+
+from config.compression import encode_variants, negotiate
+from theatre.models import Actor, Genre, Play, TheatreHall
+
+VERSION_KEY = "catalogue:version"
+CATALOGUE_MODELS = (Genre, Actor, Play, TheatreHall)
+
+CachedResponse = namedtuple(
+    "CachedResponse", "content content_type etag encoded"
+)
+
+
+def catalogue_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A cleared cache must not serve entries of an older catalogue
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def catalogue_changed():
+    bump_catalogue_version()
+    # Again once committed, as a list rendered before the commit may
+    # have been stored under the first new version
+    transaction.on_commit(bump_catalogue_version)
+
+
+def on_catalogue_saved(sender, **kwargs):
+    catalogue_changed()
+
+
+for model in CATALOGUE_MODELS:
+    post_save.connect(on_catalogue_saved, sender=model)
+    post_delete.connect(on_catalogue_saved, sender=model)
+
+
+@receiver(m2m_changed, sender=Play.genres.through)
+@receiver(m2m_changed, sender=Play.actors.through)
+def on_play_relations_changed(sender, action, **kwargs):
+    if action.startswith("post_"):
+        catalogue_changed()
+
+
+def response_key(request):
+    """
+    Key of the entry for the absolute URL and the media type, links and
+    indentation of the rendered JSON depend on both
+    """
+
+    digest = hashlib.sha256(
+        f"{request.build_absolute_uri()} {request.accepted_media_type}"
+        .encode()
+    ).hexdigest()
+    return f"catalogue:{catalogue_version()}:{digest}"
+
+
+def cache_response(key, content, content_type):
+    entry = CachedResponse(
+        content=content,
+        content_type=content_type,
+        etag=f'W/"{hashlib.sha256(content).hexdigest()[:32]}"',
+        encoded=encode_variants(content),
+    )
+    cache.set(key, entry, settings.CATALOGUE_CACHE_TIMEOUT)
+    return entry
+
+
+class CachedJSONResponse(HttpResponse):
+    """
+    A cache entry in the encoding the client prefers
+    """
+
+    def __init__(self, entry, coding=None):
+        super().__init__(
+            entry.encoded.get(coding, entry.content),
+            content_type=entry.content_type,
+        )
+        if coding in entry.encoded:
+            self["Content-Encoding"] = coding
+        self.entry = entry
+
+    @property
+    def data(self):
+        # Like a DRF `Response`, for callers that read the payload
+        return json.loads(self.entry.content)
+
+
+def entry_response(request, entry):
+    if entry.etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = CachedJSONResponse(
+            entry, negotiate(request.headers.get("Accept-Encoding", ""))
+        )
+    response["ETag"] = entry.etag
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+# Serves `list` from the precompressed catalogue cache. No docstring,
+# it would become the description of the list endpoints in the schema
+class CachedListMixin:
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            # The browsable API renders per user
+            return super().list(request, *args, **kwargs)
+
+        key = response_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = request.accepted_renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+            entry = cache_response(
+                key, content, request.accepted_renderer.media_type
+            )
+        return entry_response(request, entry)
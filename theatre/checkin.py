@@ -0,0 +1,131 @@
+"""
+Door check-in.
+
+Codes are verified in memory. A single scan is one UPDATE guarded by
+`checked_in_at IS NULL`, so a ticket is admitted once no matter how many
+scanners see it, and only a rejected scan reads the ticket back to tell
+why. The batch of an offline scanner locks and reads its tickets, then
+checks in those not admitted yet with one UPDATE. Replaying an upload
+changes nothing.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+
+from theatre.models import Ticket
+from theatre.ticket_codes import InvalidTicketCode, read_code
+
+CHECKED_IN = "checked_in"
+ALREADY_CHECKED_IN = "already_checked_in"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+WRONG_PERFORMANCE = "wrong_performance"
+
+RESULTS = (
+    CHECKED_IN,
+    ALREADY_CHECKED_IN,
+    NOT_FOUND,
+    INVALID,
+    WRONG_PERFORMANCE,
+)
+
+
+def check_in(scans, performance_id=None, now=None):
+    """
+    Check in `(code, scanned_at)` pairs, `scanned_at` is None for scans
+    made right now. Returns a `(result, ticket_id, checked_in_at)`
+    triple per scan
+    """
+
+    now = now or datetime.now()
+    results = [None] * len(scans)
+    # ticket id -> (scanned_at, indexes of its scans)
+    pending = {}
+
+    for index, (code, scanned_at) in enumerate(scans):
+        try:
+            ticket = read_code(code)
+        except InvalidTicketCode:
+            results[index] = (INVALID, None, None)
+            continue
+        if performance_id not in (None, ticket.performance):
+            results[index] = (WRONG_PERFORMANCE, ticket.ticket, None)
+            continue
+
+        scanned_at = min(scanned_at or now, now)
+        first_scan, indexes = pending.get(ticket.ticket, (scanned_at, []))
+        indexes.append(index)
+        pending[ticket.ticket] = (min(first_scan, scanned_at), indexes)
+
+    if len(pending) == 1:
+        checked_in = _check_in_one(*next(iter(pending.items())))
+    elif pending:
+        checked_in = _check_in_many(pending)
+    else:
+        checked_in = {}
+
+    for ticket_id, (scanned_at, indexes) in pending.items():
+        result = checked_in.get(ticket_id, (NOT_FOUND, ticket_id, None))
+        results[indexes[0]] = result
+        if result[0] == CHECKED_IN:
+            # The same ticket scanned again in one upload
+            result = (ALREADY_CHECKED_IN, ticket_id, scanned_at)
+        for index in indexes[1:]:
+            results[index] = result
+    return results
+
+
+def _check_in_one(ticket_id, scan):
+    scanned_at, _ = scan
+    if Ticket.objects.filter(id=ticket_id, checked_in_at__isnull=True).update(
+        checked_in_at=scanned_at
+    ):
+        return {ticket_id: (CHECKED_IN, ticket_id, scanned_at)}
+
+    checked_in_at = (
+        Ticket.objects
+        .filter(id=ticket_id)
+        .values_list("checked_in_at", flat=True)
+        .first()
+    )
+    if checked_in_at is None:
+        # Cancelled or archived
+        return {}
+    return {ticket_id: (ALREADY_CHECKED_IN, ticket_id, checked_in_at)}
+
+
+def _check_in_many(pending):
+    checked_in = {}
+    with transaction.atomic():
+        stored = (
+            Ticket.objects
+            .select_for_update()
+            .filter(id__in=pending)
+            .values_list("id", "checked_in_at")
+        )
+        for ticket_id, checked_in_at in stored:
+            if checked_in_at is None:
+                scanned_at, _ = pending[ticket_id]
+                checked_in[ticket_id] = (CHECKED_IN, ticket_id, scanned_at)
+            else:
+                checked_in[ticket_id] = (
+                    ALREADY_CHECKED_IN, ticket_id, checked_in_at
+                )
+
+        admitted = [
+            ticket_id
+            for ticket_id, (result, _, _) in checked_in.items()
+            if result == CHECKED_IN
+        ]
+        if admitted:
+            Ticket.objects.filter(id__in=admitted).update(
+                checked_in_at=Case(
+                    *(
+                        When(id=ticket_id, then=Value(pending[ticket_id][0]))
+                        for ticket_id in admitted
+                    ),
+                    output_field=DateTimeField(),
+                )
+            )
+    return checked_in
@@ -0,0 +1,137 @@
+"""
+Seat layouts of theatre halls.
+
+A layout is stored as text, one line per row. Every character is a seat
+position: an uppercase letter is a seat of that category, "." (or a
+space) is an aisle or a missing seat. Seats are numbered by position, so
+removing a seat does not renumber its neighbours. A hall without a
+layout is a `rows` x `seats_in_row` rectangle of category "A" seats.
+
+Layouts are compiled once per hall version into `SeatLayout`, which
+answers seat lookups in O(1) and knows its capacity per category.
+"""
+import string
+import threading
+from collections import Counter, OrderedDict
+
+GAP = "."
+DEFAULT_CATEGORY = "A"
+CATEGORIES = frozenset(string.ascii_uppercase)
+MAX_ROWS = 500
+MAX_SEATS_IN_ROW = 500
+CACHE_SIZE = 256
+
+
+class LayoutError(ValueError):
+    pass
+
+
+class SeatLayout:
+    """
+    Compiled layout, `rows[row - 1][seat - 1]` is the category of
+    a seat or `GAP`
+    """
+
+    __slots__ = ("source", "rows", "width", "capacity", "categories")
+
+    def __init__(self, rows, source=None):
+        self.source = source
+        self.rows = tuple(rows)
+        self.width = max(map(len, self.rows), default=0)
+        self.categories = Counter(
+            category for line in self.rows for category in line
+        )
+        del self.categories[GAP]
+        self.capacity = sum(self.categories.values())
+
+    def category(self, row, seat):
+        """
+        Category of the seat, None when there is no such seat
+        """
+
+        if 1 <= row <= len(self.rows):
+            line = self.rows[row - 1]
+            if 1 <= seat <= len(line) and line[seat - 1] != GAP:
+                return line[seat - 1]
+        return None
+
+    def is_seat(self, row, seat) -> bool:
+        return self.category(row, seat) is not None
+
+    def seats(self):
+        """
+        Yield `(row, seat, category)` of every seat, row by row
+        """
+
+        for row, line in enumerate(self.rows, start=1):
+            for seat, category in enumerate(line, start=1):
+                if category != GAP:
+                    yield row, seat, category
+
+
+def parse_layout(text):
+    """
+    Validate layout text and return its rows with gaps normalized
+    to `GAP`. Raises `LayoutError`
+    """
+
+    rows = [line.rstrip().replace(" ", GAP) for line in text.splitlines()]
+    while rows and not rows[-1]:
+        rows.pop()
+    if len(rows) > MAX_ROWS:
+        raise LayoutError(f"A layout can have at most {MAX_ROWS} rows")
+
+    for number, line in enumerate(rows, start=1):
+        if len(line) > MAX_SEATS_IN_ROW:
+            raise LayoutError(
+                f"Row {number} is longer than {MAX_SEATS_IN_ROW} seats"
+            )
+        invalid = set(line) - CATEGORIES - {GAP}
+        if invalid:
+            raise LayoutError(
+                f"Row {number} has invalid characters: "
+                f"{''.join(sorted(invalid))!r}, use A-Z for seat "
+                f"categories and '{GAP}' for gaps"
+            )
+
+    if not any(line.strip(GAP) for line in rows):
+        raise LayoutError("A layout must have at least one seat")
+    return rows
+
+
+def compile_layout(text, rows=0, seats_in_row=0):
+    source = (text, rows, seats_in_row)
+    if text and text.strip():
+        return SeatLayout(parse_layout(text), source)
+    return SeatLayout([DEFAULT_CATEGORY * seats_in_row] * rows, source)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_layout(hall):
+    """
+    Compiled layout of a saved hall, cached per `(id, layout_version)`
+    in this process. Every save bumps the version; a hit is still
+    checked against the layout text, which is a plain string comparison,
+    so unsaved edits or a restored database never get a stale layout
+    """
+
+    source = (hall.layout, hall.rows, hall.seats_in_row)
+    if hall.pk is None:
+        return compile_layout(*source)
+
+    key = (hall.pk, hall.layout_version)
+    with _cache_lock:
+        layout = _cache.get(key)
+        if layout is not None and layout.source == source:
+            _cache.move_to_end(key)
+            return layout
+
+    layout = compile_layout(*source)
+    with _cache_lock:
+        _cache[key] = layout
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return layout
@@ -0,0 +1,172 @@
+"""
+Denormalized performance listing.
+
+`PerformanceListing` holds one flat row per performance, so listing
+performances is a single-table scan instead of two joins and a ticket
+aggregate. Writes to plays, halls and performances, and booked or
+released tickets, update the rows inside their own transaction.
+`rebuild_listing` recomputes the table or verifies it against the source.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from theatre.archive import archived_tickets_count
+from theatre.models import (
+    Play,
+    TheatreHall,
+    Performance,
+    PerformanceListing,
+)
+from theatre.signals import (
+    tickets_booked,
+    tickets_released,
+    performances_scheduled,
+)
+
+COLUMNS = (
+    "performance_id",
+    "play_id",
+    "show_time",
+    "play_title",
+    "play_image",
+    "theatre_hall_name",
+    "theatre_hall_capacity",
+    "tickets_available",
+)
+UPDATE_FIELDS = [
+    PerformanceListing._meta.get_field(column).name
+    for column in COLUMNS[1:]
+]
+
+
+def source_rows(performances=None):
+    """
+    Listing rows computed from the source tables, as tuples in `COLUMNS`
+    order, for the given performances or for all of them
+    """
+
+    if performances is None:
+        performances = Performance.objects.all()
+    return (
+        performances
+        .annotate(
+            capacity=F("theatre_hall__capacity"),
+            available=(
+                F("theatre_hall__capacity")
+                - Count("tickets")
+                - archived_tickets_count()
+            ),
+        )
+        .values_list(
+            "id",
+            "play_id",
+            "show_time",
+            "play__title",
+            "play__image",
+            "theatre_hall__name",
+            "capacity",
+            "available",
+        )
+        .order_by("id")
+    )
+
+
+def stored_rows():
+    return PerformanceListing.objects.values_list(*COLUMNS).order_by(
+        "performance_id"
+    )
+
+
+def _listings(rows):
+    return [PerformanceListing(**dict(zip(COLUMNS, row))) for row in rows]
+
+
+def sync_performances(performance_ids):
+    """
+    Upsert the listing rows of the given performances from the source
+    """
+
+    rows = source_rows(Performance.objects.filter(id__in=performance_ids))
+    PerformanceListing.objects.bulk_create(
+        _listings(rows),
+        update_conflicts=True,
+        unique_fields=["performance"],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def rebuild_listing(batch_size=5000):
+    count = 0
+    with transaction.atomic():
+        PerformanceListing.objects.all().delete()
+        batch = []
+        for row in source_rows().iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                PerformanceListing.objects.bulk_create(_listings(batch))
+                count += len(batch)
+                batch = []
+        PerformanceListing.objects.bulk_create(_listings(batch))
+        count += len(batch)
+    return count
+
+
+def _adjust_availability(tickets, sign):
+    per_performance = Counter(ticket.performance_id for ticket in tickets)
+    # Canonical row order, like the performance locks of `theatre.booking`
+    for performance_id, count in sorted(per_performance.items()):
+        PerformanceListing.objects.filter(
+            performance_id=performance_id
+        ).update(tickets_available=F("tickets_available") + sign * count)
+
+
+@receiver(tickets_booked)
+def on_tickets_booked(sender, tickets, **kwargs):
+    _adjust_availability(tickets, -1)
+
+
+@receiver(tickets_released)
+def on_tickets_released(sender, tickets, **kwargs):
+    _adjust_availability(tickets, 1)
+
+
+@receiver(performances_scheduled)
+def on_performances_scheduled(sender, performances, **kwargs):
+    sync_performances([performance.pk for performance in performances])
+
+
+@receiver(post_save, sender=Performance)
+def on_performance_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_performances([instance.pk])
+
+
+@receiver(post_save, sender=Play)
+def on_play_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    PerformanceListing.objects.filter(play=instance).update(
+        play_title=instance.title, play_image=instance.image.name
+    )
+
+
+@receiver(post_save, sender=TheatreHall)
+def on_theatre_hall_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    # Sold tickets stay sold, only the free seats follow the new capacity
+    PerformanceListing.objects.filter(
+        performance__theatre_hall=instance
+    ).update(
+        theatre_hall_name=instance.name,
+        tickets_available=(
+            F("tickets_available")
+            + instance.capacity
+            - F("theatre_hall_capacity")
+        ),
+        theatre_hall_capacity=instance.capacity,
+    )
@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management import BaseCommand, CommandError
+
+from theatre.archive import archive_batch
+
+
+class Command(BaseCommand):
+    """
+    Django command to move reservations and tickets of finished
+    performances to the archive tables, in short batches
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            default=None,
+            help="Archive sales of performances before this date, "
+                 "YYYY-MM-DD (default: --days ago)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Age in days of the performances to archive",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Reservations moved per transaction",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches",
+        )
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                before = datetime.strptime(options["before"], "%Y-%m-%d")
+            except ValueError:
+                raise CommandError("--before must be a YYYY-MM-DD date")
+        else:
+            before = datetime.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ) - timedelta(days=options["days"])
+
+        archived = 0
+        last_id = 0
+        while True:
+            moved = archive_batch(before, last_id, options["batch_size"])
+            if not moved:
+                break
+            archived += len(moved)
+            last_id = moved[-1]
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived} reservations of performances "
+                f"before {before:%Y-%m-%d}"
+            )
+        )
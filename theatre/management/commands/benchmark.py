@@ -0,0 +1,299 @@
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from unittest import mock
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from theatre.models import Performance, Ticket
+from theatre.urls import router
+
+# Transaction control emitted by the rollback wrapper, not by the app
+TRANSACTION_STATEMENTS = (
+    "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE",
+)
+
+
+def percentile(sorted_values, share):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+
+    # Rounded first, so float noise like 0.07 * 100 = 7.000000000000001
+    # does not push the rank up
+    rank = math.ceil(round(share * len(sorted_values), 9))
+    return sorted_values[min(max(rank - 1, 0), len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    """
+    Django command to replay request scenarios against every route of the
+    theatre API and report latency, throughput and queries per request
+    as JSON. Every request runs in a rolled back transaction, so the
+    benchmark never changes the data it measures
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--email",
+            default=None,
+            help="User to authenticate as (default: first superuser)",
+        )
+        parser.add_argument(
+            "--route",
+            action="append",
+            default=[],
+            help="Only run scenarios whose name contains this value",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Write JSON results to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--keep-throttling",
+            action="store_true",
+            help="Do not bypass throttles while benchmarking",
+        )
+
+    def handle(self, *args, **options):
+        user = self._get_user(options["email"])
+        client = APIClient(
+            SERVER_NAME="localhost",
+            # Outside INTERNAL_IPS, so debug toolbar stays out of the timings
+            REMOTE_ADDR="10.0.0.1",
+        )
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+        scenarios = [
+            scenario
+            for scenario in self._build_scenarios()
+            if not options["route"]
+            or any(route in scenario["name"] for route in options["route"])
+        ]
+        if not scenarios:
+            raise CommandError("No scenarios to run")
+
+        throttling = mock.patch.object(APIView, "check_throttles")
+        if not options["keep_throttling"]:
+            throttling.start()
+        try:
+            results = [
+                self._run_scenario(
+                    client, scenario, options["iterations"], options["warmup"]
+                )
+                for scenario in scenarios
+            ]
+        finally:
+            if not options["keep_throttling"]:
+                throttling.stop()
+
+        report = json.dumps(
+            {"meta": self._meta(options), "results": results}, indent=2
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+            self.stdout.write(
+                self.style.SUCCESS(f"Results written to {options['output']}")
+            )
+        else:
+            self.stdout.write(report)
+
+    @staticmethod
+    def _get_user(email):
+        users = get_user_model().objects
+        user = (
+            users.filter(email=email).first()
+            if email
+            else users.filter(is_superuser=True).first()
+        )
+        if not user:
+            raise CommandError(
+                "No user to authenticate as, pass --email or create "
+                "a superuser"
+            )
+        return user
+
+    @staticmethod
+    def _build_scenarios():
+        """
+        Build one GET scenario per list, detail and extra GET route
+        registered in `theatre.urls.router`, plus a reservation write
+        """
+
+        scenarios = []
+        for prefix, viewset, basename in router.registry:
+            if hasattr(viewset, "list"):
+                scenarios.append(
+                    {
+                        "name": f"{basename}-list",
+                        "method": "get",
+                        "path": reverse(f"theatre:{basename}-list"),
+                    }
+                )
+
+            sample_pk = None
+            if hasattr(viewset, "retrieve"):
+                sample_pk = (
+                    viewset.queryset.model.objects
+                    .values_list("pk", flat=True)
+                    .first()
+                )
+            if sample_pk is not None:
+                scenarios.append(
+                    {
+                        "name": f"{basename}-detail",
+                        "method": "get",
+                        "path": reverse(
+                            f"theatre:{basename}-detail",
+                            kwargs={"pk": sample_pk},
+                        ),
+                    }
+                )
+
+            for extra_action in viewset.get_extra_actions():
+                if "get" not in extra_action.mapping or extra_action.detail:
+                    continue
+                name = f"{basename}-{extra_action.url_name}"
+                scenarios.append(
+                    {
+                        "name": name,
+                        "method": "get",
+                        "path": reverse(f"theatre:{name}"),
+                    }
+                )
+
+        performance = (
+            Performance.objects
+            .filter(show_time__gt=datetime.now())
+            .select_related("theatre_hall")
+            .order_by("show_time")
+            .first()
+        )
+        if performance:
+            taken = set(
+                Ticket.objects
+                .filter(performance=performance)
+                .values_list("row", "seat")
+            )
+            free_seat = next(
+                (
+                    (row, seat)
+                    for row, seat, _ in (
+                        performance.theatre_hall.seat_layout.seats()
+                    )
+                    if (row, seat) not in taken
+                ),
+                None,
+            )
+            if free_seat:
+                scenarios.append(
+                    {
+                        "name": "reservation-create",
+                        "method": "post",
+                        "path": reverse("theatre:reservation-list"),
+                        "data": {
+                            "tickets": [
+                                {
+                                    "row": free_seat[0],
+                                    "seat": free_seat[1],
+                                    "performance": performance.id,
+                                }
+                            ]
+                        },
+                    }
+                )
+
+        return scenarios
+
+    @staticmethod
+    def _request(client, scenario):
+        with transaction.atomic():
+            response = getattr(client, scenario["method"])(
+                scenario["path"], scenario.get("data"), format="json"
+            )
+            if response.streaming:
+                # Streamed bodies, e.g. the analytics export, run their
+                # queries while they are consumed
+                b"".join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response
+
+    def _run_scenario(self, client, scenario, iterations, warmup):
+        for _ in range(warmup):
+            self._request(client, scenario)
+
+        timings = []
+        queries = []
+        statuses = set()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = self._request(client, scenario)
+                timings.append(
+                    (time.perf_counter() - request_started) * 1000
+                )
+            queries.append(
+                sum(
+                    1
+                    for query in captured.captured_queries
+                    if not query["sql"].startswith(TRANSACTION_STATEMENTS)
+                )
+            )
+            statuses.add(response.status_code)
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        return {
+            "name": scenario["name"],
+            "method": scenario["method"].upper(),
+            "path": scenario["path"],
+            "statuses": sorted(statuses),
+            "iterations": iterations,
+            "p50_ms": round(percentile(timings, 0.50), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "throughput_rps": round(iterations / elapsed, 1),
+            "queries_per_request": round(statistics.fmean(queries), 2),
+        }
+
+    @staticmethod
+    def _meta(options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "iterations": options["iterations"],
+            "warmup": options["warmup"],
+        }
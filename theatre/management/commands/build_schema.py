@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand, CommandError
+
+from config.schema import SCHEMA_PATH, generate_schema
+
+
+class Command(BaseCommand):
+    """
+    Django command to regenerate the prebuilt OpenAPI schema served
+    at /api/schema/
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if the committed schema is out of date",
+        )
+
+    def handle(self, *args, **options):
+        content = generate_schema()
+
+        if options["check"]:
+            if not SCHEMA_PATH.exists() or SCHEMA_PATH.read_bytes() != content:
+                raise CommandError(
+                    f"{SCHEMA_PATH.name} is out of date, "
+                    f"run `python manage.py build_schema`"
+                )
+            self.stdout.write(self.style.SUCCESS("Schema is up to date"))
+            return
+
+        SCHEMA_PATH.write_bytes(content)
+        self.stdout.write(
+            self.style.SUCCESS(f"Schema written to {SCHEMA_PATH}")
+        )
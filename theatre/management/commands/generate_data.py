@@ -0,0 +1,278 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils.crypto import get_random_string
+
+from theatre.analytics import rebuild_stats
+from theatre.catalogue_cache import bump_catalogue_version
+from theatre.listing import rebuild_listing
+from theatre.popularity import rebuild_popularity
+from theatre.recommendations import rebuild_similar_plays
+from theatre.user_summary import rebuild_user_summary
+from theatre.models import (
+    Genre,
+    Actor,
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    Ticket,
+)
+
+GENRE_NAMES = (
+    "Tragedy", "Comedy", "Drama", "Vaudeville", "Opera", "Ballet",
+    "Musical", "Farce", "Melodrama", "Satire", "Pantomime", "Operetta",
+)
+FIRST_NAMES = (
+    "Olena", "Taras", "Ivan", "Maria", "Sofia", "Andrii", "Kateryna",
+    "Dmytro", "Iryna", "Oleh", "Natalia", "Bohdan", "Yulia", "Mykola",
+)
+LAST_NAMES = (
+    "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko",
+    "Melnyk", "Boyko", "Kovalchuk", "Oliynyk", "Lysenko", "Marchenko",
+)
+SHOW_HOURS = (12, 15, 19)
+
+
+class Command(BaseCommand):
+    """
+    Django command to populate the db with synthetic catalogue and sales
+    data at a configurable scale. Everything is written with bulk inserts
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--genres", type=int, default=12)
+        parser.add_argument("--actors", type=int, default=500)
+        parser.add_argument("--plays", type=int, default=200)
+        parser.add_argument("--halls", type=int, default=10)
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Number of days covered by the performance schedule",
+        )
+        parser.add_argument(
+            "--start-date",
+            default=None,
+            help="First day of the schedule, YYYY-MM-DD (default: "
+                 "--days/2 days ago, so half of the shows are in the past)",
+        )
+        parser.add_argument(
+            "--occupancy",
+            type=float,
+            default=0.6,
+            help="Average share of seats sold per performance (0..1)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        # Keeps re-runs from colliding on unique user emails
+        self.tag = get_random_string(6).lower()
+        started = time.perf_counter()
+
+        genres = self._create_genres(options["genres"])
+        actors = self._create_actors(options["actors"])
+        plays = self._create_plays(options["plays"], genres, actors)
+        halls = self._create_halls(options["halls"])
+        users = self._create_users(options["users"])
+
+        if options["start_date"]:
+            start_date = datetime.strptime(options["start_date"], "%Y-%m-%d")
+        else:
+            start_date = datetime.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ) - timedelta(days=options["days"] // 2)
+
+        performances = self._create_performances(
+            start_date, options["days"], plays, halls
+        )
+        reservations_count, tickets_count = self._create_sales(
+            performances, users, options["occupancy"]
+        )
+        # Bulk inserts bypass the incremental read model updates
+        rebuild_stats()
+        rebuild_listing(self.batch_size)
+        rebuild_popularity()
+        rebuild_user_summary()
+        rebuild_similar_plays()
+        bump_catalogue_version()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(genres)} genres, {len(actors)} actors, "
+                f"{len(plays)} plays, {len(halls)} halls, {len(users)} users, "
+                f"{len(performances)} performances, "
+                f"{reservations_count} reservations, "
+                f"{tickets_count} tickets in {elapsed:.1f}s"
+            )
+        )
+
+    def _create_genres(self, count):
+        existing = set(Genre.objects.values_list("name", flat=True))
+        names = [
+            GENRE_NAMES[index] if index < len(GENRE_NAMES)
+            else f"{GENRE_NAMES[index % len(GENRE_NAMES)]} {index}"
+            for index in range(count)
+        ]
+        Genre.objects.bulk_create(
+            [Genre(name=name) for name in names if name not in existing],
+            batch_size=self.batch_size,
+        )
+        return list(Genre.objects.filter(name__in=names))
+
+    def _create_actors(self, count):
+        return Actor.objects.bulk_create(
+            [
+                Actor(
+                    first_name=self.rnd.choice(FIRST_NAMES),
+                    last_name=self.rnd.choice(LAST_NAMES),
+                )
+                for _ in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _create_plays(self, count, genres, actors):
+        plays = Play.objects.bulk_create(
+            [
+                Play(
+                    title=f"Play #{index} ({self.tag})",
+                    description="Synthetic play generated for load testing",
+                )
+                for index in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+
+        genre_links = []
+        actor_links = []
+        for play in plays:
+            for genre in self.rnd.sample(genres, min(len(genres), 2)):
+                genre_links.append(
+                    Play.genres.through(play_id=play.id, genre_id=genre.id)
+                )
+            cast_size = min(len(actors), self.rnd.randint(3, 12))
+            for actor in self.rnd.sample(actors, cast_size):
+                actor_links.append(
+                    Play.actors.through(play_id=play.id, actor_id=actor.id)
+                )
+        Play.genres.through.objects.bulk_create(
+            genre_links, batch_size=self.batch_size
+        )
+        Play.actors.through.objects.bulk_create(
+            actor_links, batch_size=self.batch_size
+        )
+        return plays
+
+    def _create_halls(self, count):
+        halls = [
+            TheatreHall(
+                name=f"Hall #{index} ({self.tag})",
+                rows=self.rnd.randint(10, 40),
+                seats_in_row=self.rnd.randint(15, 50),
+            )
+            for index in range(count)
+        ]
+        # Bulk inserts skip `save()`, which derives the capacity
+        for hall in halls:
+            hall.update_layout_fields()
+        return TheatreHall.objects.bulk_create(
+            halls, batch_size=self.batch_size
+        )
+
+    def _create_users(self, count):
+        # Hashing once keeps user generation from being dominated by PBKDF2
+        password = make_password("User-12345")
+        return get_user_model().objects.bulk_create(
+            [
+                get_user_model()(
+                    email=f"user{index}.{self.tag}@example.com",
+                    password=password,
+                )
+                for index in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _create_performances(self, start_date, days, plays, halls):
+        performances = []
+        for day in range(days):
+            date = start_date + timedelta(days=day)
+            for hall in halls:
+                for hour in SHOW_HOURS:
+                    performances.append(
+                        Performance(
+                            play=self.rnd.choice(plays),
+                            theatre_hall=hall,
+                            show_time=date.replace(hour=hour),
+                        )
+                    )
+        return Performance.objects.bulk_create(
+            performances, batch_size=self.batch_size
+        )
+
+    def _create_sales(self, performances, users, occupancy):
+        """
+        Sell seats performance by performance, flushing reservations and
+        their tickets in batches to keep memory flat for millions of rows
+        """
+
+        reservations_count = 0
+        tickets_count = 0
+        pending = []
+
+        for performance in performances:
+            hall = performance.theatre_hall
+            share = min(1.0, max(0.0, self.rnd.gauss(occupancy, 0.15)))
+            seats = self.rnd.sample(
+                range(hall.capacity), int(hall.capacity * share)
+            )
+            position = 0
+            while position < len(seats):
+                party_size = self.rnd.randint(1, 6)
+                party = seats[position:position + party_size]
+                position += party_size
+                pending.append((performance, self.rnd.choice(users), party))
+                if len(pending) * 3 >= self.batch_size:
+                    created = self._flush_sales(pending)
+                    reservations_count += len(pending)
+                    tickets_count += created
+                    pending = []
+
+        if pending:
+            tickets_count += self._flush_sales(pending)
+            reservations_count += len(pending)
+
+        return reservations_count, tickets_count
+
+    def _flush_sales(self, pending):
+        with transaction.atomic():
+            reservations = Reservation.objects.bulk_create(
+                [Reservation(user=user) for _, user, _ in pending]
+            )
+            tickets = [
+                Ticket(
+                    reservation=reservation,
+                    performance=performance,
+                    row=seat_index // performance.theatre_hall.seats_in_row
+                    + 1,
+                    seat=seat_index % performance.theatre_hall.seats_in_row
+                    + 1,
+                )
+                for reservation, (performance, _, party) in zip(
+                    reservations, pending
+                )
+                for seat_index in party
+            ]
+            Ticket.objects.bulk_create(tickets, batch_size=self.batch_size)
+        return len(tickets)
@@ -0,0 +1,308 @@
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.db import connection, transaction, IntegrityError
+
+from theatre.analytics import rebuild_stats
+from theatre.catalogue_cache import bump_catalogue_version
+from theatre.listing import rebuild_listing
+from theatre.popularity import rebuild_popularity
+from theatre.recommendations import rebuild_similar_plays
+from theatre.user_summary import rebuild_user_summary
+from theatre.layouts import LayoutError
+from theatre.models import Performance, TheatreHall, Ticket
+
+CHUNK_SIZE = 1 << 16
+
+
+def iter_json_array(stream):
+    """
+    Yield the items of a top-level JSON array one by one without
+    loading the whole document into memory
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    exhausted = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != "[":
+                    raise CommandError("JSON input must be an array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise CommandError("Malformed JSON input")
+            else:
+                yield item
+                continue
+
+        if exhausted:
+            raise CommandError("Unexpected end of JSON input")
+        chunk = stream.read(CHUNK_SIZE)
+        exhausted = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_csv_rows(stream, model_label):
+    """
+    Yield CSV rows in the fixture layout used by `loaddata`.
+    Many-to-many columns hold ids separated by ";"
+    """
+
+    model = apps.get_model(model_label)
+    m2m_names = {field.name for field in model._meta.many_to_many}
+    pk_name = model._meta.pk.name
+
+    for row in csv.DictReader(stream):
+        fields = {}
+        for name, value in row.items():
+            if name in m2m_names:
+                fields[name] = [
+                    int(item) for item in value.split(";") if item
+                ]
+            elif name not in ("pk", pk_name):
+                fields[name] = value if value != "" else None
+        yield {
+            "model": model_label,
+            "pk": row.get("pk") or row.get(pk_name) or None,
+            "fields": fields,
+        }
+
+
+class Command(BaseCommand):
+    """
+    Django command to bulk import catalogue and sales data from a JSON
+    fixture (the `loaddata`/`dumpdata` layout) or a CSV file. Input is
+    streamed, validated in batches and written with multi-row inserts,
+    or COPY on PostgreSQL
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON fixture or CSV file")
+        parser.add_argument(
+            "--model",
+            default=None,
+            help="Model label of CSV rows, e.g. theatre.ticket",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--method",
+            choices=("auto", "copy", "insert"),
+            default="auto",
+            help="COPY is used on PostgreSQL when set to auto",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        is_csv = path.lower().endswith(".csv")
+        if is_csv and not options["model"]:
+            raise CommandError("--model is required for CSV input")
+
+        method = options["method"]
+        if method == "auto":
+            method = "copy" if connection.vendor == "postgresql" else "insert"
+        if method == "copy" and connection.vendor != "postgresql":
+            raise CommandError("COPY is only supported on PostgreSQL")
+        self.method = method
+        self.batch_size = options["batch_size"]
+        self.hall_by_performance = {}
+        self.counts = defaultdict(int)
+
+        started = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as stream:
+            items = (
+                iter_csv_rows(stream, options["model"])
+                if is_csv
+                else iter_json_array(stream)
+            )
+            with transaction.atomic():
+                self._import(items)
+                self._reset_sequences()
+                # Bulk writes bypass the incremental read model updates
+                rebuild_stats()
+                rebuild_listing(self.batch_size)
+                rebuild_popularity()
+                rebuild_user_summary()
+                bump_catalogue_version()
+        # Recomputed from all sales, outside the import transaction
+        rebuild_similar_plays()
+        elapsed = time.perf_counter() - started
+
+        total = sum(self.counts.values())
+        for label, count in self.counts.items():
+            self.stdout.write(f"{label}: {count} rows")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} rows in {elapsed:.2f}s "
+                f"({total / elapsed if elapsed else total:.0f} rows/s, "
+                f"method: {self.method})"
+            )
+        )
+
+    def _import(self, items):
+        batch = []
+        batch_model = None
+        for item in items:
+            label = item.get("model", "").lower()
+            if batch and (
+                label != batch_model or len(batch) >= self.batch_size
+            ):
+                self._flush(batch_model, batch)
+                batch = []
+            batch_model = label
+            batch.append(item)
+        if batch:
+            self._flush(batch_model, batch)
+
+    def _flush(self, label, items):
+        try:
+            deserialized = list(
+                serializers.deserialize(
+                    "python", items, ignorenonexistent=True
+                )
+            )
+        except DeserializationError as error:
+            raise CommandError(f"Invalid {label} data: {error}")
+
+        model = apps.get_model(label)
+        objects = [item.object for item in deserialized]
+        if model is Ticket:
+            self._validate_tickets(objects)
+        if model is TheatreHall:
+            self._derive_layout_fields(objects)
+
+        try:
+            if objects[0].pk is None:
+                # Rows without ids need the database to hand the keys back
+                model.objects.bulk_create(objects, batch_size=self.batch_size)
+            elif self.method == "copy":
+                self._copy(model, objects)
+            else:
+                self._insert(model, objects)
+            self._insert_m2m(model, deserialized)
+        except IntegrityError as error:
+            raise CommandError(f"Could not import {label}: {error}")
+
+        self.counts[label] += len(objects)
+
+    @staticmethod
+    def _derive_layout_fields(halls):
+        for hall in halls:
+            try:
+                hall.update_layout_fields()
+            except LayoutError as error:
+                raise CommandError(f"Theatre hall {hall.pk}: {error}")
+
+    def _validate_tickets(self, tickets):
+        """
+        Check seat ranges of a whole batch against hall dimensions,
+        loading the halls of unseen performances with a single query
+        """
+
+        missing = {
+            ticket.performance_id
+            for ticket in tickets
+            if ticket.performance_id not in self.hall_by_performance
+        }
+        if missing:
+            for performance in Performance.objects.filter(
+                id__in=missing
+            ).select_related("theatre_hall"):
+                self.hall_by_performance[performance.id] = (
+                    performance.theatre_hall
+                )
+
+        for ticket in tickets:
+            hall = self.hall_by_performance.get(ticket.performance_id)
+            if hall is None:
+                raise CommandError(
+                    f"Ticket {ticket.pk}: performance "
+                    f"{ticket.performance_id} does not exist"
+                )
+            try:
+                Ticket.validate_ticket(
+                    ticket.row, ticket.seat, hall, CommandError
+                )
+            except CommandError as error:
+                raise CommandError(f"Ticket {ticket.pk}: {error}")
+
+    def _insert(self, model, objects):
+        """
+        Multi-row INSERT in raw mode, like `loaddata`, so imported values
+        such as `Reservation.created_at` are kept instead of `auto_now_add`
+        """
+
+        fields = model._meta.concrete_fields
+        step = connection.ops.bulk_batch_size(fields, objects) or len(objects)
+        for start in range(0, len(objects), step):
+            model._base_manager._insert(
+                objects[start:start + step], fields=fields, raw=True
+            )
+
+    def _copy(self, model, objects):
+        fields = model._meta.concrete_fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            row = []
+            for field in fields:
+                value = field.get_db_prep_save(
+                    getattr(obj, field.attname), connection
+                )
+                row.append(r"\N" if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+
+        columns = ", ".join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} "
+                f"({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    def _insert_m2m(self, model, deserialized):
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source = field.m2m_field_name() + "_id"
+            target = field.m2m_reverse_field_name() + "_id"
+            links = [
+                through(**{source: item.object.pk, target: related_pk})
+                for item in deserialized
+                for related_pk in (item.m2m_data or {}).get(field.name, [])
+            ]
+            through.objects.bulk_create(links, batch_size=self.batch_size)
+            if links:
+                self.counts[through._meta.label_lower] += len(links)
+
+    def _reset_sequences(self):
+        models = [apps.get_model(label) for label in self.counts]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
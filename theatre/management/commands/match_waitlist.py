@@ -0,0 +1,37 @@
+import time
+
+from django.core.management import BaseCommand
+
+from theatre.waitlist import match_waitlist
+
+
+class Command(BaseCommand):
+    """
+    Django command to offer released seats to waitlisted users.
+    Runs a single pass, or keeps running with --interval
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Waitlist entries matched per performance and pass",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Seconds between passes, runs once when omitted",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired, offered = match_waitlist(options["batch_size"])
+            if expired or offered:
+                self.stdout.write(
+                    f"Expired {expired} offers, made {offered} offers"
+                )
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management import BaseCommand
+
+from theatre.models import ThrottleCounter
+
+
+class Command(BaseCommand):
+    """
+    Django command to delete throttle counters of keys that have been
+    idle for longer than their sliding window
+    """
+
+    def handle(self, *args, **options):
+        deleted, _ = ThrottleCounter.objects.filter(
+            expires_at__lt=time.time()
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired throttle counters")
+        )
@@ -0,0 +1,48 @@
+from django.core.management import BaseCommand, CommandError
+
+from theatre.analytics import compute_stats, stored_stats, rebuild_stats
+
+
+def _non_empty(stats):
+    return {key: row for key, row in stats.items() if any(row.values())}
+
+
+class Command(BaseCommand):
+    """
+    Django command to recompute the sales & occupancy summary tables
+    from performances and tickets, or to verify them with --check
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored summaries with recomputed ones",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            plays, halls = rebuild_stats()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rebuilt {plays} play and {halls} hall daily summaries"
+                )
+            )
+            return
+
+        mismatches = 0
+        for name, expected, stored in zip(
+            ("play", "hall"), compute_stats(), stored_stats()
+        ):
+            expected, stored = _non_empty(expected), _non_empty(stored)
+            for key in sorted(expected.keys() | stored.keys()):
+                if expected.get(key) != stored.get(key):
+                    mismatches += 1
+                    self.stdout.write(
+                        f"{name} {key[0]} on {key[1]}: stored "
+                        f"{stored.get(key)}, expected {expected.get(key)}"
+                    )
+
+        if mismatches:
+            raise CommandError(f"{mismatches} summaries are out of sync")
+        self.stdout.write(self.style.SUCCESS("Summaries are consistent"))
@@ -0,0 +1,52 @@
+from django.core.management import BaseCommand, CommandError
+
+from theatre.listing import COLUMNS, source_rows, stored_rows, rebuild_listing
+
+
+class Command(BaseCommand):
+    """
+    Django command to recompute the denormalized performance listing
+    from plays, halls, performances and tickets, or to verify it
+    with --check
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored listing with the source tables",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            count = rebuild_listing(options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {count} performance listings")
+            )
+            return
+
+        expected = {row[0]: row for row in source_rows().iterator()}
+        stored = {row[0]: row for row in stored_rows().iterator()}
+        mismatches = 0
+        for performance_id in sorted(expected.keys() | stored.keys()):
+            if expected.get(performance_id) == stored.get(performance_id):
+                continue
+            mismatches += 1
+            if performance_id not in stored:
+                problem = "missing"
+            else:
+                problem = "stale " + ", ".join(
+                    column
+                    for column, source, listed in zip(
+                        COLUMNS,
+                        expected[performance_id],
+                        stored[performance_id],
+                    )
+                    if source != listed
+                )
+            self.stdout.write(f"performance {performance_id}: {problem}")
+
+        if mismatches:
+            raise CommandError(f"{mismatches} listings are out of sync")
+        self.stdout.write(self.style.SUCCESS("Listing is consistent"))
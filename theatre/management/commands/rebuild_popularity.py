@@ -0,0 +1,45 @@
+from django.core.management import BaseCommand, CommandError
+
+from theatre.popularity import (
+    compute_buckets,
+    rebuild_popularity,
+    stored_buckets,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command to recompute the daily sales counters of the
+    popularity leaderboard, dropping days older than the longest
+    window, or to verify them with --check
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored counters with the sales",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            count = rebuild_popularity()
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {count} daily sales counters")
+            )
+            return
+
+        expected = compute_buckets()
+        stored = stored_buckets()
+        mismatches = 0
+        for key in sorted(expected.keys() | stored.keys()):
+            if expected.get(key) != stored.get(key):
+                mismatches += 1
+                self.stdout.write(
+                    f"play {key[0]} on {key[1]}: stored "
+                    f"{stored.get(key)}, expected {expected.get(key)}"
+                )
+
+        if mismatches:
+            raise CommandError(f"{mismatches} counters are out of sync")
+        self.stdout.write(self.style.SUCCESS("Counters are consistent"))
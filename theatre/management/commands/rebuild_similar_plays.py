@@ -0,0 +1,67 @@
+from collections import Counter
+
+from django.core.management import BaseCommand, CommandError
+
+from theatre.recommendations import (
+    MAX_POSTINGS,
+    TOP_K,
+    compute_similar,
+    rebuild_similar_plays,
+    stored_similar,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command to recompute all "similar plays" lists from genres,
+    cast and ticket sales, rewriting only the lists that changed, or to
+    verify them with --check
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored lists with the computed ones",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=TOP_K,
+            help="Similar plays kept per play",
+        )
+
+    def handle(self, *args, **options):
+        skipped = Counter()
+        if not options["check"]:
+            changed = rebuild_similar_plays(options["top"], skipped)
+            self._report_skipped(skipped)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Updated similar plays of {len(changed)} plays"
+                )
+            )
+            return
+
+        expected = compute_similar(options["top"], skipped)
+        self._report_skipped(skipped)
+        stored = stored_similar()
+        stale = sorted(
+            play_id
+            for play_id in expected.keys() | stored.keys()
+            if expected.get(play_id, []) != stored.get(play_id, [])
+        )
+        for play_id in stale:
+            self.stdout.write(f"play {play_id}: stale")
+        if stale:
+            raise CommandError(f"{len(stale)} similar play lists are stale")
+        self.stdout.write(self.style.SUCCESS("Similar plays are up to date"))
+
+    def _report_skipped(self, skipped):
+        for group, count in sorted(skipped.items()):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{count} {group} features shared by more than "
+                    f"{MAX_POSTINGS} plays were left out"
+                )
+            )
@@ -0,0 +1,44 @@
+from django.core.management import BaseCommand, CommandError
+
+from theatre.user_summary import (
+    compute_counters,
+    rebuild_user_summary,
+    stored_counters,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command to recompute the per-user ticket counters behind the
+    profile reservation summary, or to verify them with --check
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored counters with the sales",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            count = rebuild_user_summary()
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {count} user ticket counters")
+            )
+            return
+
+        expected = compute_counters()
+        stored = stored_counters()
+        mismatches = 0
+        for key in sorted(expected.keys() | stored.keys()):
+            if expected.get(key) != stored.get(key):
+                mismatches += 1
+                self.stdout.write(
+                    f"user {key[0]} at performance {key[1]}: stored "
+                    f"{stored.get(key)}, expected {expected.get(key)}"
+                )
+
+        if mismatches:
+            raise CommandError(f"{mismatches} counters are out of sync")
+        self.stdout.write(self.style.SUCCESS("Counters are consistent"))
@@ -0,0 +1,150 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+# Modules an API worker should never import eagerly. DRF itself imports
+# `django.contrib.admin` through `rest_framework.schemas`, so admin is
+# tracked by the model admins that only admin autodiscovery loads
+HEAVY_MODULES = (
+    "theatre.admin",
+    "user.admin",
+    "drf_spectacular.views",
+    "drf_spectacular.generators",
+    "debug_toolbar",
+    "PIL",
+)
+
+# Runs in a fresh interpreter: loads the WSGI app like a worker would and
+# serves one request to the liveness probe
+WORKER_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from config.wsgi import application
+loaded = time.perf_counter()
+status = []
+application(
+    {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": "/healthz/",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "REMOTE_ADDR": "10.0.0.1",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": sys.stdin.buffer,
+    },
+    lambda response_status, headers: status.append(response_status),
+)
+responded = time.perf_counter()
+print(json.dumps({
+    "app_load_ms": (loaded - started) * 1000,
+    "first_response_ms": (responded - started) * 1000,
+    "status": status[0],
+    "modules": {
+        name: name in sys.modules for name in %(modules)r
+    },
+}))
+"""
+
+
+def parse_importtime(stderr, top):
+    """
+    Return the `top` slowest modules by cumulative import time
+    from the `-X importtime` report
+    """
+
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            imports.append((int(cumulative), name.strip()))
+    imports.sort(reverse=True)
+    return [
+        {"module": name, "cumulative_ms": round(cumulative / 1000, 2)}
+        for cumulative, name in imports[:top]
+    ]
+
+
+def measure_startup(profile, top=20) -> dict:
+    """
+    Start a worker process in the given profile and measure its import
+    time breakdown and the time to its first response
+    """
+
+    env = dict(os.environ, WORKER_PROFILE=profile)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            WORKER_SCRIPT % {"modules": HEAVY_MODULES},
+        ],
+        capture_output=True,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        raise CommandError(
+            f"Worker failed to start:\n{result.stderr[-2000:]}"
+        )
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report.update(
+        profile=profile,
+        wall_ms=round(wall_ms, 2),
+        app_load_ms=round(report["app_load_ms"], 2),
+        first_response_ms=round(report["first_response_ms"], 2),
+        top_imports=parse_importtime(result.stderr, top),
+    )
+    return report
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure worker cold start: `-X importtime`
+    breakdown and time to first response, as JSON
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=("api", "full"),
+            default=[],
+            help="Worker profile(s) to measure (default: api and full)",
+        )
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            default=None,
+            help="Fail when the api profile needs longer to first response",
+        )
+
+    def handle(self, *args, **options):
+        reports = [
+            measure_startup(profile, options["top"])
+            for profile in options["profile"] or ["api", "full"]
+        ]
+        self.stdout.write(json.dumps(reports, indent=2))
+
+        for report in reports:
+            if (
+                options["budget_ms"]
+                and report["profile"] == "api"
+                and report["first_response_ms"] > options["budget_ms"]
+            ):
+                raise CommandError(
+                    f"API worker needed {report['first_response_ms']} ms "
+                    f"to first response, budget is {options['budget_ms']} ms"
+                )
@@ -1,7 +1,8 @@
 import time
-from django.db import connections
-from django.db.utils import OperationalError
-from django.core.management import BaseCommand
+
+from django.core.management import BaseCommand, CommandError
+
+from theatre.startup import wait_for_database, warm_up
 
 
 class Command(BaseCommand):
@@ -9,14 +10,44 @@ class Command(BaseCommand):
     Django command to pause execution until db is available
     """
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait before giving up",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Longest pause between connection attempts",
+        )
+        parser.add_argument(
+            "--warm-up",
+            action="store_true",
+            help="Also run the worker warm-up tasks once the db is up",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
-
-        self.stdout.write(self.style.SUCCESS("Database available!"))
+        started = time.monotonic()
+        if not wait_for_database(
+            timeout=options["timeout"],
+            max_delay=options["max_delay"],
+            log=self.stdout.write,
+        ):
+            raise CommandError(
+                f"Database unavailable after {options['timeout']:.0f}s"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Database available! ({time.monotonic() - started:.2f}s)"
+            )
+        )
+
+        if options["warm_up"]:
+            if not warm_up():
+                raise CommandError("Warm-up failed")
+            self.stdout.write(self.style.SUCCESS("Warm-up complete"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0004_alter_play_actors_alter_play_genres"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleCounter",
+            fields=[
+                (
+                    "key",
+                    models.CharField(
+                        max_length=255, primary_key=True, serialize=False
+                    ),
+                ),
+                ("window_start", models.BigIntegerField()),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("previous_hits", models.PositiveIntegerField(default=0)),
+                ("expires_at", models.BigIntegerField(db_index=True)),
+            ],
+        ),
+    ]
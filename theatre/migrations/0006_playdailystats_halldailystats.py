@@ -0,0 +1,121 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:43
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_stats(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    Ticket = apps.get_model("theatre", "Ticket")
+
+    for owner, stats_model in (
+        ("play", apps.get_model("theatre", "PlayDailyStats")),
+        ("theatre_hall", apps.get_model("theatre", "HallDailyStats")),
+    ):
+        stats = defaultdict(
+            lambda: {"performances": 0, "seats_offered": 0, "tickets_sold": 0}
+        )
+        for row in (
+            Performance.objects.annotate(date=TruncDate("show_time"))
+            .values(f"{owner}_id", "date")
+            .annotate(
+                performances=Count("id"),
+                seats_offered=Sum(
+                    F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
+                ),
+            )
+            .order_by()
+        ):
+            stats[(row[f"{owner}_id"], row["date"])].update(
+                performances=row["performances"],
+                seats_offered=row["seats_offered"],
+            )
+        for row in (
+            Ticket.objects.annotate(date=TruncDate("performance__show_time"))
+            .values(f"performance__{owner}_id", "date")
+            .annotate(tickets_sold=Count("id"))
+            .order_by()
+        ):
+            stats[(row[f"performance__{owner}_id"], row["date"])][
+                "tickets_sold"
+            ] = row["tickets_sold"]
+
+        stats_model.objects.bulk_create(
+            stats_model(**{f"{owner}_id": owner_id, "date": date}, **counters)
+            for (owner_id, date), counters in stats.items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0005_throttlecounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HallDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("performances", models.IntegerField(default=0)),
+                ("seats_offered", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                (
+                    "theatre_hall",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="theatre.theatrehall",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "unique_together": {("theatre_hall", "date")},
+            },
+        ),
+        migrations.CreateModel(
+            name="PlayDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("performances", models.IntegerField(default=0)),
+                ("seats_offered", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                (
+                    "play",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="theatre.play",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "unique_together": {("play", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
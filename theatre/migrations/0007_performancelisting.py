@@ -0,0 +1,113 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:47
+
+import django.db.models.deletion
+import theatre.models
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def backfill_listing(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    PerformanceListing = apps.get_model("theatre", "PerformanceListing")
+
+    rows = (
+        Performance.objects.annotate(
+            capacity=F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
+        )
+        .annotate(available=F("capacity") - Count("tickets"))
+        .values_list(
+            "id",
+            "play_id",
+            "show_time",
+            "play__title",
+            "play__image",
+            "theatre_hall__name",
+            "capacity",
+            "available",
+        )
+        .order_by("id")
+    )
+    PerformanceListing.objects.bulk_create(
+        (
+            PerformanceListing(
+                performance_id=performance_id,
+                play_id=play_id,
+                show_time=show_time,
+                play_title=title,
+                play_image=image,
+                theatre_hall_name=hall_name,
+                theatre_hall_capacity=capacity,
+                tickets_available=available,
+            )
+            for (
+                performance_id,
+                play_id,
+                show_time,
+                title,
+                image,
+                hall_name,
+                capacity,
+                available,
+            ) in rows.iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0006_playdailystats_halldailystats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PerformanceListing",
+            fields=[
+                (
+                    "performance",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="listing",
+                        serialize=False,
+                        to="theatre.performance",
+                    ),
+                ),
+                ("show_time", models.DateTimeField()),
+                ("play_title", models.CharField(max_length=255)),
+                (
+                    "play_image",
+                    models.ImageField(
+                        null=True,
+                        upload_to=theatre.models.play_image_file_path,
+                    ),
+                ),
+                ("theatre_hall_name", models.CharField(max_length=255)),
+                ("theatre_hall_capacity", models.IntegerField()),
+                ("tickets_available", models.IntegerField()),
+                (
+                    "play",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.play",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["show_time", "performance"],
+                "indexes": [
+                    models.Index(
+                        fields=["show_time", "performance"],
+                        name="theatre_per_show_ti_a7feff_idx",
+                    ),
+                    models.Index(
+                        fields=["play", "show_time"],
+                        name="theatre_per_play_id_de3f33_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_listing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:50
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0007_performancelisting"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="duration",
+            field=models.PositiveSmallIntegerField(
+                default=120,
+                help_text="Minutes, including intervals",
+                validators=[django.core.validators.MaxValueValidator(1440)],
+            ),
+        ),
+    ]
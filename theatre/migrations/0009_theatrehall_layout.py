@@ -0,0 +1,39 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:52
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_capacity(apps, schema_editor):
+    TheatreHall = apps.get_model("theatre", "TheatreHall")
+    TheatreHall.objects.update(capacity=F("rows") * F("seats_in_row"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0008_play_duration"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="theatrehall",
+            name="capacity",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="theatrehall",
+            name="layout",
+            field=models.TextField(
+                blank=True,
+                default="",
+                help_text="One line per row, A-Z is a seat of that category, '.' an aisle or a missing seat. Empty for a rows x seats_in_row rectangle",
+            ),
+        ),
+        migrations.AddField(
+            model_name="theatrehall",
+            name="layout_version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(fill_capacity, migrations.RunPython.noop),
+    ]
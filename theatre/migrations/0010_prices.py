@@ -0,0 +1,84 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0009_theatrehall_layout"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reservation",
+            name="total",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=10
+            ),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=8, null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="CategoryPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("category", models.CharField(max_length=1)),
+                ("price", models.DecimalField(decimal_places=2, max_digits=8)),
+                (
+                    "theatre_hall",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prices",
+                        to="theatre.theatrehall",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["theatre_hall", "category"],
+                "unique_together": {("theatre_hall", "category")},
+            },
+        ),
+        migrations.CreateModel(
+            name="PerformancePrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("category", models.CharField(max_length=1)),
+                ("price", models.DecimalField(decimal_places=2, max_digits=8)),
+                (
+                    "performance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prices",
+                        to="theatre.performance",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["performance", "category"],
+                "unique_together": {("performance", "category")},
+            },
+        ),
+    ]
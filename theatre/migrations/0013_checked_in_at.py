@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0012_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedticket",
+            name="checked_in_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="checked_in_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
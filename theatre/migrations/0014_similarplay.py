@@ -0,0 +1,49 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0013_checked_in_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarPlay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "other",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.play",
+                    ),
+                ),
+                (
+                    "play",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar",
+                        to="theatre.play",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["play", "-score", "other"],
+                "unique_together": {("play", "other")},
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:24
+
+import django.db.models.deletion
+from collections import Counter
+from datetime import date, timedelta
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_buckets(apps, schema_editor):
+    PlaySalesBucket = apps.get_model("theatre", "PlaySalesBucket")
+
+    first_day = date.today() - timedelta(days=29)
+    buckets = Counter()
+    for name in ("Ticket", "ArchivedTicket"):
+        rows = (
+            apps.get_model("theatre", name)
+            .objects.filter(reservation__created_at__gte=first_day)
+            .annotate(date=TruncDate("reservation__created_at"))
+            .values_list("performance__play_id", "date")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for play_id, day, count in rows:
+            buckets[(play_id, day)] += count
+
+    PlaySalesBucket.objects.bulk_create(
+        PlaySalesBucket(play_id=play_id, date=day, tickets_sold=count)
+        for (play_id, day), count in buckets.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0014_similarplay"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaySalesBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("tickets_sold", models.IntegerField(default=0)),
+                (
+                    "play",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.play",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["date", "play"],
+                        name="theatre_pla_date_763193_idx",
+                    )
+                ],
+                "unique_together": {("play", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:28
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_user_tickets(apps, schema_editor):
+    UserPerformanceTickets = apps.get_model(
+        "theatre", "UserPerformanceTickets"
+    )
+
+    counters = Counter()
+    for name in ("Ticket", "ArchivedTicket"):
+        rows = (
+            apps.get_model("theatre", name)
+            .objects.values_list("reservation__user_id", "performance_id")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for user_id, performance_id, count in rows:
+            counters[(user_id, performance_id)] += count
+
+    UserPerformanceTickets.objects.bulk_create(
+        UserPerformanceTickets(
+            user_id=user_id, performance_id=performance_id, tickets=count
+        )
+        for (user_id, performance_id), count in counters.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0015_playsalesbucket"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserPerformanceTickets",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tickets", models.IntegerField(default=0)),
+                (
+                    "performance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.performance",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "performance")},
+            },
+        ),
+        migrations.RunPython(backfill_user_tickets, migrations.RunPython.noop),
+    ]
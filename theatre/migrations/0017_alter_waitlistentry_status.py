@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0016_userperformancetickets"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="waitlistentry",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("waiting", "Waiting"),
+                    ("offered", "Offered"),
+                    ("booked", "Booked"),
+                    ("expired", "Expired"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="waiting",
+                max_length=10,
+            ),
+        ),
+    ]
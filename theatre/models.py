@@ -3,9 +3,12 @@ import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator
 from django.db import models
 from django.utils.text import slugify
 
+from theatre.layouts import LayoutError, compile_layout, get_layout
+
 
 class Genre(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -26,6 +29,11 @@ class Actor(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+# Longest allowed play, in minutes. Bounds the window searched for
+# performances still running when another one starts
+MAX_PLAY_DURATION = 24 * 60
+
+
 def play_image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
     filename = f"{slugify(instance.title)}-{uuid.uuid4()}{extension}"
@@ -39,6 +47,11 @@ class Play(models.Model):
     genres = models.ManyToManyField(Genre, blank=True, related_name="plays")
     actors = models.ManyToManyField(Actor, blank=True, related_name="plays")
     image = models.ImageField(null=True, upload_to=play_image_file_path)
+    duration = models.PositiveSmallIntegerField(
+        default=120,
+        validators=[MaxValueValidator(MAX_PLAY_DURATION)],
+        help_text="Minutes, including intervals",
+    )
 
     class Meta:
         ordering = ["title"]
@@ -51,10 +64,44 @@ class TheatreHall(models.Model):
     name = models.CharField(max_length=255)
     rows = models.IntegerField()
     seats_in_row = models.IntegerField()
+    layout = models.TextField(
+        blank=True,
+        default="",
+        help_text="One line per row, A-Z is a seat of that category, "
+                  "'.' an aisle or a missing seat. Empty for a "
+                  "rows x seats_in_row rectangle",
+    )
+    layout_version = models.PositiveIntegerField(default=1, editable=False)
+    capacity = models.PositiveIntegerField(default=0, editable=False)
 
     @property
-    def capacity(self) -> int:
-        return self.rows * self.seats_in_row
+    def seat_layout(self):
+        return get_layout(self)
+
+    def update_layout_fields(self):
+        """
+        Derive `rows`, `seats_in_row` and `capacity` from the layout.
+        Raises `LayoutError`
+        """
+
+        layout = compile_layout(self.layout, self.rows, self.seats_in_row)
+        if self.layout:
+            self.rows = len(layout.rows)
+            self.seats_in_row = layout.width
+        self.capacity = layout.capacity
+
+    def clean(self):
+        try:
+            compile_layout(self.layout, self.rows, self.seats_in_row)
+        except LayoutError as error:
+            raise ValidationError({"layout": str(error)})
+
+    def save(self, *args, **kwargs):
+        self.update_layout_fields()
+        if self.pk:
+            # Retires the compiled layouts cached for the previous version
+            self.layout_version += 1
+        return super(TheatreHall, self).save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -72,11 +119,82 @@ class Performance(models.Model):
         return self.play.title + " " + str(self.show_time)
 
 
+class PerformanceListing(models.Model):
+    """
+    Flat, denormalized row per performance with everything the
+    performance list shows. Kept in sync by `theatre.listing`
+    """
+
+    performance = models.OneToOneField(
+        Performance,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="listing",
+    )
+    play = models.ForeignKey(Play, on_delete=models.CASCADE, related_name="+")
+    show_time = models.DateTimeField()
+    play_title = models.CharField(max_length=255)
+    play_image = models.ImageField(null=True, upload_to=play_image_file_path)
+    theatre_hall_name = models.CharField(max_length=255)
+    theatre_hall_capacity = models.IntegerField()
+    tickets_available = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.play_title} {self.show_time}"
+
+    class Meta:
+        ordering = ["show_time", "performance"]
+        indexes = [
+            models.Index(fields=["show_time", "performance"]),
+            models.Index(fields=["play", "show_time"]),
+        ]
+
+
+class CategoryPrice(models.Model):
+    """
+    Price of a seat category in a hall, see `theatre.layouts`
+    """
+
+    theatre_hall = models.ForeignKey(
+        TheatreHall, on_delete=models.CASCADE, related_name="prices"
+    )
+    category = models.CharField(max_length=1)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.theatre_hall} {self.category}: {self.price}"
+
+    class Meta:
+        unique_together = ("theatre_hall", "category")
+        ordering = ["theatre_hall", "category"]
+
+
+class PerformancePrice(models.Model):
+    """
+    Price of a seat category for one performance, overrides the price
+    of its hall
+    """
+
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="prices"
+    )
+    category = models.CharField(max_length=1)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.performance} {self.category}: {self.price}"
+
+    class Meta:
+        unique_together = ("performance", "category")
+        ordering = ["performance", "category"]
+
+
 class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
     def __str__(self):
         return str(self.user) + " " + str(self.created_at)
@@ -94,6 +212,11 @@ class Ticket(models.Model):
     reservation = models.ForeignKey(
         Reservation, on_delete=models.CASCADE, related_name="tickets"
     )
+    # Price paid, null when the seat category had no price
+    price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True
+    )
+    checked_in_at = models.DateTimeField(null=True, blank=True)
 
     @staticmethod
     def validate_ticket(row, seat, theatre_hall, error_to_raise):
@@ -113,6 +236,11 @@ class Ticket(models.Model):
                     }
                 )
 
+        if not theatre_hall.seat_layout.is_seat(row, seat):
+            raise error_to_raise(
+                {"seat": f"row {row} has no seat number {seat}"}
+            )
+
     def clean(self):
         Ticket.validate_ticket(
             self.row,
@@ -141,3 +269,255 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("performance", "row", "seat")
         ordering = ["row", "seat"]
+
+
+class ArchivedReservation(models.Model):
+    """
+    A reservation whose performances are all over, moved out of
+    `Reservation` by `archive_sales` with its original id
+    """
+
+    id = models.BigIntegerField(primary_key=True)  # noqa: VNE003
+    created_at = models.DateTimeField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.user) + " " + str(self.created_at)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+
+class ArchivedTicket(models.Model):
+    """
+    A ticket of an archived reservation. There is no unique seat index,
+    the seats were unique when the tickets were sold
+    """
+
+    id = models.BigIntegerField(primary_key=True)  # noqa: VNE003
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    performance = models.ForeignKey(
+        Performance,
+        on_delete=models.CASCADE,
+        related_name="archived_tickets",
+    )
+    reservation = models.ForeignKey(
+        ArchivedReservation, on_delete=models.CASCADE, related_name="tickets"
+    )
+    price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True
+    )
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return (
+            f"{str(self.performance)} (row: {self.row}, seat: {self.seat})"
+        )
+
+    class Meta:
+        ordering = ["row", "seat"]
+
+
+class PlaySalesBucket(models.Model):
+    """
+    Tickets of a play booked on one day and not cancelled, the
+    counters behind the popularity leaderboard
+    """
+
+    play = models.ForeignKey(Play, on_delete=models.CASCADE, related_name="+")
+    date = models.DateField()
+    tickets_sold = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.play} {self.date}"
+
+    class Meta:
+        unique_together = ("play", "date")
+        ordering = ["date"]
+        indexes = [models.Index(fields=["date", "play"])]
+
+
+class UserPerformanceTickets(models.Model):
+    """
+    Tickets a user holds for a performance, archived ones included,
+    the counters behind the reservation summary of a profile
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="+"
+    )
+    tickets = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} {self.performance}"
+
+    class Meta:
+        unique_together = ("user", "performance")
+
+
+class SimilarPlay(models.Model):
+    """
+    One of the plays most similar to `play`, precomputed by
+    `rebuild_similar_plays`
+    """
+
+    play = models.ForeignKey(
+        Play, on_delete=models.CASCADE, related_name="similar"
+    )
+    other = models.ForeignKey(
+        Play, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+
+    def __str__(self):
+        return f"{self.play} ~ {self.other} ({self.score:.3f})"
+
+    class Meta:
+        unique_together = ("play", "other")
+        ordering = ["play", "-score", "other"]
+
+
+class ThrottleCounter(models.Model):
+    """
+    Sliding window request counter shared by all workers.
+    One row per throttle key, updated with a single upsert per request
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    window_start = models.BigIntegerField()
+    hits = models.PositiveIntegerField(default=0)
+    previous_hits = models.PositiveIntegerField(default=0)
+    expires_at = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class PlayDailyStats(models.Model):
+    """
+    Performances, seats offered and tickets sold per play and show date.
+    Maintained incrementally by `theatre.analytics`
+    """
+
+    date = models.DateField()
+    play = models.ForeignKey(
+        Play, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    performances = models.IntegerField(default=0)
+    seats_offered = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+
+    @property
+    def occupancy(self) -> float:
+        return (
+            self.tickets_sold / self.seats_offered
+            if self.seats_offered
+            else 0.0
+        )
+
+    def __str__(self):
+        return f"{self.play} {self.date}"
+
+    class Meta:
+        unique_together = ("play", "date")
+        ordering = ["date"]
+
+
+class HallDailyStats(models.Model):
+    """
+    Performances, seats offered and tickets sold per hall and show date.
+    Maintained incrementally by `theatre.analytics`
+    """
+
+    date = models.DateField()
+    theatre_hall = models.ForeignKey(
+        TheatreHall, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    performances = models.IntegerField(default=0)
+    seats_offered = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+
+    @property
+    def occupancy(self) -> float:
+        return (
+            self.tickets_sold / self.seats_offered
+            if self.seats_offered
+            else 0.0
+        )
+
+    def __str__(self):
+        return f"{self.theatre_hall} {self.date}"
+
+    class Meta:
+        unique_together = ("theatre_hall", "date")
+        ordering = ["date"]
+
+
+class WaitlistEntry(models.Model):
+    """
+    A user waiting for `party_size` seats of a sold out performance.
+    `theatre.waitlist` offers released seats in FIFO order
+    """
+
+    class Status(models.TextChoices):
+        WAITING = "waiting"
+        OFFERED = "offered"
+        BOOKED = "booked"
+        EXPIRED = "expired"
+        CANCELLED = "cancelled"
+
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="waitlist"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries",
+    )
+    party_size = models.PositiveSmallIntegerField()
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.WAITING
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    offer_expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user} {self.performance} ({self.party_size})"
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["performance", "status", "created_at"]),
+        ]
+
+
+class SeatHold(models.Model):
+    """
+    A seat offered to a waitlist entry, nobody else can book it
+    until `expires_at`
+    """
+
+    entry = models.ForeignKey(
+        WaitlistEntry, on_delete=models.CASCADE, related_name="holds"
+    )
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="holds"
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.performance} (row: {self.row}, seat: {self.seat})"
+
+    class Meta:
+        unique_together = ("performance", "row", "seat")
+        ordering = ["row", "seat"]
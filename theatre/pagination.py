@@ -0,0 +1,161 @@
+"""
+Counting rows of large tables.
+
+An exact `COUNT(*)` scans the whole table on PostgreSQL. For unfiltered
+querysets of tables above `ESTIMATED_COUNT_THRESHOLD` rows the planner
+statistics (`pg_class.reltuples`, kept current by autovacuum) are used
+instead, smaller tables and other databases are counted exactly.
+Filtered API lists count at most `ESTIMATED_COUNT_THRESHOLD` rows.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+def table_estimate(model, using="default"):
+    """
+    Planner estimate of the rows in the model's table,
+    None when the database keeps no such statistics
+    """
+
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 until the table has been analyzed for the first time
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+def is_whole_table(queryset):
+    """
+    Whether the queryset has one row per row of its table
+    """
+
+    query = queryset.query
+    return (
+        not query.where
+        and not query.distinct
+        and not query.is_sliced
+        # Grouping by anything but the model's own fields merges rows
+        and query.group_by in (None, True)
+    )
+
+
+def bounded_count(queryset, limit):
+    """
+    Exact count when at most `limit` rows match, None otherwise
+    """
+
+    count = queryset.order_by()[:limit + 1].count()
+    return count if count <= limit else None
+
+
+def estimated_count(queryset, threshold=ESTIMATED_COUNT_THRESHOLD):
+    """
+    Returns `(count, estimated)`
+    """
+
+    if is_whole_table(queryset):
+        estimate = table_estimate(queryset.model, queryset.db)
+        if estimate is not None and estimate >= threshold:
+            return estimate, True
+    return queryset.count(), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Django paginator for admin changelists of tables with millions of rows
+    """
+
+    @cached_property
+    def count(self):
+        count, _ = estimated_count(self.object_list)
+        return count
+
+
+class EstimatedCountPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination whose `count` is the planner estimate for
+    whole large tables (`count_estimated` is true) and null, as it is
+    not known, for filtered lists with more than `count_threshold` rows.
+    `has_next` and `next` come from fetching one row more than the page,
+    so they never need the count
+    """
+
+    count_threshold = ESTIMATED_COUNT_THRESHOLD
+
+    def get_count(self, queryset):
+        """
+        Returns `(count, estimated)`, count is None when unknown
+        """
+
+        if not hasattr(queryset, "query"):
+            return len(queryset), False
+        if is_whole_table(queryset):
+            return estimated_count(queryset, self.count_threshold)
+        return bounded_count(queryset, self.count_threshold), False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.count, self.estimated = self.get_count(queryset)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_more = len(rows) > self.limit
+        if (
+            self.count is not None
+            and self.count > self.limit
+            and self.template is not None
+        ):
+            self.display_page_controls = True
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_more:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "count_estimated": self.estimated,
+                "has_next": self.has_more,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        properties = response_schema["properties"]
+        properties["count"]["nullable"] = True
+        properties["count_estimated"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        properties["has_next"] = {
+            "type": "boolean",
+            "example": True,
+        }
+        response_schema["required"] += ["count_estimated", "has_next"]
+        return response_schema
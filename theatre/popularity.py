@@ -0,0 +1,195 @@
+"""
+Popularity leaderboard.
+
+`PlaySalesBucket` counts the tickets of each play by booking day.
+Bookings and cancellations adjust the bucket of the reservation's day
+inside their own transaction, so ranking the plays of the last days
+sums a few small rows per play instead of aggregating tickets. A ranked
+window is cached under the current day for `POPULARITY_CACHE_TIMEOUT`
+seconds and rolls over with the date. Deleting a performance, or moving
+it to another play, moves the buckets of its sales, and tickets deleted
+with their reservation come through the release signal. The first sale
+of each day drops the buckets older than the longest window;
+`rebuild_popularity` recomputes the rest from the sales.
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from theatre.analytics import increment_counters
+from theatre.models import (
+    ArchivedTicket,
+    Performance,
+    PlaySalesBucket,
+    Ticket,
+)
+from theatre.signals import tickets_booked, tickets_released
+
+WINDOWS = {"1d": 1, "7d": 7, "30d": 30}
+DEFAULT_WINDOW = "7d"
+HORIZON_DAYS = max(WINDOWS.values())
+LEADERBOARD_SIZE = 20
+PRUNED_KEY = "popular_plays:pruned:{}"
+
+
+def first_kept_day(today=None):
+    return (today or date.today()) - timedelta(days=HORIZON_DAYS - 1)
+
+
+def prune_buckets(today=None):
+    """
+    Drop the buckets older than the longest window, at most once a day
+    """
+
+    first_day = first_kept_day(today)
+    if cache.add(PRUNED_KEY.format(first_day.isoformat()), True, 2 * 86400):
+        PlaySalesBucket.objects.filter(date__lt=first_day).delete()
+
+
+def apply_sales(deltas):
+    for (play_id, day), delta in sorted(deltas.items()):
+        if delta:
+            increment_counters(
+                PlaySalesBucket,
+                {"play_id": play_id, "date": day},
+                {"tickets_sold": delta},
+            )
+
+
+def record_sales(tickets, sign):
+    first_day = first_kept_day()
+    deltas = Counter()
+    for ticket in tickets:
+        day = ticket.reservation.created_at.date()
+        if day >= first_day:
+            deltas[(ticket.performance.play_id, day)] += sign
+    apply_sales(deltas)
+
+
+@receiver(tickets_booked)
+def on_tickets_booked(sender, tickets, **kwargs):
+    record_sales(tickets, 1)
+    prune_buckets()
+
+
+@receiver(tickets_released)
+def on_tickets_released(sender, tickets, **kwargs):
+    record_sales(tickets, -1)
+
+
+def count_sales(today=None, **filters):
+    """
+    `Counter({(play_id, date): tickets})` of the live and archived tickets
+    matching `filters`, for the kept days
+    """
+
+    first_day = first_kept_day(today)
+    sales = Counter()
+    for model in (Ticket, ArchivedTicket):
+        rows = (
+            model.objects
+            .filter(reservation__created_at__gte=first_day, **filters)
+            .annotate(date=TruncDate("reservation__created_at"))
+            .values_list("performance__play_id", "date")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for play_id, day, count in rows:
+            sales[(play_id, day)] += count
+    return sales
+
+
+def move_sales(performance, from_play_id, to_play_id):
+    deltas = Counter()
+    for (_, day), count in count_sales(performance=performance).items():
+        if from_play_id is not None:
+            deltas[(from_play_id, day)] -= count
+        if to_play_id is not None:
+            deltas[(to_play_id, day)] += count
+    apply_sales(deltas)
+
+
+@receiver(post_save, sender=Performance)
+def on_performance_saved(sender, instance, created, raw=False, **kwargs):
+    # The previous row is loaded by the analytics pre_save receiver
+    previous = getattr(instance, "_previous_schedule", None)
+    if created or raw or previous is None:
+        return
+    if previous.play_id != instance.play_id:
+        move_sales(instance, previous.play_id, instance.play_id)
+
+
+@receiver(pre_delete, sender=Performance)
+def on_performance_deleted(sender, instance, **kwargs):
+    move_sales(instance, instance.play_id, None)
+
+
+def compute_buckets(today=None):
+    """
+    `{(play_id, date): tickets_sold}` from the sales, for the kept days
+    """
+
+    return dict(count_sales(today))
+
+
+def stored_buckets(today=None):
+    return {
+        (play_id, day): tickets_sold
+        for play_id, day, tickets_sold in PlaySalesBucket.objects
+        .filter(date__gte=first_kept_day(today))
+        .exclude(tickets_sold=0)
+        .values_list("play_id", "date", "tickets_sold")
+    }
+
+
+def rebuild_popularity(today=None):
+    buckets = compute_buckets(today)
+    with transaction.atomic():
+        PlaySalesBucket.objects.all().delete()
+        PlaySalesBucket.objects.bulk_create(
+            PlaySalesBucket(play_id=play_id, date=day, tickets_sold=count)
+            for (play_id, day), count in buckets.items()
+        )
+    return len(buckets)
+
+
+def rank_plays(days, today=None):
+    """
+    Top plays by tickets booked in the last `days` days, today included
+    """
+
+    today = today or date.today()
+    return [
+        {
+            "id": play_id,
+            "title": title,
+            "image": image,
+            "tickets_sold": tickets_sold,
+        }
+        for play_id, title, image, tickets_sold in PlaySalesBucket.objects
+        .filter(date__gt=today - timedelta(days=days), date__lte=today)
+        .values("play_id", "play__title", "play__image")
+        .annotate(total=Sum("tickets_sold"))
+        .filter(total__gt=0)
+        .order_by("-total", "play_id")
+        .values_list("play_id", "play__title", "play__image", "total")[
+            :LEADERBOARD_SIZE
+        ]
+    ]
+
+
+def leaderboard(window=DEFAULT_WINDOW, today=None):
+    today = today or date.today()
+    key = f"popular_plays:{window}:{today.isoformat()}"
+    ranking = cache.get(key)
+    if ranking is None:
+        ranking = rank_plays(WINDOWS[window], today)
+        cache.set(key, ranking, settings.POPULARITY_CACHE_TIMEOUT)
+    return ranking
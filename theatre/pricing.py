@@ -0,0 +1,117 @@
+"""
+Seat pricing.
+
+Every seat category of a hall has a price (`CategoryPrice`), which a
+performance can override per category (`PerformancePrice`). The merged
+`{category: price}` map of a performance is cached, so pricing a seat map
+or a whole reservation costs one cache lookup for all its performances,
+two queries for the ones not cached, and an O(1) layout lookup per seat.
+Price changes drop the cached maps they affect.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from theatre.models import CategoryPrice, Performance, PerformancePrice
+
+
+def price_cache_key(performance_id):
+    return f"performance-prices:{performance_id}"
+
+
+def _load_prices(performances):
+    hall_prices = defaultdict(dict)
+    for hall_id, category, price in CategoryPrice.objects.filter(
+        theatre_hall_id__in={p.theatre_hall_id for p in performances}
+    ).values_list("theatre_hall_id", "category", "price"):
+        hall_prices[hall_id][category] = price
+
+    prices = {
+        performance.id: dict(hall_prices[performance.theatre_hall_id])
+        for performance in performances
+    }
+    for performance_id, category, price in PerformancePrice.objects.filter(
+        performance_id__in=prices
+    ).values_list("performance_id", "category", "price"):
+        prices[performance_id][category] = price
+    return prices
+
+
+def get_prices(performances):
+    """
+    `{performance_id: {category: price}}` for the performances
+    """
+
+    keys = {
+        price_cache_key(performance.id): performance
+        for performance in performances
+    }
+    cached = cache.get_many(keys)
+    prices = {keys[key].id: value for key, value in cached.items()}
+
+    missing = [
+        performance for key, performance in keys.items() if key not in cached
+    ]
+    if missing:
+        loaded = _load_prices(missing)
+        cache.set_many(
+            {
+                price_cache_key(performance_id): value
+                for performance_id, value in loaded.items()
+            },
+            settings.PRICE_CACHE_TIMEOUT,
+        )
+        prices.update(loaded)
+    return prices
+
+
+def price_tickets(tickets):
+    """
+    Set the `price` of the tickets, whose `performance` and its
+    `theatre_hall` are loaded, and return their total
+    """
+
+    prices = get_prices(
+        {ticket.performance_id: ticket.performance for ticket in tickets}
+        .values()
+    )
+    total = Decimal("0")
+    for ticket in tickets:
+        category = ticket.performance.theatre_hall.seat_layout.category(
+            ticket.row, ticket.seat
+        )
+        ticket.price = prices[ticket.performance_id].get(category)
+        if ticket.price is not None:
+            total += ticket.price
+    return total
+
+
+def invalidate_prices(performance_ids):
+    cache.delete_many(
+        [price_cache_key(performance_id) for performance_id in performance_ids]
+    )
+
+
+@receiver([post_save, post_delete], sender=CategoryPrice)
+def on_category_price_changed(sender, instance, **kwargs):
+    invalidate_prices(
+        Performance.objects
+        .filter(theatre_hall_id=instance.theatre_hall_id)
+        .values_list("id", flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=PerformancePrice)
+def on_performance_price_changed(sender, instance, **kwargs):
+    invalidate_prices([instance.performance_id])
+
+
+@receiver(post_save, sender=Performance)
+def on_performance_saved(sender, instance, created, **kwargs):
+    # The performance may have moved to a hall with other prices
+    if not created:
+        invalidate_prices([instance.pk])
@@ -0,0 +1,252 @@
+"""
+"Similar plays" recommendations.
+
+Every play is a sparse vector over its genres, its actors and its
+`MAX_BUYERS` most recent buyers (archived sales included). Features are
+weighted by inverse document frequency, each group is normalized and
+weighted by `FEATURE_WEIGHTS`, and plays are compared by cosine
+similarity through an inverted index, so only plays sharing a feature
+are ever paired. Capping the buyers keeps pairing linear in the number
+of plays when most users buy tickets for most plays.
+
+The `TOP_K` most similar plays of each play are recomputed in full by
+`rebuild_similar_plays`, which then rewrites only the stored
+`SimilarPlay` lists that changed.
+
+Workers keep the stored lists in memory and reload them when the
+rebuild publishes a new version token in the default cache, so a lookup
+is a dict access instead of a query. The rebuild usually runs in another
+process, so workers only see the token through a cache they share, see
+`REDIS_URL`.
+"""
+import heapq
+import logging
+import math
+import threading
+import uuid
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber
+
+from theatre.models import ArchivedTicket, Play, SimilarPlay, Ticket
+
+TOP_K = 10
+# Relative weight of the feature groups in the similarity
+FEATURE_WEIGHTS = {"genre": 1.0, "actor": 1.0, "buyer": 2.0}
+# Most recent buyers of a play that are features of it
+MAX_BUYERS = 100
+# Features shared by more plays than this are too common to tell
+# plays apart and would make pairing quadratic. They are left out of
+# the similarity and counted per group in `skipped`
+MAX_POSTINGS = 1000
+VERSION_KEY = "similar_plays:version"
+
+logger = logging.getLogger(__name__)
+
+_index = {"version": None, "similar": {}}
+_index_lock = threading.Lock()
+
+
+def play_features():
+    """
+    `{play_id: {group: {feature ids}}}` of all plays with any feature
+    """
+
+    features = defaultdict(lambda: defaultdict(set))
+    for group, rows in (
+        ("genre", Play.genres.through.objects.values_list(
+            "play_id", "genre_id"
+        )),
+        ("actor", Play.actors.through.objects.values_list(
+            "play_id", "actor_id"
+        )),
+    ):
+        for play_id, feature_id in rows.iterator():
+            features[play_id][group].add(feature_id)
+
+    for play_id, user_ids in recent_buyers().items():
+        features[play_id]["buyer"].update(user_ids)
+    return features
+
+
+def recent_buyers(limit=MAX_BUYERS):
+    """
+    `{play_id: [user_id, ...]}` of the `limit` users who bought tickets
+    for each play last, archived sales included
+    """
+
+    sales = defaultdict(dict)
+    for model in (Ticket, ArchivedTicket):
+        rows = (
+            model.objects
+            .values("performance__play_id", "reservation__user_id")
+            .annotate(last_sold=Max("id"))
+            .annotate(
+                rank=Window(
+                    RowNumber(),
+                    partition_by=F("performance__play_id"),
+                    order_by=F("last_sold").desc(),
+                )
+            )
+            .filter(rank__lte=limit)
+            .order_by()
+            .values_list(
+                "performance__play_id", "reservation__user_id", "last_sold"
+            )
+        )
+        for play_id, user_id, last_sold in rows.iterator():
+            # Archived tickets keep their ids, so both tables compare
+            buyers = sales[play_id]
+            buyers[user_id] = max(buyers.get(user_id, 0), last_sold)
+
+    return {
+        play_id: heapq.nlargest(limit, buyers, key=buyers.get)
+        for play_id, buyers in sales.items()
+    }
+
+
+def play_vectors(features):
+    """
+    Unit length `{play_id: {(group, feature id): weight}}` vectors
+    """
+
+    frequency = Counter(
+        (group, feature_id)
+        for groups in features.values()
+        for group, feature_ids in groups.items()
+        for feature_id in feature_ids
+    )
+    plays_count = len(features)
+
+    vectors = {}
+    for play_id, groups in features.items():
+        vector = {}
+        for group, feature_ids in groups.items():
+            weights = {
+                (group, feature_id): math.log(
+                    1 + plays_count / frequency[(group, feature_id)]
+                )
+                for feature_id in feature_ids
+            }
+            scale = math.sqrt(FEATURE_WEIGHTS[group]) / math.sqrt(
+                sum(weight * weight for weight in weights.values())
+            )
+            for feature, weight in weights.items():
+                vector[feature] = weight * scale
+
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vectors[play_id] = {
+            feature: weight / norm for feature, weight in vector.items()
+        }
+    return vectors
+
+
+def compute_similar(top=TOP_K, skipped=None):
+    """
+    `{play_id: [(other_id, score), ...]}`, most similar first. Counts
+    the features left out per group in the `skipped` Counter if given
+    """
+
+    postings = defaultdict(list)
+    for play_id, vector in play_vectors(play_features()).items():
+        for feature, weight in vector.items():
+            postings[feature].append((play_id, weight))
+
+    scores = defaultdict(Counter)
+    if skipped is None:
+        skipped = Counter()
+    for (group, _), entries in postings.items():
+        if len(entries) > MAX_POSTINGS:
+            skipped[group] += 1
+            continue
+        for index, (play_id, weight) in enumerate(entries):
+            for other_id, other_weight in entries[index + 1:]:
+                product = weight * other_weight
+                scores[play_id][other_id] += product
+                scores[other_id][play_id] += product
+
+    for group, count in sorted(skipped.items()):
+        logger.warning(
+            "Left %d %s features shared by more than %d plays out of "
+            "the similarity",
+            count,
+            group,
+            MAX_POSTINGS,
+        )
+
+    return {
+        play_id: [
+            (other_id, round(score, 6))
+            for other_id, score in heapq.nlargest(
+                top,
+                others.items(),
+                key=lambda item: (round(item[1], 6), -item[0]),
+            )
+        ]
+        for play_id, others in scores.items()
+    }
+
+
+def stored_similar():
+    similar = defaultdict(list)
+    for play_id, other_id, score in SimilarPlay.objects.values_list(
+        "play_id", "other_id", "score"
+    ):
+        similar[play_id].append((other_id, score))
+    return dict(similar)
+
+
+def rebuild_similar_plays(top=TOP_K, skipped=None):
+    """
+    Recompute all lists, rewrite the ones that differ from the stored
+    ones and publish a new version to the workers. Returns the ids of
+    the changed plays
+    """
+
+    expected = compute_similar(top, skipped)
+    stored = stored_similar()
+    changed = sorted(
+        play_id
+        for play_id in expected.keys() | stored.keys()
+        if expected.get(play_id, []) != stored.get(play_id, [])
+    )
+    if changed:
+        with transaction.atomic():
+            SimilarPlay.objects.filter(play_id__in=changed).delete()
+            SimilarPlay.objects.bulk_create(
+                SimilarPlay(play_id=play_id, other_id=other_id, score=score)
+                for play_id in changed
+                for other_id, score in expected.get(play_id, [])
+            )
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    return changed
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A cleared cache must not keep serving an old index
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def similar_to(play_id):
+    """
+    `[(other_id, score), ...]` of a play from this worker's index,
+    reloaded when the stored lists changed
+    """
+
+    version = _version()
+    with _index_lock:
+        if _index["version"] == version:
+            return _index["similar"].get(play_id, [])
+
+    similar = stored_similar()
+    with _index_lock:
+        _index["version"] = version
+        _index["similar"] = similar
+    return similar.get(play_id, [])
@@ -0,0 +1,135 @@
+"""
+Season scheduling.
+
+Recurrence rules ("Hamlet, hall 2, Tue-Sun 19:00, March-June") are
+expanded into performances, checked for overlaps in their halls and
+written with a single bulk insert. Overlaps are found by sorting each
+hall's intervals by start and sweeping them once, with the stored
+schedule of the affected halls and period loaded in one query.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from django.db import transaction
+
+from theatre.models import MAX_PLAY_DURATION, Performance, TheatreHall
+from theatre.signals import performances_scheduled
+
+
+# `performance` is a proposed performance, `other` one it overlaps
+Conflict = namedtuple("Conflict", ["performance", "other"])
+
+
+class ScheduleConflict(Exception):
+    def __init__(self, conflicts):
+        super().__init__(f"{len(conflicts)} performances overlap")
+        self.conflicts = conflicts
+
+
+def expand_rule(play, theatre_hall, weekdays, times, start_date, end_date):
+    """
+    Unsaved performances at every one of `times` on `weekdays`
+    (0 is Monday) from `start_date` to `end_date` inclusive
+    """
+
+    weekdays = set(weekdays)
+    performances = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            performances.extend(
+                Performance(
+                    play=play,
+                    theatre_hall=theatre_hall,
+                    show_time=datetime.combine(day, time),
+                )
+                for time in sorted(times)
+            )
+        day += timedelta(days=1)
+    return performances
+
+
+def _interval(performance):
+    start = performance.show_time
+    return start, start + timedelta(minutes=performance.play.duration)
+
+
+def find_conflicts(proposed, exclude=()):
+    """
+    Check unsaved performances against each other and the stored
+    schedule. Returns a list of `Conflict`
+    """
+
+    if not proposed:
+        return []
+
+    intervals = defaultdict(list)
+    for performance in proposed:
+        intervals[performance.theatre_hall_id].append(
+            (*_interval(performance), performance, True)
+        )
+    starts, ends = zip(
+        *(
+            interval[:2]
+            for hall_intervals in intervals.values()
+            for interval in hall_intervals
+        )
+    )
+    stored = (
+        Performance.objects
+        .select_related("play")
+        .filter(
+            theatre_hall_id__in=intervals,
+            show_time__gt=min(starts) - timedelta(minutes=MAX_PLAY_DURATION),
+            show_time__lt=max(ends),
+        )
+        .exclude(pk__in=exclude)
+    )
+    for performance in stored:
+        intervals[performance.theatre_hall_id].append(
+            (*_interval(performance), performance, False)
+        )
+
+    conflicts = []
+    for hall_intervals in intervals.values():
+        hall_intervals.sort(key=lambda interval: interval[0])
+        # The latest ending interval seen so far, among all and among
+        # the proposed ones. An interval overlaps an earlier starting one
+        # exactly when it starts before the latest end
+        latest = latest_proposed = None
+        for start, end, performance, is_proposed in hall_intervals:
+            if is_proposed:
+                if latest and start < latest[0]:
+                    conflicts.append(Conflict(performance, latest[1]))
+            elif latest_proposed and start < latest_proposed[0]:
+                conflicts.append(Conflict(latest_proposed[1], performance))
+
+            if latest is None or end > latest[0]:
+                latest = (end, performance)
+            if is_proposed and (
+                latest_proposed is None or end > latest_proposed[0]
+            ):
+                latest_proposed = (end, performance)
+    return conflicts
+
+
+def schedule_performances(performances):
+    """
+    Insert the performances with one bulk insert, unless any of them
+    overlaps another performance. Raises `ScheduleConflict`
+    """
+
+    with transaction.atomic():
+        # Serializes concurrent scheduling into the same halls
+        list(
+            TheatreHall.objects
+            .select_for_update()
+            .filter(id__in={p.theatre_hall_id for p in performances})
+            .order_by("id")
+        )
+        conflicts = find_conflicts(performances)
+        if conflicts:
+            raise ScheduleConflict(conflicts)
+        created = Performance.objects.bulk_create(performances)
+        performances_scheduled.send(sender=Performance, performances=created)
+    return created
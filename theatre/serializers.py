@@ -1,4 +1,10 @@
-from django.db import transaction
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.urls import reverse
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -10,7 +16,36 @@ from theatre.models import (
     Performance,
     Reservation,
     Ticket,
+    PerformanceListing,
+    PlayDailyStats,
+    HallDailyStats,
+    SeatHold,
+    WaitlistEntry,
+)
+from theatre.batch import MAX_REQUESTS as MAX_BATCH_REQUESTS, METHODS
+from theatre.booking import create_reservation
+from theatre.cancellation import release_tickets
+from theatre.checkin import RESULTS as CHECK_IN_RESULTS
+from theatre.layouts import LayoutError, compile_layout
+from theatre.pricing import get_prices
+from theatre.scheduling import (
+    ScheduleConflict,
+    expand_rule,
+    find_conflicts,
+    schedule_performances,
 )
+from theatre.ticket_codes import make_code
+from theatre.waitlist import active_holds_count
+
+# Upper bound of performances created by one scheduling request
+MAX_SCHEDULED_PERFORMANCES = 5000
+MAX_PARTY_SIZE = 10
+# Upper bounds of one reservation, every performance of a cart stays
+# locked until the booking commits
+MAX_CART_TICKETS = 50
+MAX_CART_PERFORMANCES = 10
+# Scans uploaded at once by a scanner that was offline
+MAX_SCANS = 1000
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -28,7 +63,9 @@ class ActorSerializer(serializers.ModelSerializer):
 class PlaySerializer(serializers.ModelSerializer):
     class Meta:
         model = Play
-        fields = ("id", "title", "description", "genres", "actors",)
+        fields = (
+            "id", "title", "description", "duration", "genres", "actors",
+        )
 
 
 class PlayListSerializer(PlaySerializer):
@@ -50,7 +87,37 @@ class PlayDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Play
-        fields = ("id", "title", "description", "genres", "actors", "image",)
+        fields = (
+            "id",
+            "title",
+            "description",
+            "duration",
+            "genres",
+            "actors",
+            "image",
+        )
+
+
+class SimilarPlaySerializer(serializers.ModelSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Play
+        fields = ("id", "title", "image", "score",)
+
+
+class PopularPlaySerializer(serializers.Serializer):
+    id = serializers.IntegerField()  # noqa: VNE003
+    title = serializers.CharField()
+    image = serializers.SerializerMethodField()
+    tickets_sold = serializers.IntegerField()
+
+    def get_image(self, play) -> str | None:
+        if not play["image"]:
+            return None
+        url = default_storage.url(play["image"])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
 
 
 class PlayImageSerializer(serializers.ModelSerializer):
@@ -62,7 +129,34 @@ class PlayImageSerializer(serializers.ModelSerializer):
 class TheatreHallSerializer(serializers.ModelSerializer):
     class Meta:
         model = TheatreHall
-        fields = ("id", "name", "rows", "seats_in_row", "capacity",)
+        fields = (
+            "id",
+            "name",
+            "rows",
+            "seats_in_row",
+            "layout",
+            "layout_version",
+            "capacity",
+        )
+        extra_kwargs = {
+            "rows": {"required": False},
+            "seats_in_row": {"required": False},
+        }
+
+    def validate(self, attrs):
+        data = super(TheatreHallSerializer, self).validate(attrs=attrs)
+        if data.get("layout"):
+            try:
+                layout = compile_layout(data["layout"])
+            except LayoutError as error:
+                raise ValidationError({"layout": str(error)})
+            data["rows"] = len(layout.rows)
+            data["seats_in_row"] = layout.width
+        elif not (data.get("rows") and data.get("seats_in_row")):
+            raise ValidationError(
+                "rows and seats_in_row are required without a layout"
+            )
+        return data
 
 
 class PerformanceSerializer(serializers.ModelSerializer):
@@ -70,20 +164,116 @@ class PerformanceSerializer(serializers.ModelSerializer):
         model = Performance
         fields = ("id", "play", "theatre_hall", "show_time",)
 
+    def validate(self, attrs):
+        data = super(PerformanceSerializer, self).validate(attrs=attrs)
+        performance = Performance(
+            **{
+                field: attrs.get(field, getattr(self.instance, field, None))
+                for field in ("play", "theatre_hall", "show_time")
+            }
+        )
+        conflicts = find_conflicts(
+            [performance], exclude=[self.instance.pk] if self.instance else []
+        )
+        if conflicts:
+            other = conflicts[0].other
+            raise ValidationError(
+                {
+                    "show_time": f"Overlaps performance {other.id} "
+                                 f"at {other.show_time} in this hall"
+                }
+            )
+        return data
 
-class PerformanceListSerializer(serializers.ModelSerializer):
-    play_title = serializers.CharField(source="play.title", read_only=True)
-    play_image = serializers.ImageField(source="play.image", read_only=True)
-    theatre_hall_name = serializers.CharField(
-        source="theatre_hall.name", read_only=True
+
+class ScheduleRuleSerializer(serializers.Serializer):
+    play = serializers.PrimaryKeyRelatedField(queryset=Play.objects.all())
+    theatre_hall = serializers.PrimaryKeyRelatedField(
+        queryset=TheatreHall.objects.all()
     )
-    theatre_hall_capacity = serializers.IntegerField(
-        source="theatre_hall.capacity", read_only=True
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        help_text="0 is Monday",
+    )
+    times = serializers.ListField(
+        child=serializers.TimeField(), allow_empty=False
     )
-    tickets_available = serializers.IntegerField(read_only=True)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs["end_date"] < attrs["start_date"]:
+            raise ValidationError(
+                {"end_date": "end_date must not be before start_date"}
+            )
+        return attrs
+
+
+class PerformanceScheduleSerializer(serializers.Serializer):
+    rules = ScheduleRuleSerializer(many=True, write_only=True)
+    dry_run = serializers.BooleanField(default=False, write_only=True)
+    performances = PerformanceSerializer(many=True, read_only=True)
+
+    def validate(self, attrs):
+        performances = [
+            performance
+            for rule in attrs["rules"]
+            for performance in expand_rule(**rule)
+        ]
+        if not performances:
+            raise ValidationError(
+                {"rules": "The rules do not produce any performance"}
+            )
+        if len(performances) > MAX_SCHEDULED_PERFORMANCES:
+            raise ValidationError(
+                {
+                    "rules": f"The rules produce {len(performances)} "
+                             f"performances, at most "
+                             f"{MAX_SCHEDULED_PERFORMANCES} are allowed"
+                }
+            )
+        attrs["performances"] = performances
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Raises `ScheduleConflict` when performances overlap, also
+        on a dry run
+        """
+
+        performances = validated_data["performances"]
+        if not validated_data["dry_run"]:
+            return {"performances": schedule_performances(performances)}
+
+        conflicts = find_conflicts(performances)
+        if conflicts:
+            raise ScheduleConflict(conflicts)
+        return {"performances": performances}
+
+
+class ScheduleConflictSerializer(serializers.Serializer):
+    play = serializers.IntegerField(source="performance.play_id")
+    theatre_hall = serializers.IntegerField(
+        source="performance.theatre_hall_id"
+    )
+    show_time = serializers.DateTimeField(source="performance.show_time")
+    overlaps = serializers.IntegerField(
+        source="other.pk",
+        allow_null=True,
+        help_text="Id of the stored performance, null for a proposed one",
+    )
+    overlaps_show_time = serializers.DateTimeField(source="other.show_time")
+
+
+class PerformanceListSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(  # noqa: VNE003
+        source="performance_id", read_only=True
+    )
+    tickets_available = serializers.SerializerMethodField()
 
     class Meta:
-        model = Performance
+        model = PerformanceListing
         fields = (
             "id",
             "show_time",
@@ -93,9 +283,16 @@ class PerformanceListSerializer(serializers.ModelSerializer):
             "theatre_hall_capacity",
             "tickets_available",
         )
+        read_only_fields = fields
+
+    def get_tickets_available(self, listing) -> int:
+        # Seats held for waitlist offers are unsold, but not available
+        return listing.tickets_available - getattr(listing, "tickets_held", 0)
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    code = serializers.SerializerMethodField()
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -104,15 +301,42 @@ class TicketSerializer(serializers.ModelSerializer):
             attrs["performance"].theatre_hall,
             ValidationError
         )
+        # Sales of past performances may be archived, their seats are
+        # no longer in `Ticket` to conflict with
+        if attrs["performance"].show_time <= datetime.now():
+            raise ValidationError(
+                {"performance": "The performance has already started"}
+            )
         return data
 
     class Meta:
         model = Ticket
-        fields = ("id", "row", "seat", "performance",)
+        fields = (
+            "id",
+            "row",
+            "seat",
+            "performance",
+            "price",
+            "code",
+            "checked_in_at",
+        )
+        read_only_fields = ("price", "checked_in_at")
+        # Sold seats are checked for the whole cart at once, under the
+        # performance locks taken by `create_reservation`
+        validators = []
+
+    def get_code(self, ticket) -> str:
+        """
+        Signed code for the door scanners
+        """
+
+        return make_code(ticket)
 
 
 class TicketListSerializer(TicketSerializer):
-    performance = PerformanceListSerializer(many=False, read_only=True)
+    performance = PerformanceListSerializer(
+        source="performance.listing", many=False, read_only=True
+    )
 
 
 class TicketSeatsSerializer(serializers.ModelSerializer):
@@ -125,30 +349,310 @@ class PerformanceDetailSerializer(serializers.ModelSerializer):
     play = PlayListSerializer(many=False, read_only=True)
     theatre_hall = TheatreHallSerializer(many=False, read_only=True)
 
-    taken_places = TicketSeatsSerializer(
-        source="tickets", many=True, read_only=True
-    )
+    taken_places = serializers.SerializerMethodField()
+    prices = serializers.SerializerMethodField()
 
     class Meta:
         model = Performance
-        fields = ("id", "play", "theatre_hall", "show_time", "taken_places",)
+        fields = (
+            "id",
+            "play",
+            "theatre_hall",
+            "show_time",
+            "taken_places",
+            "prices",
+        )
+
+    @extend_schema_field(TicketSeatsSerializer(many=True))
+    def get_taken_places(self, performance):
+        """
+        Sold seats, archived sales included
+        """
+
+        seats = (
+            performance.tickets.values("row", "seat").order_by()
+            .union(
+                performance.archived_tickets.values("row", "seat").order_by()
+            )
+            .order_by("row", "seat")
+        )
+        return TicketSeatsSerializer(seats, many=True).data
+
+    def get_prices(self, performance) -> dict[str, str]:
+        """
+        Price per seat category, see `theatre_hall.layout`
+        """
+
+        return {
+            category: str(price)
+            for category, price in get_prices([performance])[
+                performance.id
+            ].items()
+        }
 
 
 class ReservationSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = TicketSerializer(
+        many=True,
+        read_only=False,
+        allow_empty=False,
+        max_length=MAX_CART_TICKETS,
+    )
 
     class Meta:
         model = Reservation
-        fields = ("id", "tickets", "created_at",)
+        fields = ("id", "tickets", "total", "created_at",)
+        read_only_fields = ("total",)
+
+    def validate(self, attrs):
+        data = super(ReservationSerializer, self).validate(attrs=attrs)
+        seats = [
+            (ticket["performance"].id, ticket["row"], ticket["seat"])
+            for ticket in data["tickets"]
+        ]
+        if len(set(seats)) != len(seats):
+            raise ValidationError(
+                {"tickets": "A seat can only be booked once per reservation"}
+            )
+        if len({seat[0] for seat in seats}) > MAX_CART_PERFORMANCES:
+            raise ValidationError(
+                {
+                    "tickets": "A reservation can span at most "
+                    f"{MAX_CART_PERFORMANCES} performances"
+                }
+            )
+        return data
 
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
-            return reservation
+        """
+        Raises `SeatsTaken` (409) listing the seats that are sold or held
+        """
+
+        tickets = [
+            Ticket(**ticket_data)
+            for ticket_data in validated_data.pop("tickets")
+        ]
+        return create_reservation(tickets=tickets, **validated_data)
 
 
 class ReservationListSerializer(ReservationSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class ReleasedTicketsSerializer(serializers.Serializer):
+    released = serializers.IntegerField(read_only=True)
+
+
+class ReservationCancelSerializer(ReleasedTicketsSerializer):
+    tickets = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        write_only=True,
+        help_text="Ids of the tickets to cancel, all when omitted",
+    )
+
+    def validate(self, attrs):
+        tickets = self.instance.tickets.all()
+        if "tickets" in attrs:
+            tickets = tickets.filter(id__in=attrs["tickets"])
+            if tickets.count() != len(set(attrs["tickets"])):
+                raise ValidationError(
+                    {"tickets": "Not all tickets belong to this reservation"}
+                )
+
+        if not self.context["request"].user.is_staff and tickets.filter(
+            performance__show_time__lte=datetime.now()
+        ).exists():
+            raise ValidationError(
+                "Tickets of started performances can not be cancelled"
+            )
+        attrs["queryset"] = tickets
+        return attrs
+
+    def update(self, instance, validated_data):
+        return {"released": len(release_tickets(validated_data["queryset"]))}
+
+
+class PlayDailyStatsSerializer(serializers.ModelSerializer):
+    play_title = serializers.CharField(source="play.title", read_only=True)
+    occupancy = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = PlayDailyStats
+        fields = (
+            "date",
+            "play",
+            "play_title",
+            "performances",
+            "seats_offered",
+            "tickets_sold",
+            "occupancy",
+        )
+
+
+class HallDailyStatsSerializer(serializers.ModelSerializer):
+    theatre_hall_name = serializers.CharField(
+        source="theatre_hall.name", read_only=True
+    )
+    occupancy = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = HallDailyStats
+        fields = (
+            "date",
+            "theatre_hall",
+            "theatre_hall_name",
+            "performances",
+            "seats_offered",
+            "tickets_sold",
+            "occupancy",
+        )
+
+
+class PerformanceOccupancySerializer(serializers.ModelSerializer):
+    play_title = serializers.CharField(source="play.title", read_only=True)
+    theatre_hall_name = serializers.CharField(
+        source="theatre_hall.name", read_only=True
+    )
+    seats_offered = serializers.IntegerField(
+        source="theatre_hall.capacity", read_only=True
+    )
+    tickets_sold = serializers.IntegerField(read_only=True)
+    occupancy = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Performance
+        fields = (
+            "id",
+            "show_time",
+            "play_title",
+            "theatre_hall_name",
+            "seats_offered",
+            "tickets_sold",
+            "occupancy",
+        )
+
+    def get_occupancy(self, performance) -> float:
+        capacity = performance.theatre_hall.capacity
+        return performance.tickets_sold / capacity if capacity else 0.0
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("row", "seat",)
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    held_places = SeatHoldSerializer(source="holds", many=True, read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = (
+            "id",
+            "performance",
+            "party_size",
+            "status",
+            "created_at",
+            "offer_expires_at",
+            "held_places",
+        )
+        read_only_fields = ("status", "offer_expires_at")
+
+    def validate(self, attrs):
+        data = super(WaitlistEntrySerializer, self).validate(attrs=attrs)
+        performance = data["performance"]
+        if not 1 <= data["party_size"] <= MAX_PARTY_SIZE:
+            raise ValidationError(
+                {"party_size": f"party_size must be in (1, {MAX_PARTY_SIZE})"}
+            )
+        now = datetime.now()
+        if performance.show_time <= now:
+            raise ValidationError(
+                {"performance": "The performance has already started"}
+            )
+        if WaitlistEntry.objects.filter(
+            performance=performance,
+            user=self.context["request"].user,
+            status__in=(
+                WaitlistEntry.Status.WAITING, WaitlistEntry.Status.OFFERED
+            ),
+        ).exists():
+            raise ValidationError(
+                {"performance": "You are already on this waitlist"}
+            )
+        # Seats offered to earlier entries are unsold, but not free
+        available = (
+            PerformanceListing.objects
+            .filter(performance=performance)
+            .values_list(
+                F("tickets_available")
+                - active_holds_count("performance_id", now),
+                flat=True,
+            )
+            .first()
+        )
+        if available is not None and available >= data["party_size"]:
+            raise ValidationError(
+                {"performance": "Seats are available, book them directly"}
+            )
+        return data
+
+
+class TicketScanSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=64)
+    scanned_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class CheckInSerializer(serializers.Serializer):
+    performance = serializers.PrimaryKeyRelatedField(
+        queryset=Performance.objects.all(),
+        required=False,
+        help_text="Reject tickets for other performances",
+    )
+    scans = TicketScanSerializer(
+        many=True, allow_empty=False, max_length=MAX_SCANS, write_only=True
+    )
+
+
+class CheckInResultSerializer(serializers.Serializer):
+    code = serializers.CharField()
+    result = serializers.ChoiceField(choices=CHECK_IN_RESULTS)
+    ticket = serializers.IntegerField(allow_null=True)
+    checked_in_at = serializers.DateTimeField(allow_null=True)
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=METHODS, default="GET")
+    path = serializers.CharField(
+        max_length=2048,
+        help_text="API path and query, e.g. /api/theatre/genres/?limit=10",
+    )
+
+    def validate_path(self, value):
+        url = urlsplit(value)
+        if (
+            url.scheme
+            or url.netloc
+            or not url.path.startswith("/api/")
+            or url.path == reverse("batch")
+        ):
+            raise ValidationError(
+                "path must be an API path other than the batch endpoint"
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(
+        many=True, allow_empty=False, max_length=MAX_BATCH_REQUESTS
+    )
+    parallel = serializers.BooleanField(
+        default=False, help_text="Run the requests concurrently"
+    )
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    body = serializers.JSONField(allow_null=True)
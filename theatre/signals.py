@@ -0,0 +1,16 @@
+from django.dispatch import Signal
+
+# Sent inside the booking transaction with `tickets`, a list of saved
+# `Ticket` instances whose `performance` and `reservation` are loaded
+tickets_booked = Signal()
+
+# Sent inside the cancelling transaction with `tickets`, a list of
+# `Ticket` instances (already deleted) whose `performance` and
+# `reservation` are loaded. Deleting a reservation, live or archived,
+# sends it for the tickets its cascade is about to delete
+tickets_released = Signal()
+
+# Sent inside the scheduling transaction with `performances`, a list of
+# `Performance` instances created with a bulk insert, which sends no
+# `post_save`. Their `play` and `theatre_hall` are loaded
+performances_scheduled = Signal()
@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from importlib import import_module
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, OperationalError
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.urls import get_resolver, reverse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from config.schema import get_schema
+from theatre.catalogue_cache import CachedListMixin
+from theatre.models import Performance, TheatreHall
+from theatre.pricing import get_prices
+from theatre.urls import router
+
+logger = logging.getLogger(__name__)
+
+# Seconds between warm-up attempts triggered by readiness probes
+RETRY_INTERVAL = 1.0
+# Upcoming performances whose seat prices are cached by the warm-up
+WARMUP_PERFORMANCES = 500
+
+_warmup_tasks = []
+_lock = threading.Lock()
+_ready = False
+_last_attempt = 0.0
+
+
+def wait_for_database(
+    alias="default", timeout=60.0, initial_delay=0.25, max_delay=5.0, log=None
+) -> bool:
+    """
+    Actively connect to the db, retrying with exponential backoff until
+    it answers a query or `timeout` seconds have passed
+    """
+
+    connection = connections[alias]
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        try:
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except OperationalError as error:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            delay = min(delay, max_delay, remaining)
+            if log:
+                log(f"Database unavailable ({error}), retry in {delay:.2f}s")
+            time.sleep(delay)
+            delay *= 2
+
+
+def register_warmup(func):
+    """
+    Register a task that runs before the worker reports ready,
+    e.g. priming a cache that the first requests would otherwise build
+    """
+
+    _warmup_tasks.append(func)
+    return func
+
+
+@register_warmup
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+@register_warmup
+def resolve_url_patterns():
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 - populates the resolver lookups
+
+
+@register_warmup
+def import_serializers():
+    for app_config in apps.get_app_configs():
+        module_name = f"{app_config.name}.serializers"
+        if find_spec(module_name):
+            import_module(module_name)
+
+
+@register_warmup
+def prime_content_types():
+    ContentType.objects.get_for_models(*apps.get_models())
+
+
+@register_warmup
+def load_schema():
+    get_schema()
+
+
+@register_warmup
+def prime_catalogue_cache():
+    """
+    Render the first page of every cached catalogue list for each of
+    `CATALOGUE_WARMUP_URLS`. Entries are keyed by the absolute URL, so
+    only the addresses clients use are worth warming
+    """
+
+    for base_url in settings.CATALOGUE_WARMUP_URLS:
+        url = urlsplit(base_url)
+        factory = RequestFactory(HTTP_HOST=url.netloc)
+        for _, viewset, basename in router.registry:
+            if not issubclass(viewset, CachedListMixin):
+                continue
+            # Lists are the same for every user, nobody to check or count
+            view = viewset.as_view(
+                {"get": "list"}, permission_classes=(), throttle_classes=()
+            )
+            view(
+                factory.get(
+                    reverse(f"theatre:{basename}-list"),
+                    secure=url.scheme == "https",
+                )
+            )
+
+
+@register_warmup
+def prime_listing_caches():
+    """
+    Compile the seat layouts of all halls and cache the seat prices of
+    the next `WARMUP_PERFORMANCES` performances
+    """
+
+    for hall in TheatreHall.objects.all():
+        hall.seat_layout  # noqa: B018 - compiles the layout
+    get_prices(
+        Performance.objects.filter(show_time__gte=datetime.now()).order_by(
+            "show_time"
+        )[:WARMUP_PERFORMANCES]
+    )
+
+
+def warm_up() -> bool:
+    """
+    Run every registered warm-up task once and mark the process ready.
+    Failures are logged and leave the process not ready, so the next
+    readiness probe retries
+    """
+
+    global _ready, _last_attempt
+    with _lock:
+        if _ready:
+            return True
+        _last_attempt = time.monotonic()
+        for task in _warmup_tasks:
+            started = time.perf_counter()
+            try:
+                task()
+            except Exception:
+                logger.exception("Warm-up task %s failed", task.__name__)
+                return False
+            logger.info(
+                "Warm-up task %s took %.1f ms",
+                task.__name__,
+                (time.perf_counter() - started) * 1000,
+            )
+        _ready = True
+        return True
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+@never_cache
+@require_safe
+def healthz(request):
+    """
+    Liveness probe: the process is up and serving requests
+    """
+
+    return JsonResponse({"status": "ok"})
+
+
+@never_cache
+@require_safe
+def readyz(request):
+    """
+    Readiness probe: answered from memory once warm-up has succeeded,
+    before that it retries the warm-up at most once per second
+    """
+
+    if not _ready and time.monotonic() - _last_attempt >= RETRY_INTERVAL:
+        warm_up()
+    if _ready:
+        return JsonResponse({"status": "ready"})
+    return JsonResponse({"status": "starting"}, status=503)
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from theatre.booking import create_reservation
+from theatre.models import (
+    Play,
+    Performance,
+    TheatreHall,
+    Ticket,
+)
+from theatre.pagination import estimated_count
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@admin.com", password="adminPassword"
+        )
+        self.client.force_login(self.admin)
+        self.hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+        self.day = 0
+
+    def _add_sales(self, count):
+        for _ in range(count):
+            self.day += 1
+            play = Play.objects.create(
+                title=f"Play {self.day}", description="Drama"
+            )
+            performance = Performance.objects.create(
+                play=play,
+                theatre_hall=self.hall,
+                show_time=f"2099-01-01T{self.day:02d}:00:00",
+            )
+            create_reservation(
+                user=self.admin,
+                tickets=[Ticket(performance=performance, row=1, seat=1)],
+            )
+
+    def _count_queries(self, name):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse(f"admin:{name}"))
+        self.assertEqual(response.status_code, 200)
+        return len(captured.captured_queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        names = (
+            "theatre_ticket_changelist",
+            "theatre_reservation_changelist",
+            "theatre_performance_changelist",
+        )
+        self._add_sales(2)
+        few = [self._count_queries(name) for name in names]
+
+        self._add_sales(10)
+        many = [self._count_queries(name) for name in names]
+
+        self.assertEqual(few, many)
+
+    def test_performance_changelist_shows_availability(self):
+        self._add_sales(1)
+
+        response = self.client.get(
+            reverse("admin:theatre_performance_changelist")
+        )
+
+        self.assertContains(response, 'field-tickets_available">99<')
+
+    def test_ticket_form_does_not_list_every_performance(self):
+        self._add_sales(3)
+        ticket = Ticket.objects.first()
+
+        response = self.client.get(
+            reverse("admin:theatre_ticket_change", args=[ticket.id])
+        )
+
+        self.assertContains(response, "admin-autocomplete")
+        self.assertNotContains(response, "Play 3 ")
+
+
+class EstimatedCountTests(TestCase):
+    def setUp(self):
+        self.hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+
+    def test_exact_below_threshold(self):
+        self.assertEqual(
+            estimated_count(TheatreHall.objects.all()), (1, False)
+        )
+
+    def test_estimate_for_large_unfiltered_table(self):
+        with mock.patch(
+            "theatre.pagination.table_estimate", return_value=250_000
+        ):
+            self.assertEqual(
+                estimated_count(TheatreHall.objects.all()), (250_000, True)
+            )
+            self.assertEqual(
+                estimated_count(TheatreHall.objects.filter(name="Globe")),
+                (1, False),
+            )
@@ -0,0 +1,198 @@
+from datetime import date, datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.archive import archive_batch
+from theatre.models import (
+    Play,
+    Performance,
+    Reservation,
+    TheatreHall,
+    PlayDailyStats,
+    HallDailyStats,
+)
+
+ANALYTICS_URL = "/api/theatre/analytics/"
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+class AnalyticsApiTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.play = Play.objects.create(
+            title="Hamlet",
+            description="Based on the novel by William Shakespeare",
+        )
+        self.hall = TheatreHall.objects.create(
+            name="Piccolo Teatro di Milano", rows=10, seats_in_row=10
+        )
+        self.performance = Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2099-06-08T19:00:00",
+        )
+
+    def _book(self, *seats):
+        response = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": 1,
+                        "seat": seat,
+                        "performance": self.performance.id,
+                    }
+                    for seat in seats
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def assertStatsConsistent(self):
+        call_command("rebuild_analytics", "--check", stdout=StringIO())
+
+    def test_analytics_is_staff_only(self):
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="test@test.com", password="testPassword"
+            )
+        )
+
+        response = self.client.get(f"{ANALYTICS_URL}plays/")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_booking_updates_counters(self):
+        self._book(1, 2, 3)
+
+        stats = PlayDailyStats.objects.get(play=self.play)
+        self.assertEqual(stats.date, date(2099, 6, 8))
+        self.assertEqual(stats.performances, 1)
+        self.assertEqual(stats.seats_offered, 100)
+        self.assertEqual(stats.tickets_sold, 3)
+        self.assertEqual(
+            HallDailyStats.objects.get(theatre_hall=self.hall).tickets_sold, 3
+        )
+        self.assertStatsConsistent()
+
+    def test_moving_performance_moves_counters(self):
+        self._book(1, 2)
+        other_hall = TheatreHall.objects.create(
+            name="Globe", rows=5, seats_in_row=5
+        )
+
+        self.performance.theatre_hall = other_hall
+        self.performance.show_time = "2099-06-09T19:00:00"
+        self.performance.save()
+
+        self.assertEqual(
+            HallDailyStats.objects.get(theatre_hall=self.hall).performances, 0
+        )
+        moved = HallDailyStats.objects.get(theatre_hall=other_hall)
+        self.assertEqual(moved.date, date(2099, 6, 9))
+        self.assertEqual(moved.seats_offered, 25)
+        self.assertEqual(moved.tickets_sold, 2)
+        self.assertStatsConsistent()
+
+    def test_resizing_hall_updates_seats_offered(self):
+        Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2099-06-08T14:00:00",
+        )
+
+        self.hall.rows += 1
+        self.hall.save()
+
+        self.assertEqual(
+            HallDailyStats.objects.get(theatre_hall=self.hall).seats_offered,
+            220,
+        )
+        self.assertEqual(
+            PlayDailyStats.objects.get(play=self.play).seats_offered, 220
+        )
+        self.assertStatsConsistent()
+
+        self.hall.name = "Renamed"
+        self.hall.save()
+        self.assertStatsConsistent()
+
+    def test_deleting_performance_removes_counters(self):
+        self._book(1)
+
+        self.performance.delete()
+
+        stats = PlayDailyStats.objects.get(play=self.play)
+        self.assertEqual(
+            (stats.performances, stats.seats_offered, stats.tickets_sold),
+            (0, 0, 0),
+        )
+
+    def test_deleting_user_removes_their_tickets(self):
+        self._book(1, 2)
+        buyer = get_user_model().objects.create_user(
+            email="buyer@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=buyer)
+        self._book(3, 4, 5)
+        self._book(6)
+        archive_batch(
+            datetime(2100, 1, 1),
+            after_id=Reservation.objects.get(user=self.user).id,
+            batch_size=1,
+        )
+
+        buyer.delete()
+
+        self.assertEqual(
+            PlayDailyStats.objects.get(play=self.play).tickets_sold, 2
+        )
+        self.assertStatsConsistent()
+
+    def test_plays_endpoint_filters_by_date(self):
+        self._book(1, 2)
+        Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2099-07-01T19:00:00",
+        )
+
+        response = self.client.get(
+            f"{ANALYTICS_URL}plays/",
+            {"from": "2099-06-01", "to": "2099-06-30"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        row = response.data["results"][0]
+        self.assertEqual(row["tickets_sold"], 2)
+        self.assertEqual(row["occupancy"], 0.02)
+
+    def test_performances_endpoint_counts_tickets(self):
+        self._book(1, 2, 3, 4)
+
+        response = self.client.get(f"{ANALYTICS_URL}performances/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["tickets_sold"], 4)
+        self.assertEqual(response.data["results"][0]["occupancy"], 0.04)
+
+    def test_rebuild_analytics_check(self):
+        self._book(1)
+        PlayDailyStats.objects.update(tickets_sold=10)
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_analytics", "--check", stdout=out)
+
+        call_command("rebuild_analytics", stdout=out)
+        self.assertStatsConsistent()
@@ -0,0 +1,155 @@
+import csv
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.booking import create_reservation
+from theatre.models import (
+    ArchivedReservation,
+    ArchivedTicket,
+    Play,
+    Performance,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+ANALYTICS_URL = "/api/theatre/analytics/"
+PERFORMANCE_URL = "/api/theatre/performances/"
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+class ArchiveSalesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        play = Play.objects.create(title="Hamlet", description="Tragedy")
+        hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+        self.past = Performance.objects.create(
+            play=play, theatre_hall=hall, show_time="2020-06-08T19:00:00"
+        )
+        self.future = Performance.objects.create(
+            play=play, theatre_hall=hall, show_time="2099-06-08T19:00:00"
+        )
+        self.finished = self._book((self.past, 1), (self.past, 2))
+        self.cart = self._book((self.past, 3), (self.future, 1))
+        self.upcoming = self._book((self.future, 2))
+
+    def _book(self, *seats):
+        return create_reservation(
+            user=self.admin,
+            tickets=[
+                Ticket(performance=performance, row=1, seat=seat)
+                for performance, seat in seats
+            ],
+        )
+
+    def _archive(self):
+        call_command(
+            "archive_sales",
+            "--before",
+            "2021-01-01",
+            "--batch-size",
+            "1",
+            stdout=StringIO(),
+        )
+
+    def test_moves_only_finished_reservations(self):
+        ticket_ids = set(self.finished.tickets.values_list("id", flat=True))
+
+        self._archive()
+
+        self.assertEqual(
+            set(Reservation.objects.values_list("id", flat=True)),
+            {self.cart.id, self.upcoming.id},
+        )
+        archived = ArchivedReservation.objects.get()
+        self.assertEqual(archived.id, self.finished.id)
+        self.assertEqual(
+            set(archived.tickets.values_list("id", flat=True)), ticket_ids
+        )
+        self.assertEqual(Ticket.objects.count(), 3)
+
+    def test_archived_tickets_stay_sold(self):
+        self._archive()
+
+        call_command("rebuild_listing", "--check", stdout=StringIO())
+        call_command("rebuild_analytics", "--check", stdout=StringIO())
+        response = self.client.get(
+            f"{ANALYTICS_URL}performances/", {"to": "2020-12-31"}
+        )
+        self.assertEqual(response.data["results"][0]["tickets_sold"], 3)
+
+    def test_export_includes_archived_sales(self):
+        self._archive()
+
+        response = self.client.get(
+            f"{ANALYTICS_URL}export/", {"to": "2020-12-31"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(
+            csv.DictReader(
+                StringIO(b"".join(response.streaming_content).decode())
+            )
+        )
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            sorted(row["archived"] for row in rows),
+            ["False", "True", "True"],
+        )
+        self.assertEqual(
+            {int(row["ticket"]) for row in rows if row["archived"] == "True"},
+            set(ArchivedTicket.objects.values_list("id", flat=True)),
+        )
+
+    def test_export_escapes_formulas(self):
+        Play.objects.update(title='=HYPERLINK("http://evil.test")')
+        TheatreHall.objects.update(name="@Globe")
+
+        response = self.client.get(
+            f"{ANALYTICS_URL}export/", {"to": "2020-12-31"}
+        )
+
+        row = next(
+            csv.DictReader(
+                StringIO(b"".join(response.streaming_content).decode())
+            )
+        )
+        self.assertEqual(row["play"], '\'=HYPERLINK("http://evil.test")')
+        self.assertEqual(row["theatre_hall"], "'@Globe")
+        self.assertEqual(row["user"], "admin@test.com")
+
+    def test_archived_seats_cannot_be_booked(self):
+        self._archive()
+
+        response = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [{"performance": self.past.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            Ticket.objects.filter(performance=self.past, seat=1).exists()
+        )
+
+    def test_taken_places_include_archived_seats(self):
+        self._archive()
+
+        response = self.client.get(f"{PERFORMANCE_URL}{self.past.id}/")
+
+        self.assertEqual(
+            response.data["taken_places"],
+            [{"row": 1, "seat": seat} for seat in (1, 2, 3)],
+        )
@@ -0,0 +1,153 @@
+import unittest
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from theatre.models import Genre, Play
+from theatre.serializers import MAX_BATCH_REQUESTS
+from theatre.throttling import UserSlidingWindowThrottle
+
+BATCH_URL = "/api/batch/"
+GENRE_URL = "/api/theatre/genres/"
+
+
+def batch(*paths, **fields):
+    return {"requests": [{"path": path} for path in paths], **fields}
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.drama = Genre.objects.create(name="Drama")
+        self.play = Play.objects.create(title="Hamlet", description="Tragedy")
+
+    def _batch(self, *paths, **fields):
+        response = self.client.post(
+            BATCH_URL, batch(*paths, **fields), format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(result["status"], result["body"]) for result in response.data]
+
+    def test_responses_match_separate_requests(self):
+        paths = (
+            GENRE_URL,
+            f"/api/theatre/plays/{self.play.id}/",
+            "/api/theatre/plays/?title=ham",
+            "/api/user/me/",
+        )
+
+        results = self._batch(*paths)
+
+        cache.clear()
+        self.assertEqual(
+            results,
+            [
+                (response.status_code, response.json())
+                for response in map(self.client.get, paths)
+            ],
+        )
+        self.assertEqual(results[3][1]["email"], self.user.email)
+
+    def test_errors_are_reported_per_request(self):
+        results = self._batch(
+            "/api/theatre/plays/999/",
+            "/api/nowhere/",
+            "/api/theatre/analytics/plays/",
+            GENRE_URL,
+        )
+
+        self.assertEqual(
+            [status_code for status_code, _ in results],
+            [
+                status.HTTP_404_NOT_FOUND,
+                status.HTTP_404_NOT_FOUND,
+                status.HTTP_403_FORBIDDEN,
+                status.HTTP_200_OK,
+            ],
+        )
+
+    def test_anonymous_batch(self):
+        self.client.credentials()
+
+        results = self._batch(GENRE_URL, "/api/user/me/")
+
+        self.assertEqual(
+            [status_code for status_code, _ in results],
+            [status.HTTP_401_UNAUTHORIZED, status.HTTP_401_UNAUTHORIZED],
+        )
+
+    def test_streamed_responses_are_not_batched(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        results = self._batch("/api/theatre/analytics/export/")
+
+        self.assertEqual(results[0][0], status.HTTP_406_NOT_ACCEPTABLE)
+
+    def test_requests_are_throttled_one_by_one(self):
+        with mock.patch.object(
+            UserSlidingWindowThrottle, "rate", "2/day", create=True
+        ):
+            results = self._batch(GENRE_URL, GENRE_URL, GENRE_URL)
+
+        self.assertEqual(
+            [status_code for status_code, _ in results],
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+
+    def test_invalid_batches(self):
+        for payload in (
+            {"requests": []},
+            batch(*[GENRE_URL] * (MAX_BATCH_REQUESTS + 1)),
+            batch("/admin/"),
+            batch(BATCH_URL),
+            batch("https://example.com/api/theatre/genres/"),
+            {"requests": [{"method": "POST", "path": GENRE_URL}]},
+        ):
+            response = self.client.post(BATCH_URL, payload, format="json")
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, payload
+            )
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql",
+    "Pool threads need their own connections to committed data",
+)
+class ParallelBatchTests(TransactionTestCase):
+    def test_parallel_batch_matches_sequential(self):
+        user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        Genre.objects.bulk_create(
+            Genre(name=f"Genre {index}") for index in range(5)
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        paths = [f"{GENRE_URL}?limit={limit}" for limit in range(1, 6)]
+
+        sequential, parallel = (
+            client.post(
+                BATCH_URL, batch(*paths, parallel=flag), format="json"
+            ).json()
+            for flag in (False, True)
+        )
+
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(len(parallel[4]["body"]["results"]), 5)
@@ -0,0 +1,199 @@
+import random
+import threading
+import unittest
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from theatre.booking import SeatsTaken, create_reservation
+from theatre.models import (
+    Play,
+    Performance,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+from theatre.serializers import MAX_CART_PERFORMANCES, MAX_CART_TICKETS
+
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+def sample_performances(count, rows=2, seats_in_row=5):
+    play = Play.objects.create(title="Hamlet", description="Tragedy")
+    hall = TheatreHall.objects.create(
+        name="Globe", rows=rows, seats_in_row=seats_in_row
+    )
+    return [
+        Performance.objects.create(
+            play=play,
+            theatre_hall=hall,
+            show_time=f"2099-06-{day:02d}T19:00:00",
+        )
+        for day in range(1, count + 1)
+    ]
+
+
+class CartReservationTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.performances = sample_performances(3)
+
+    def _book(self, seats):
+        return self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"performance": performance.id, "row": row, "seat": seat}
+                    for performance, row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_cart_spans_performances(self):
+        first, second, third = self.performances
+
+        response = self._book(
+            [(third, 1, 1), (first, 1, 1), (second, 2, 5), (first, 1, 2)]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 4)
+        call_command("rebuild_listing", "--check", stdout=StringIO())
+        call_command("rebuild_analytics", "--check", stdout=StringIO())
+
+    def test_conflicts_are_reported_together(self):
+        first, second, _ = self.performances
+        self._book([(first, 1, 1), (second, 1, 1)])
+
+        response = self._book([(second, 1, 1), (first, 1, 2), (first, 1, 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.json()["conflicts"],
+            [
+                {
+                    "performance": first.id,
+                    "row": 1,
+                    "seat": 1,
+                    "reason": "sold",
+                },
+                {
+                    "performance": second.id,
+                    "row": 1,
+                    "seat": 1,
+                    "reason": "sold",
+                },
+            ],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_seat_twice_in_one_cart(self):
+        first = self.performances[0]
+
+        response = self._book([(first, 1, 1), (first, 1, 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cart_size_is_capped(self):
+        performances = sample_performances(
+            MAX_CART_PERFORMANCES + 1, rows=10, seats_in_row=10
+        )
+
+        too_many_tickets = self._book(
+            [
+                (performances[0], row, seat)
+                for row in range(1, 10)
+                for seat in range(1, 11)
+            ][: MAX_CART_TICKETS + 1]
+        )
+        too_many_performances = self._book(
+            [(performance, 1, 1) for performance in performances]
+        )
+
+        self.assertEqual(
+            too_many_tickets.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            too_many_performances.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertFalse(Ticket.objects.exists())
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql",
+    "Row locks need a database with concurrent writers",
+)
+class CartConcurrencyTests(TransactionTestCase):
+    """
+    Parallel carts over the same performances, in random order and with
+    overlapping seats, must neither deadlock nor double book
+    """
+
+    THREADS = 8
+    CARTS_PER_THREAD = 25
+
+    def test_parallel_carts(self):
+        performances = sample_performances(4)
+        users = [
+            get_user_model().objects.create_user(
+                email=f"user{index}@test.com", password="testPassword"
+            )
+            for index in range(self.THREADS)
+        ]
+        outcomes = []
+        errors = []
+
+        def worker(user, seed):
+            rnd = random.Random(seed)
+            try:
+                for _ in range(self.CARTS_PER_THREAD):
+                    tickets = [
+                        Ticket(
+                            performance=performance,
+                            row=rnd.randint(1, 2),
+                            seat=rnd.randint(1, 5),
+                        )
+                        for performance in rnd.sample(
+                            performances, rnd.randint(2, 4)
+                        )
+                    ]
+                    try:
+                        create_reservation(user=user, tickets=tickets)
+                        outcomes.append("booked")
+                    except SeatsTaken:
+                        outcomes.append("conflict")
+            except Exception as error:  # deadlocks, integrity errors
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(user, index))
+            for index, user in enumerate(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(outcomes), self.THREADS * self.CARTS_PER_THREAD)
+        self.assertIn("booked", outcomes)
+        self.assertEqual(
+            Ticket.objects.count(),
+            Ticket.objects.values("performance", "row", "seat")
+            .distinct()
+            .count(),
+        )
+        call_command("rebuild_listing", "--check", stdout=StringIO())
+        call_command("rebuild_analytics", "--check", stdout=StringIO())
@@ -0,0 +1,151 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.cancellation import cancel_reservations
+from theatre.models import (
+    CategoryPrice,
+    Play,
+    Performance,
+    PerformanceListing,
+    PlayDailyStats,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+RESERVATION_URL = "/api/theatre/reservations/"
+PERFORMANCE_URL = "/api/theatre/performances/"
+
+
+class CancellationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+        CategoryPrice.objects.create(theatre_hall=hall, category="A", price=20)
+        self.performance = Performance.objects.create(
+            play=Play.objects.create(title="Hamlet", description="Tragedy"),
+            theatre_hall=hall,
+            show_time="2099-06-08T19:00:00",
+        )
+
+    def _book(self, *seats):
+        response = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": 1,
+                        "seat": seat,
+                        "performance": self.performance.id,
+                    }
+                    for seat in seats
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Reservation.objects.get(id=response.data["id"])
+
+    def _available(self):
+        return PerformanceListing.objects.get(
+            performance=self.performance
+        ).tickets_available
+
+    def assertReadModelsConsistent(self):
+        call_command("rebuild_listing", "--check", stdout=StringIO())
+        call_command("rebuild_analytics", "--check", stdout=StringIO())
+
+    def test_cancel_selected_tickets(self):
+        reservation = self._book(1, 2, 3)
+        tickets = list(reservation.tickets.values_list("id", flat=True))
+
+        response = self.client.post(
+            f"{RESERVATION_URL}{reservation.id}/cancel/",
+            {"tickets": tickets[:2]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"released": 2})
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.total, Decimal("20.00"))
+        self.assertEqual(self._available(), 99)
+        self.assertEqual(PlayDailyStats.objects.get().tickets_sold, 1)
+        self.assertReadModelsConsistent()
+
+    def test_cancel_whole_reservation(self):
+        reservation = self._book(1, 2)
+
+        response = self.client.post(
+            f"{RESERVATION_URL}{reservation.id}/cancel/", format="json"
+        )
+
+        self.assertEqual(response.data, {"released": 2})
+        self.assertFalse(Reservation.objects.exists())
+        self.assertEqual(self._available(), 100)
+        self.assertReadModelsConsistent()
+
+    def test_cancel_foreign_tickets(self):
+        reservation = self._book(1)
+        other = self._book(2)
+
+        response = self.client.post(
+            f"{RESERVATION_URL}{reservation.id}/cancel/",
+            {"tickets": list(other.tickets.values_list("id", flat=True))},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_cancel_started_performance(self):
+        reservation = self._book(1)
+        Performance.objects.filter(id=self.performance.id).update(
+            show_time="2024-06-08T19:00:00"
+        )
+
+        response = self.client.post(
+            f"{RESERVATION_URL}{reservation.id}/cancel/", format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_staff_cancels_performance(self):
+        self._book(1, 2)
+        self._book(3)
+        admin = get_user_model().objects.create_superuser(
+            email="admin@admin.com", password="adminPassword"
+        )
+        url = f"{PERFORMANCE_URL}{self.performance.id}/cancel-tickets/"
+
+        self.assertEqual(
+            self.client.post(url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.client.force_authenticate(user=admin)
+        response = self.client.post(url)
+
+        self.assertEqual(response.data, {"released": 3})
+        self.assertFalse(Reservation.objects.exists())
+        self.assertEqual(self._available(), 100)
+        self.assertReadModelsConsistent()
+
+    def test_cancel_reservations(self):
+        self._book(1, 2)
+        Reservation.objects.create(user=self.user)
+
+        cancel_reservations(Reservation.objects.all())
+
+        self.assertFalse(Reservation.objects.exists())
+        self.assertReadModelsConsistent()
@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import hmac
+import struct
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.booking import create_reservation
+from theatre.cancellation import release_tickets
+from theatre.models import Play, Performance, TheatreHall, Ticket
+from theatre.ticket_codes import (
+    InvalidTicketCode,
+    code_key,
+    make_code,
+    read_code,
+)
+
+CHECKIN_URL = "/api/theatre/checkin/"
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+class TicketCodeTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testPassword"
+        )
+        play = Play.objects.create(title="Hamlet", description="Tragedy")
+        hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+        self.performance = Performance.objects.create(
+            play=play, theatre_hall=hall, show_time="2099-06-08T19:00:00"
+        )
+        self.other = Performance.objects.create(
+            play=play, theatre_hall=hall, show_time="2099-06-09T19:00:00"
+        )
+        self.tickets = create_reservation(
+            user=self.admin,
+            tickets=[
+                Ticket(performance=self.performance, row=1, seat=seat)
+                for seat in (1, 2, 3)
+            ]
+            + [Ticket(performance=self.other, row=1, seat=1)],
+        ).tickets.order_by("id")
+        self.codes = [make_code(ticket) for ticket in self.tickets]
+        self.client.force_authenticate(user=self.admin)
+
+    def _scan(self, *scans, **data):
+        return self.client.post(
+            CHECKIN_URL,
+            {
+                "scans": [
+                    scan if isinstance(scan, dict) else {"code": scan}
+                    for scan in scans
+                ],
+                **data,
+            },
+            format="json",
+        )
+
+    def test_code_round_trip(self):
+        ticket = self.tickets[1]
+
+        self.assertEqual(
+            read_code(self.codes[1]),
+            (ticket.id, self.performance.id, 1, 2),
+        )
+        self.assertEqual(len(self.codes[1]), 48)
+        tampered = self.codes[1][:-1] + (
+            "A" if self.codes[1][-1] != "A" else "B"
+        )
+        with self.assertRaises(InvalidTicketCode):
+            read_code(tampered)
+
+    def test_performance_ids_above_32_bits(self):
+        ticket = Ticket(id=7, performance_id=2**40, row=3, seat=4)
+
+        self.assertEqual(read_code(make_code(ticket)), (7, 2**40, 3, 4))
+
+    def test_version_1_codes_are_read(self):
+        payload = struct.pack(">BQIHH", 1, 7, 12, 3, 4)
+        signature = hmac.new(code_key(), payload, hashlib.sha256).digest()
+        code = base64.b32encode(payload + signature[:8]).decode()
+
+        self.assertEqual(len(code), 40)
+        self.assertEqual(read_code(code), (7, 12, 3, 4))
+
+    def test_reservation_shows_codes(self):
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertIn(
+            response.data["results"][0]["tickets"][0]["code"], self.codes
+        )
+
+    def test_single_scan_is_one_update(self):
+        with self.assertNumQueries(1):
+            response = self._scan(self.codes[0])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["result"], "checked_in")
+        self.assertIsNotNone(
+            Ticket.objects.get(id=self.tickets[0].id).checked_in_at
+        )
+
+        again = self._scan(self.codes[0])
+
+        self.assertEqual(again.data[0]["result"], "already_checked_in")
+        self.assertEqual(
+            again.data[0]["checked_in_at"], response.data[0]["checked_in_at"]
+        )
+
+    def test_offline_batch_is_idempotent(self):
+        release_tickets(Ticket.objects.filter(id=self.tickets[2].id))
+        scans = [
+            {"code": self.codes[0], "scanned_at": "2025-06-08T18:40:00"},
+            {"code": self.codes[1], "scanned_at": "2025-06-08T18:45:00"},
+            {"code": self.codes[0], "scanned_at": "2025-06-08T18:50:00"},
+            {"code": self.codes[2]},
+            {"code": self.codes[3]},
+            {"code": "NOT-A-TICKET"},
+        ]
+
+        response = self._scan(*scans, performance=self.performance.id)
+
+        self.assertEqual(
+            [scan["result"] for scan in response.data],
+            [
+                "checked_in",
+                "checked_in",
+                "already_checked_in",
+                "not_found",
+                "wrong_performance",
+                "invalid",
+            ],
+        )
+        self.assertEqual(
+            Ticket.objects.get(id=self.tickets[1].id).checked_in_at,
+            datetime(2025, 6, 8, 18, 45),
+        )
+
+        replay = self._scan(*scans, performance=self.performance.id)
+
+        self.assertEqual(
+            [scan["result"] for scan in replay.data[:3]],
+            ["already_checked_in"] * 3,
+        )
+        self.assertEqual(
+            Ticket.objects.filter(checked_in_at__isnull=False).count(), 2
+        )
+
+    def test_only_staff_can_check_in(self):
+        user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self._scan(self.codes[0])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,35 @@
+import os
+
+from django.test import SimpleTestCase
+
+from theatre.management.commands.startup_benchmark import (
+    HEAVY_MODULES,
+    measure_startup,
+)
+
+
+class ColdStartTests(SimpleTestCase):
+    """
+    Regression guard for API worker cold start, see `startup_benchmark`
+    """
+
+    def test_api_worker_skips_admin_docs_debug_and_pillow(self):
+        report = measure_startup("api")
+
+        self.assertEqual(report["status"], "200 OK")
+        self.assertEqual(
+            [name for name in HEAVY_MODULES if report["modules"][name]], []
+        )
+        self.assertTrue(report["top_imports"])
+
+        # Opt-in, timings depend on the machine running the suite
+        budget_ms = os.environ.get("COLD_START_BUDGET_MS")
+        if budget_ms:
+            self.assertLess(report["first_response_ms"], float(budget_ms))
+
+    def test_full_worker_loads_admin_and_docs(self):
+        report = measure_startup("full")
+
+        self.assertEqual(report["status"], "200 OK")
+        self.assertTrue(report["modules"]["theatre.admin"])
+        self.assertTrue(report["modules"]["drf_spectacular.views"])
@@ -0,0 +1,175 @@
+import gzip
+import json
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from config.compression import (
+    CODINGS,
+    STREAM_FLUSH_SIZE,
+    _compress_sequence,
+    negotiate,
+)
+from theatre.models import Actor, Genre, Play
+
+GENRE_URL = "/api/theatre/genres/"
+PLAY_URL = "/api/theatre/plays/"
+EXPORT_URL = "/api/theatre/analytics/export/"
+
+
+class NegotiateTests(SimpleTestCase):
+    def test_preferred_supported_coding(self):
+        self.assertEqual(negotiate("gzip"), "gzip")
+        self.assertEqual(negotiate("deflate, gzip;q=0.5"), "gzip")
+        self.assertEqual(negotiate("*"), next(iter(CODINGS)))
+
+    def test_no_acceptable_coding(self):
+        for header in ("", "identity", "deflate", "gzip;q=0", "*;q=0"):
+            self.assertIsNone(negotiate(header), header)
+
+
+class CompressSequenceTests(SimpleTestCase):
+    def test_small_chunks_are_flushed_together(self):
+        rows = [b"%d,Hamlet,Globe\n" % index for index in range(10000)]
+
+        pieces = list(_compress_sequence(rows, "gzip"))
+
+        self.assertLessEqual(
+            len(pieces), len(b"".join(rows)) // STREAM_FLUSH_SIZE + 2
+        )
+        self.assertEqual(
+            zlib.decompress(b"".join(pieces), 16 + zlib.MAX_WBITS),
+            b"".join(rows),
+        )
+
+    def test_large_chunks_are_flushed_right_away(self):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunk = b"x" * STREAM_FLUSH_SIZE
+
+        pieces = _compress_sequence(iter([chunk, chunk]), "gzip")
+
+        self.assertEqual(decompressor.decompress(next(pieces)), chunk)
+
+
+class CompressionMiddlewareTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword", is_staff=True
+        )
+        self.client.force_authenticate(user=self.user)
+        self.long_play, self.short_play = (
+            Play.objects.create(title=title, description=description)
+            for title, description in (
+                ("Hamlet", "To be, or not to be. " * 100),
+                ("Macbeth", "Tragedy"),
+            )
+        )
+
+    def test_large_json_is_compressed(self):
+        url = f"{PLAY_URL}{self.long_play.id}/"
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_unsupported_coding_is_not_applied(self):
+        response = self.client.get(
+            f"{PLAY_URL}{self.long_play.id}/", HTTP_ACCEPT_ENCODING="deflate"
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_responses_below_threshold_are_not_compressed(self):
+        response = self.client.get(
+            f"{PLAY_URL}{self.short_play.id}/", HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_streamed_responses_are_compressed(self):
+        plain = self.client.get(EXPORT_URL)
+        response = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(
+            zlib.decompress(
+                b"".join(response.streaming_content), 16 + zlib.MAX_WBITS
+            ),
+            b"".join(plain.streaming_content),
+        )
+
+
+class CatalogueCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        Genre.objects.bulk_create(
+            Genre(name=f"Genre {index}") for index in range(40)
+        )
+
+    def test_repeat_hits_skip_queries_and_compression(self):
+        first = self.client.get(GENRE_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        # Only the throttle counters
+        with self.assertNumQueries(1):
+            second = self.client.get(GENRE_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(second["Content-Encoding"], "gzip")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(
+            json.loads(gzip.decompress(second.content)),
+            self.client.get(GENRE_URL).json(),
+        )
+        self.assertEqual(len(second.data["results"]), 40)
+
+    def test_not_modified_for_matching_etag(self):
+        etag = self.client.get(GENRE_URL)["ETag"]
+
+        response = self.client.get(GENRE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_writes_retire_entries(self):
+        self.client.get(GENRE_URL)
+
+        Genre.objects.create(name="Drama")
+
+        self.assertEqual(self.client.get(GENRE_URL).data["count"], 41)
+
+    def test_play_relations_retire_entries(self):
+        play = Play.objects.create(title="Hamlet", description="Tragedy")
+        actor = Actor.objects.create(first_name="David", last_name="Tennant")
+        self.client.get(PLAY_URL)
+
+        play.actors.add(actor)
+
+        self.assertEqual(
+            self.client.get(PLAY_URL).data["results"][0]["actors"],
+            ["David Tennant"],
+        )
+
+    def test_entries_depend_on_query(self):
+        self.client.get(GENRE_URL, {"limit": 5})
+
+        self.assertEqual(
+            len(self.client.get(GENRE_URL, {"limit": 3}).data["results"]), 3
+        )
+
+    @override_settings(COMPRESSION_MIN_SIZE=10**6)
+    def test_small_entries_are_stored_plain(self):
+        response = self.client.get(GENRE_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
@@ -0,0 +1,130 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from theatre.management.commands.import_data import iter_json_array
+from theatre.models import (
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+FIXTURE_PATH = Path(settings.BASE_DIR) / "theatre_service_db_data.json"
+
+
+class IterJsonArrayTests(SimpleTestCase):
+    def _items(self, text):
+        return list(iter_json_array(StringIO(text)))
+
+    def test_items_are_read_across_chunks(self):
+        items = [{"model": "theatre.genre", "pk": pk} for pk in range(50)]
+
+        with mock.patch(
+            "theatre.management.commands.import_data.CHUNK_SIZE", 7
+        ):
+            self.assertEqual(self._items(json.dumps(items, indent=2)), items)
+
+    def test_empty_array(self):
+        self.assertEqual(self._items(" [ ] "), [])
+
+    def test_invalid_input_is_rejected(self):
+        for text in (
+            "",
+            '{"model": "theatre.genre"}',
+            '[{"model": "theatre.genre"}, oops]',
+            '[{"model": "theatre.genre", "fields": {"name": "Dra',
+            '[{"model": "theatre.genre"}',
+        ):
+            with self.assertRaises(CommandError, msg=text):
+                self._items(text)
+
+
+class FixtureImportTests(TestCase):
+    def test_fixture_import(self):
+        fixture = json.loads(FIXTURE_PATH.read_text())
+
+        call_command("import_data", str(FIXTURE_PATH), stdout=StringIO())
+
+        for model in (Genre, Play, Performance, Reservation, Ticket):
+            self.assertEqual(
+                model.objects.count(),
+                sum(
+                    item["model"] == model._meta.label_lower
+                    for item in fixture
+                ),
+                model.__name__,
+            )
+        call_command("rebuild_similar_plays", "--check", stdout=StringIO())
+
+
+class CsvImportTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.performance = Performance.objects.create(
+            play=Play.objects.create(title="Hamlet", description="Tragedy"),
+            theatre_hall=TheatreHall.objects.create(
+                name="Globe", rows=2, seats_in_row=3
+            ),
+            show_time="2099-06-01T19:00:00",
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+
+    def _import_tickets(self, *rows):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False
+        ) as csv_file:
+            csv_file.write("performance,reservation,row,seat\n")
+            for performance_id, row, seat in rows:
+                csv_file.write(
+                    f"{performance_id},{self.reservation.id},{row},{seat}\n"
+                )
+        self.addCleanup(Path(csv_file.name).unlink)
+        call_command(
+            "import_data",
+            csv_file.name,
+            "--model",
+            "theatre.ticket",
+            stdout=StringIO(),
+        )
+
+    def test_csv_tickets_are_imported(self):
+        self._import_tickets(
+            (self.performance.id, 1, 1), (self.performance.id, 2, 3)
+        )
+
+        self.assertEqual(
+            sorted(self.performance.tickets.values_list("row", "seat")),
+            [(1, 1), (2, 3)],
+        )
+
+    def test_invalid_csv_tickets_are_rejected(self):
+        Ticket.objects.create(
+            performance=self.performance,
+            reservation=self.reservation,
+            row=2,
+            seat=2,
+        )
+        for rows in (
+            # Taken twice in the file, then already taken
+            [(self.performance.id, 1, 1), (self.performance.id, 1, 1)],
+            [(self.performance.id, 2, 2)],
+            [(self.performance.id, 3, 1)],
+            [(self.performance.id, 1, 4)],
+            [(self.performance.id + 1, 1, 1)],
+        ):
+            with self.assertRaises(CommandError, msg=rows):
+                self._import_tickets(*rows)
+
+        self.assertEqual(Ticket.objects.count(), 1)
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.layouts import LayoutError, compile_layout, get_layout
+from theatre.models import Play, Performance, PerformanceListing, TheatreHall
+
+THEATRE_HALL_URL = "/api/theatre/theatrehalls/"
+RESERVATION_URL = "/api/theatre/reservations/"
+
+OPERA_LAYOUT = """
+..AAAA..
+.AAAAAA.
+BBB..BBB
+
+CC.CC
+"""
+
+
+class SeatLayoutTests(APITestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@admin.com", password="adminPassword"
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.hall = TheatreHall.objects.create(
+            name="Opera", rows=0, seats_in_row=0, layout=OPERA_LAYOUT.strip()
+        )
+
+    def test_compile_layout(self):
+        layout = compile_layout("AA.B\n  BB \n")
+
+        self.assertEqual(layout.rows, ("AA.B", "..BB"))
+        self.assertEqual(layout.capacity, 5)
+        self.assertEqual(layout.categories, {"A": 2, "B": 3})
+        self.assertEqual(layout.category(1, 4), "B")
+        self.assertFalse(layout.is_seat(1, 3))
+        self.assertFalse(layout.is_seat(2, 5))
+        self.assertFalse(layout.is_seat(3, 1))
+
+    def test_invalid_layouts(self):
+        for text in ("AAx", "...\n..", "A" * 501):
+            with self.assertRaises(LayoutError):
+                compile_layout(text)
+
+    def test_hall_fields_follow_layout(self):
+        self.assertEqual(
+            (self.hall.rows, self.hall.seats_in_row, self.hall.capacity),
+            (5, 8, 20),
+        )
+        self.assertEqual(
+            TheatreHall.objects.create(
+                name="Box", rows=3, seats_in_row=4
+            ).capacity,
+            12,
+        )
+
+    def test_compiled_layout_is_cached_per_version(self):
+        hall = TheatreHall.objects.get(pk=self.hall.pk)
+        self.assertIs(hall.seat_layout, get_layout(self.hall))
+
+        hall.layout = "AAA"
+        hall.save()
+
+        self.assertEqual(hall.layout_version, self.hall.layout_version + 1)
+        self.assertEqual(hall.seat_layout.capacity, 3)
+        self.assertEqual(
+            TheatreHall.objects.get(pk=hall.pk).seat_layout.rows, ("AAA",)
+        )
+
+    def test_create_hall_with_layout(self):
+        response = self.client.post(
+            THEATRE_HALL_URL,
+            {"name": "Globe", "layout": "AA.AA\nBB.BB"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["rows"], 2)
+        self.assertEqual(response.data["seats_in_row"], 5)
+        self.assertEqual(response.data["capacity"], 8)
+
+    def test_create_hall_with_invalid_layout(self):
+        response = self.client.post(
+            THEATRE_HALL_URL, {"name": "Globe", "layout": "A-A"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("layout", response.data)
+
+    def test_reservation_respects_layout(self):
+        performance = Performance.objects.create(
+            play=Play.objects.create(title="Aida", description="Opera"),
+            theatre_hall=self.hall,
+            show_time="2099-06-08T19:00:00",
+        )
+        self.assertEqual(
+            PerformanceListing.objects.get(
+                performance=performance
+            ).tickets_available,
+            20,
+        )
+
+        def book(row, seat):
+            return self.client.post(
+                RESERVATION_URL,
+                {
+                    "tickets": [
+                        {
+                            "row": row,
+                            "seat": seat,
+                            "performance": performance.id,
+                        }
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(book(1, 1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(book(4, 1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(book(1, 3).status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,130 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from theatre.management.commands.benchmark import percentile
+from theatre.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+CHECKED_READ_MODELS = (
+    "rebuild_analytics",
+    "rebuild_listing",
+    "rebuild_popularity",
+    "rebuild_similar_plays",
+    "rebuild_user_summary",
+)
+
+
+def generate_data(**options):
+    call_command(
+        "generate_data",
+        genres=3,
+        actors=10,
+        plays=4,
+        halls=2,
+        users=5,
+        days=2,
+        occupancy=0.1,
+        seed=1,
+        stdout=StringIO(),
+        **options,
+    )
+
+
+class GenerateDataTests(TestCase):
+    def test_rows_are_generated_at_the_requested_scale(self):
+        generate_data()
+
+        self.assertEqual(
+            [
+                model.objects.count()
+                for model in (Genre, Actor, Play, TheatreHall)
+            ],
+            [3, 10, 4, 2],
+        )
+        self.assertEqual(get_user_model().objects.count(), 5)
+        # Three shows a day in every hall
+        self.assertEqual(Performance.objects.count(), 12)
+        self.assertTrue(Reservation.objects.exists())
+        self.assertFalse(Ticket.objects.filter(reservation=None).exists())
+
+    def test_read_models_are_up_to_date(self):
+        generate_data()
+
+        for command in CHECKED_READ_MODELS:
+            call_command(command, "--check", stdout=StringIO())
+
+
+# The benchmark client talks to localhost, allowed by DEBUG outside tests
+@override_settings(ALLOWED_HOSTS=["localhost"])
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        generate_data()
+        get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testPassword"
+        )
+
+    def _benchmark(self, *args):
+        output = StringIO()
+        call_command(
+            "benchmark",
+            "--iterations",
+            "2",
+            "--warmup",
+            "1",
+            *args,
+            stdout=output,
+        )
+        return {
+            result["name"]: result
+            for result in json.loads(output.getvalue())["results"]
+        }
+
+    def test_every_scenario_answers(self):
+        results = self._benchmark()
+
+        self.assertIn("reservation-create", results)
+        for name, result in results.items():
+            self.assertTrue(
+                all(status < 500 for status in result["statuses"]), name
+            )
+        self.assertEqual(results["reservation-create"]["statuses"], [201])
+
+    def test_streamed_scenarios_count_their_queries(self):
+        results = self._benchmark("--route", "analytics-export")
+
+        self.assertEqual(results["analytics-export"]["statuses"], [200])
+        self.assertGreater(
+            results["analytics-export"]["queries_per_request"], 0
+        )
+
+    def test_benchmark_leaves_data_unchanged(self):
+        tickets = Ticket.objects.count()
+
+        self._benchmark("--route", "reservation-create")
+
+        self.assertEqual(Ticket.objects.count(), tickets)
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.07), 7)
+        self.assertEqual(percentile(values, 1), 100)
+        self.assertEqual(percentile([3, 9], 0.5), 3)
+        self.assertEqual(percentile([3], 0.99), 3)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.models import Genre, Reservation
+from theatre.pagination import EstimatedCountPagination
+
+GENRE_URL = "/api/theatre/genres/"
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+class EstimatedCountPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        for name in ("Comedy", "Drama", "Tragedy"):
+            Genre.objects.create(name=name)
+
+    def test_small_table_is_counted_exactly(self):
+        response = self.client.get(GENRE_URL, {"limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse(response.data["count_estimated"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_large_table_reports_planner_estimate(self):
+        with mock.patch(
+            "theatre.pagination.table_estimate", return_value=250_000
+        ):
+            response = self.client.get(GENRE_URL, {"limit": 2})
+
+        self.assertEqual(response.data["count"], 250_000)
+        self.assertTrue(response.data["count_estimated"])
+        self.assertEqual(len(response.data["results"]), 2)
+
+    @mock.patch.object(EstimatedCountPagination, "count_threshold", 2)
+    def test_large_filtered_list_only_knows_next_page(self):
+        for _ in range(3):
+            Reservation.objects.create(user=self.user)
+
+        first_page = self.client.get(RESERVATION_URL, {"limit": 2})
+        last_page = self.client.get(RESERVATION_URL, {"limit": 2, "offset": 2})
+
+        self.assertIsNone(first_page.data["count"])
+        self.assertFalse(first_page.data["count_estimated"])
+        self.assertTrue(first_page.data["has_next"])
+        self.assertIsNotNone(first_page.data["next"])
+        self.assertEqual(len(last_page.data["results"]), 1)
+        self.assertFalse(last_page.data["has_next"])
+        self.assertIsNone(last_page.data["next"])
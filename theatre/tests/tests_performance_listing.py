@@ -0,0 +1,129 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.models import (
+    Play,
+    Performance,
+    PerformanceListing,
+    TheatreHall,
+)
+
+PERFORMANCE_URL = "/api/theatre/performances/"
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+class PerformanceListingTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.play = Play.objects.create(
+            title="Hamlet",
+            description="Based on the novel by William Shakespeare",
+        )
+        self.hall = TheatreHall.objects.create(
+            name="Piccolo Teatro di Milano", rows=10, seats_in_row=10
+        )
+        self.performance = Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2099-06-08T19:00:00",
+        )
+
+    def _listing(self):
+        return PerformanceListing.objects.get(performance=self.performance)
+
+    def _book(self, *seats):
+        response = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": 1,
+                        "seat": seat,
+                        "performance": self.performance.id,
+                    }
+                    for seat in seats
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def assertListingConsistent(self):
+        call_command("rebuild_listing", "--check", stdout=StringIO())
+
+    def test_deleting_a_user_releases_their_seats(self):
+        buyer = get_user_model().objects.create_user(
+            email="buyer@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=buyer)
+        self._book(1)
+
+        buyer.delete()
+
+        self.assertEqual(self._listing().tickets_available, 100)
+        self.assertListingConsistent()
+
+    def test_listing_follows_writes(self):
+        self._book(1, 2, 3)
+        self.assertEqual(self._listing().tickets_available, 97)
+
+        self.play.title = "Macbeth"
+        self.play.save()
+        self.hall.name = "Globe"
+        self.hall.rows = 5
+        self.hall.save()
+        self.performance.show_time = "2099-06-09T19:00:00"
+        self.performance.save()
+
+        listing = self._listing()
+        self.assertEqual(listing.play_title, "Macbeth")
+        self.assertEqual(listing.theatre_hall_name, "Globe")
+        self.assertEqual(listing.theatre_hall_capacity, 50)
+        self.assertEqual(listing.tickets_available, 47)
+        self.assertListingConsistent()
+
+        self.performance.delete()
+        self.assertFalse(PerformanceListing.objects.exists())
+
+    def test_list_is_served_from_listing(self):
+        self._book(1, 2)
+        Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2099-06-10T12:00:00",
+        )
+
+        response = self.client.get(PERFORMANCE_URL, {"date": "2099-06-08"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "id": self.performance.id,
+                    "show_time": "2099-06-08T19:00:00",
+                    "play_title": "Hamlet",
+                    "play_image": None,
+                    "theatre_hall_name": "Piccolo Teatro di Milano",
+                    "theatre_hall_capacity": 100,
+                    "tickets_available": 98,
+                }
+            ],
+        )
+
+    def test_rebuild_listing_check(self):
+        PerformanceListing.objects.update(tickets_available=0)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_listing", "--check", stdout=StringIO())
+
+        call_command("rebuild_listing", stdout=StringIO())
+        self.assertListingConsistent()
@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.booking import create_reservation
+from theatre.cancellation import cancel_reservations
+from theatre.popularity import HORIZON_DAYS
+from theatre.models import (
+    Play,
+    Performance,
+    PlaySalesBucket,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+POPULAR_URL = "/api/theatre/plays/popular/"
+
+
+class PopularPlaysTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+        self.hamlet, self.macbeth = (
+            Play.objects.create(title=title, description="Tragedy")
+            for title in ("Hamlet", "Macbeth")
+        )
+        self.hamlet_show, self.macbeth_show = (
+            Performance.objects.create(
+                play=play,
+                theatre_hall=self.hall,
+                show_time=f"2099-06-0{day}T19:00:00",
+            )
+            for day, play in ((1, self.hamlet), (2, self.macbeth))
+        )
+
+    def _book(self, performance, *seats):
+        return create_reservation(
+            user=self.user,
+            tickets=[
+                Ticket(performance=performance, row=1, seat=seat)
+                for seat in seats
+            ],
+        )
+
+    def _ranking(self, window="7d"):
+        cache.clear()
+        response = self.client.get(POPULAR_URL, {"window": window})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(play["id"], play["tickets_sold"]) for play in response.data]
+
+    def assertCountersConsistent(self):
+        call_command("rebuild_popularity", "--check", stdout=StringIO())
+
+    def test_bookings_and_cancellations_move_the_ranking(self):
+        self._book(self.macbeth_show, 1)
+        hamlet = self._book(self.hamlet_show, 1, 2, 3)
+
+        self.assertEqual(
+            self._ranking(), [(self.hamlet.id, 3), (self.macbeth.id, 1)]
+        )
+        self.assertCountersConsistent()
+
+        cancel_reservations(Reservation.objects.filter(id=hamlet.id))
+
+        self.assertEqual(self._ranking(), [(self.macbeth.id, 1)])
+        self.assertCountersConsistent()
+
+    def test_windows(self):
+        older = self._book(self.hamlet_show, 1, 2)
+        self._book(self.macbeth_show, 1)
+        Reservation.objects.filter(id=older.id).update(
+            created_at=datetime.now() - timedelta(days=10)
+        )
+        call_command("rebuild_popularity", stdout=StringIO())
+
+        self.assertEqual(self._ranking("7d"), [(self.macbeth.id, 1)])
+        self.assertEqual(
+            self._ranking("30d"), [(self.hamlet.id, 2), (self.macbeth.id, 1)]
+        )
+
+    def test_deleting_performance_removes_its_sales(self):
+        self._book(self.hamlet_show, 1, 2)
+        self._book(self.macbeth_show, 1)
+
+        self.hamlet_show.delete()
+
+        self.assertEqual(self._ranking(), [(self.macbeth.id, 1)])
+        self.assertCountersConsistent()
+
+        self.macbeth.delete()
+        self.assertCountersConsistent()
+
+    def test_moving_performance_moves_its_sales(self):
+        self._book(self.hamlet_show, 1, 2)
+
+        self.hamlet_show.play = self.macbeth
+        self.hamlet_show.save()
+
+        self.assertEqual(self._ranking(), [(self.macbeth.id, 2)])
+        self.assertCountersConsistent()
+
+    def test_deleting_user_removes_their_sales(self):
+        self._book(self.hamlet_show, 1, 2)
+        buyer = get_user_model().objects.create_user(
+            email="buyer@test.com", password="testPassword"
+        )
+        create_reservation(
+            user=buyer,
+            tickets=[Ticket(performance=self.hamlet_show, row=2, seat=1)],
+        )
+
+        buyer.delete()
+
+        self.assertEqual(self._ranking(), [(self.hamlet.id, 2)])
+        self.assertCountersConsistent()
+
+    def test_expired_buckets_are_pruned_by_the_next_sale(self):
+        self._book(self.hamlet_show, 1)
+        PlaySalesBucket.objects.update(
+            date=date.today() - timedelta(days=HORIZON_DAYS)
+        )
+        cache.clear()
+
+        self._book(self.macbeth_show, 1)
+
+        self.assertEqual(
+            list(PlaySalesBucket.objects.values_list("play_id", flat=True)),
+            [self.macbeth.id],
+        )
+
+    def test_ranking_is_served_from_cache(self):
+        self._book(self.hamlet_show, 1)
+        self.client.get(POPULAR_URL)
+
+        # Only the throttle counters
+        with self.assertNumQueries(1):
+            response = self.client.get(POPULAR_URL)
+        self.assertEqual(response.data[0]["title"], "Hamlet")
+
+    def test_unknown_window(self):
+        response = self.client.get(POPULAR_URL, {"window": "1y"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
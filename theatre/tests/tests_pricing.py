@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.models import (
+    CategoryPrice,
+    Play,
+    Performance,
+    PerformancePrice,
+    Reservation,
+    TheatreHall,
+)
+from theatre.pricing import get_prices
+
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+class PricingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.hall = TheatreHall.objects.create(
+            name="Opera", rows=0, seats_in_row=0, layout="AAAA\nBB.BB"
+        )
+        CategoryPrice.objects.create(
+            theatre_hall=self.hall, category="A", price=50
+        )
+        CategoryPrice.objects.create(
+            theatre_hall=self.hall, category="B", price=30
+        )
+        play = Play.objects.create(title="Aida", description="Opera")
+        self.performance = Performance.objects.create(
+            play=play, theatre_hall=self.hall, show_time="2099-06-08T19:00:00"
+        )
+        self.premiere = Performance.objects.create(
+            play=play, theatre_hall=self.hall, show_time="2099-06-09T19:00:00"
+        )
+        PerformancePrice.objects.create(
+            performance=self.premiere, category="A", price=80
+        )
+
+    def test_prices_are_loaded_in_bulk_and_cached(self):
+        with self.assertNumQueries(2):
+            prices = get_prices([self.performance, self.premiere])
+
+        self.assertEqual(
+            prices,
+            {
+                self.performance.id: {"A": 50, "B": 30},
+                self.premiere.id: {"A": 80, "B": 30},
+            },
+        )
+        with self.assertNumQueries(0):
+            get_prices([self.performance, self.premiere])
+
+    def test_price_changes_invalidate_cache(self):
+        get_prices([self.performance, self.premiere])
+
+        CategoryPrice.objects.filter(category="B").get().delete()
+        PerformancePrice.objects.create(
+            performance=self.performance, category="A", price=45
+        )
+
+        self.assertEqual(
+            get_prices([self.performance, self.premiere]),
+            {self.performance.id: {"A": 45}, self.premiere.id: {"A": 80}},
+        )
+
+    def test_performance_detail_includes_prices(self):
+        response = self.client.get(
+            reverse(
+                "theatre:performance-detail", kwargs={"pk": self.premiere.id}
+            )
+        )
+
+        self.assertEqual(response.data["prices"], {"A": "80.00", "B": "30.00"})
+
+    def test_reservation_is_priced(self):
+        response = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "performance": self.premiere.id},
+                    {"row": 2, "seat": 5, "performance": self.premiere.id},
+                    {"row": 2, "seat": 1, "performance": self.performance.id},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["total"], "140.00")
+        self.assertEqual(
+            [ticket["price"] for ticket in response.data["tickets"]],
+            ["80.00", "30.00", "30.00"],
+        )
+        self.assertEqual(
+            Reservation.objects.get(id=response.data["id"]).total,
+            Decimal("140.00"),
+        )
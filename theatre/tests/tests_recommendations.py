@@ -0,0 +1,143 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.booking import create_reservation
+from theatre.models import (
+    Actor,
+    Genre,
+    Play,
+    Performance,
+    TheatreHall,
+    Ticket,
+)
+from theatre.recommendations import (
+    compute_similar,
+    rebuild_similar_plays,
+    recent_buyers,
+)
+
+PLAY_URL = "/api/theatre/plays/"
+
+
+class SimilarPlaysTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        tragedy = Genre.objects.create(name="Tragedy")
+        self.comedy = Genre.objects.create(name="Comedy")
+        actor = Actor.objects.create(first_name="Ivan", last_name="Franko")
+        self.hamlet, self.macbeth, self.lear, self.farce = (
+            Play.objects.create(title=title, description="Play")
+            for title in ("Hamlet", "Macbeth", "King Lear", "Farce")
+        )
+        for play in (self.hamlet, self.macbeth, self.lear):
+            play.genres.add(tragedy)
+        for play in (self.hamlet, self.macbeth):
+            play.actors.add(actor)
+        self.farce.genres.add(self.comedy)
+
+        hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+        create_reservation(
+            user=self.user,
+            tickets=[
+                Ticket(
+                    performance=Performance.objects.create(
+                        play=play,
+                        theatre_hall=hall,
+                        show_time=f"2099-06-0{day}T19:00:00",
+                    ),
+                    row=1,
+                    seat=1,
+                )
+                for day, play in ((1, self.hamlet), (2, self.farce))
+            ],
+        )
+        rebuild_similar_plays()
+
+    def _similar(self, play):
+        return self.client.get(f"{PLAY_URL}{play.id}/similar/")
+
+    def test_similar_plays_are_ranked(self):
+        response = self._similar(self.hamlet)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [play["id"] for play in response.data],
+            [self.macbeth.id, self.farce.id, self.lear.id],
+        )
+        scores = [play["score"] for play in response.data]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_lookup_is_served_from_memory(self):
+        self._similar(self.hamlet)
+
+        # The throttle counters and the similar plays themselves
+        with self.assertNumQueries(2):
+            self._similar(self.macbeth)
+
+    def test_rebuild_only_rewrites_changed_lists(self):
+        self.assertEqual(rebuild_similar_plays(), [])
+        call_command("rebuild_similar_plays", "--check", stdout=StringIO())
+
+        self.lear.genres.add(self.comedy)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_similar_plays", "--check", stdout=StringIO())
+
+        self.assertIn(self.lear.id, rebuild_similar_plays())
+        self.assertIn(
+            self.lear.id,
+            [play["id"] for play in self._similar(self.farce).data],
+        )
+
+    def test_unknown_play(self):
+        response = self.client.get(f"{PLAY_URL}999/similar/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_common_features_are_skipped_with_a_warning(self):
+        # Tragedy is shared by three plays, the actor and the buyer by two
+        with mock.patch("theatre.recommendations.MAX_POSTINGS", 2):
+            with self.assertLogs("theatre.recommendations", "WARNING") as logs:
+                similar = compute_similar()
+            output = StringIO()
+            call_command("rebuild_similar_plays", stdout=output)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("1 genre features", output.getvalue())
+        self.assertIn("1 genre features", logs.output[0])
+        self.assertNotIn(
+            self.lear.id, [other for other, _ in similar[self.hamlet.id]]
+        )
+
+    def test_only_recent_buyers_are_features(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="testPassword"
+        )
+        create_reservation(
+            user=other,
+            tickets=[
+                Ticket(
+                    performance=Performance.objects.get(play=self.hamlet),
+                    row=1,
+                    seat=2,
+                )
+            ],
+        )
+
+        self.assertEqual(recent_buyers(limit=1)[self.hamlet.id], [other.id])
+        self.assertEqual(
+            sorted(recent_buyers()[self.hamlet.id]),
+            [self.user.id, other.id],
+        )
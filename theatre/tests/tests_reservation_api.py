@@ -33,7 +33,7 @@ class ReservationViewSetTests(APITestCase):
         theatre_hall = TheatreHall.objects.create(
             name="Piccolo Teatro di Milano", rows=40, seats_in_row=50
         )
-        show_time = "2024-06-08T19:00:00"
+        show_time = "2099-06-08T19:00:00"
         self.performance = Performance.objects.create(
             play_id=play.id,
             theatre_hall_id=theatre_hall.id,
@@ -65,3 +65,31 @@ class ReservationViewSetTests(APITestCase):
         self.assertIn("created_at", response.data)
         self.assertEqual(created_reservation.user, self.user)
         self.assertEqual(created_reservation.tickets.count(), 2)
+
+    def test_list_reservations_nests_performance_listing(self):
+        self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "performance": self.performance.id}
+                ]
+            },
+            format="json",
+        )
+
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        reservation = next(
+            reservation
+            for reservation in response.data["results"]
+            if reservation["tickets"]
+        )
+        performance = reservation["tickets"][0]["performance"]
+        self.assertEqual(performance["id"], self.performance.id)
+        self.assertEqual(performance["play_title"], "\tHamlet")
+        self.assertEqual(
+            performance["theatre_hall_name"], "Piccolo Teatro di Milano"
+        )
+        self.assertEqual(performance["theatre_hall_capacity"], 2000)
+        self.assertEqual(performance["tickets_available"], 1999)
@@ -0,0 +1,175 @@
+from datetime import date, datetime, time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.models import (
+    Play,
+    Performance,
+    PerformanceListing,
+    PlayDailyStats,
+    TheatreHall,
+)
+from theatre.scheduling import expand_rule, find_conflicts
+
+PERFORMANCE_URL = "/api/theatre/performances/"
+SCHEDULE_URL = "/api/theatre/performances/schedule/"
+
+
+class SchedulingTests(APITestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@admin.com", password="adminPassword"
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.play = Play.objects.create(
+            title="Hamlet",
+            description="Based on the novel by William Shakespeare",
+            duration=150,
+        )
+        self.hall = TheatreHall.objects.create(
+            name="Piccolo Teatro di Milano", rows=10, seats_in_row=10
+        )
+
+    def _rule(self, **params):
+        rule = {
+            "play": self.play.id,
+            "theatre_hall": self.hall.id,
+            "weekdays": [1, 2, 3, 4, 5, 6],
+            "times": ["19:00"],
+            "start_date": "2024-03-01",
+            "end_date": "2024-06-30",
+        }
+        rule.update(params)
+        return rule
+
+    def test_expand_rule(self):
+        performances = expand_rule(
+            self.play,
+            self.hall,
+            weekdays=[5, 6],
+            times=[time(19), time(12)],
+            start_date=date(2024, 6, 1),
+            end_date=date(2024, 6, 9),
+        )
+
+        self.assertEqual(
+            [performance.show_time for performance in performances],
+            [
+                datetime(2024, 6, 1, 12),
+                datetime(2024, 6, 1, 19),
+                datetime(2024, 6, 2, 12),
+                datetime(2024, 6, 2, 19),
+                datetime(2024, 6, 8, 12),
+                datetime(2024, 6, 8, 19),
+                datetime(2024, 6, 9, 12),
+                datetime(2024, 6, 9, 19),
+            ],
+        )
+
+    def test_find_conflicts(self):
+        long_stored = Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2024-06-01T10:00:00",
+        )
+        Performance.objects.create(
+            play=Play.objects.create(title="Short", description="", duration=30),
+            theatre_hall=self.hall,
+            show_time="2024-06-01T10:30:00",
+        )
+
+        def proposed(hour, minute=0):
+            return Performance(
+                play=self.play,
+                theatre_hall=self.hall,
+                show_time=datetime(2024, 6, 1, hour, minute),
+            )
+
+        free = proposed(13)
+        overlapping = proposed(12)
+        touching = proposed(17, 30)
+        conflicts = find_conflicts([free, touching, overlapping])
+
+        self.assertEqual(
+            [(c.performance, c.other) for c in conflicts],
+            [(overlapping, long_stored), (free, overlapping)],
+        )
+
+    def test_schedule_season(self):
+        response = self.client.post(
+            SCHEDULE_URL, {"rules": [self._rule()]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Tue-Sun between March and June 2024
+        self.assertEqual(len(response.data["performances"]), 105)
+        self.assertEqual(Performance.objects.count(), 105)
+        self.assertEqual(PerformanceListing.objects.count(), 105)
+        self.assertEqual(
+            PlayDailyStats.objects.get(date="2024-03-01").seats_offered, 100
+        )
+        call_command("rebuild_listing", "--check", stdout=StringIO())
+        call_command("rebuild_analytics", "--check", stdout=StringIO())
+
+    def test_schedule_rejects_overlaps(self):
+        stored = Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2024-03-05T18:00:00",
+        )
+
+        response = self.client.post(
+            SCHEDULE_URL, {"rules": [self._rule()]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data[0]["overlaps"], stored.id)
+        self.assertEqual(response.data[0]["show_time"], "2024-03-05T19:00:00")
+        self.assertEqual(Performance.objects.count(), 1)
+
+    def test_schedule_dry_run(self):
+        response = self.client.post(
+            SCHEDULE_URL,
+            {"rules": [self._rule(times=["12:00", "13:00"])], "dry_run": True},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIsNone(response.data[0]["overlaps"])
+        self.assertFalse(Performance.objects.exists())
+
+    def test_schedule_is_admin_only(self):
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="test@test.com", password="testPassword"
+            )
+        )
+
+        response = self.client.post(
+            SCHEDULE_URL, {"rules": [self._rule()]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_rejects_overlap(self):
+        Performance.objects.create(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time="2024-06-08T19:00:00",
+        )
+
+        response = self.client.post(
+            PERFORMANCE_URL,
+            {
+                "play": self.play.id,
+                "theatre_hall": self.hall.id,
+                "show_time": "2024-06-08T21:00:00",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("show_time", response.data)
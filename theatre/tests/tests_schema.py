@@ -0,0 +1,40 @@
+import gzip
+
+from django.test import SimpleTestCase
+
+from config.schema import SCHEMA_PATH, generate_schema
+
+SCHEMA_URL = "/api/schema/"
+
+
+class PrebuiltSchemaTests(SimpleTestCase):
+    def test_committed_schema_is_up_to_date(self):
+        self.assertEqual(
+            SCHEMA_PATH.read_bytes(),
+            generate_schema(),
+            msg="Run `python manage.py build_schema` and commit the result",
+        )
+
+    def test_schema_is_served_gzipped_with_etag(self):
+        response = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(
+            gzip.decompress(response.content), SCHEMA_PATH.read_bytes()
+        )
+
+    def test_schema_is_served_plain(self):
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, SCHEMA_PATH.read_bytes())
+
+    def test_not_modified_for_matching_etag(self):
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        response = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
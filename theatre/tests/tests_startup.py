@@ -0,0 +1,119 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from theatre import startup
+from theatre.models import Genre, Performance, Play, TheatreHall
+from theatre.pricing import get_prices
+
+
+class WaitForDbTests(TestCase):
+    def test_wait_for_db_ready(self):
+        out = StringIO()
+
+        call_command("wait_for_db", "--warm-up", stdout=out)
+
+        self.assertIn("Database available!", out.getvalue())
+        self.assertIn("Warm-up complete", out.getvalue())
+
+    @mock.patch("theatre.startup.time.sleep")
+    def test_wait_for_db_retries_with_backoff(self, patched_sleep):
+        with mock.patch(
+            "django.db.backends.base.base.BaseDatabaseWrapper"
+            ".ensure_connection",
+            side_effect=[OperationalError] * 3 + [None] * 2,
+        ):
+            self.assertTrue(startup.wait_for_database(timeout=10))
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.25, 0.5, 1.0])
+
+    @mock.patch("theatre.startup.time.sleep")
+    def test_wait_for_db_times_out(self, patched_sleep):
+        with mock.patch(
+            "django.db.backends.base.base.BaseDatabaseWrapper"
+            ".ensure_connection",
+            side_effect=OperationalError,
+        ), mock.patch(
+            "theatre.startup.time.monotonic", side_effect=[0, 1, 2, 100]
+        ):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "wait_for_db", "--timeout", "5", stdout=StringIO()
+                )
+
+
+class ProbeTests(TestCase):
+    def tearDown(self):
+        startup._ready = False
+        startup._last_attempt = 0.0
+
+    def test_healthz(self):
+        response = self.client.get("/healthz/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def test_readyz_warms_up_on_first_probe(self):
+        startup._ready = False
+
+        response = self.client.get("/readyz/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(startup.is_ready())
+
+    def test_readyz_not_ready_when_warm_up_fails(self):
+        startup._ready = False
+        failing_task = mock.Mock(side_effect=Exception, __name__="failing")
+        with mock.patch.object(startup, "_warmup_tasks", [failing_task]):
+            response = self.client.get("/readyz/")
+            second_response = self.client.get("/readyz/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(second_response.status_code, 503)
+        failing_task.assert_called_once()
+        self.assertFalse(startup.is_ready())
+
+
+class WarmupTaskTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Genre.objects.create(name="Drama")
+
+    @override_settings(CATALOGUE_WARMUP_URLS=["http://testserver"])
+    def test_catalogue_lists_are_cached(self):
+        startup.prime_catalogue_cache()
+
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com", password="testPassword"
+            )
+        )
+        # Only the throttle counters
+        with self.assertNumQueries(1):
+            response = client.get("/api/theatre/genres/")
+        self.assertEqual(
+            [genre["name"] for genre in response.json()["results"]],
+            ["Drama"],
+        )
+
+    def test_seat_prices_are_cached(self):
+        performance = Performance.objects.create(
+            play=Play.objects.create(title="Hamlet", description="Tragedy"),
+            theatre_hall=TheatreHall.objects.create(
+                name="Globe", rows=2, seats_in_row=3
+            ),
+            show_time="2099-06-01T19:00:00",
+        )
+
+        startup.prime_listing_caches()
+
+        with self.assertNumQueries(0):
+            get_prices([performance])
@@ -0,0 +1,130 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from theatre.models import ThrottleCounter
+from theatre.throttling import (
+    UserSlidingWindowThrottle,
+    ScopedSlidingWindowThrottle,
+)
+
+GENRE_URL = "/api/theatre/genres/"
+
+
+class FakeView:
+    throttle_scope = "catalogue"
+
+
+class SlidingWindowThrottleTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.request = APIRequestFactory().get(GENRE_URL)
+        self.request.user = self.user
+
+    def _throttle(self, now, rate="3/min"):
+        throttle = UserSlidingWindowThrottle()
+        throttle.rate = rate
+        throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+        throttle.timer = lambda: now
+        return throttle
+
+    def test_blocks_after_limit_within_window(self):
+        for _ in range(3):
+            self.assertTrue(
+                self._throttle(600).allow_request(self.request, None)
+            )
+
+        throttle = self._throttle(610)
+        self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertEqual(throttle.wait(), 50)
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self._throttle(630).allow_request(self.request, None)
+
+        # 15s into the next window 75% of the previous hits still count
+        throttle = self._throttle(675)
+        self.assertFalse(throttle.allow_request(self.request, None))
+
+        # 50s into the next window only 1/6 of them still count
+        throttle = self._throttle(710)
+        self.assertTrue(throttle.allow_request(self.request, None))
+
+    def test_one_row_per_key(self):
+        for now in (600, 660, 720, 780):
+            self._throttle(now).allow_request(self.request, None)
+
+        counter = ThrottleCounter.objects.get()
+        self.assertEqual(counter.key, f"throttle_user_{self.user.pk}")
+        self.assertEqual(counter.hits, 1)
+        self.assertEqual(counter.previous_hits, 1)
+
+    def test_scoped_throttle_uses_view_scope(self):
+        throttle = ScopedSlidingWindowThrottle()
+        with mock.patch.object(
+            ScopedSlidingWindowThrottle,
+            "THROTTLE_RATES",
+            {"catalogue": "1/min"},
+        ):
+            self.assertTrue(throttle.allow_request(self.request, FakeView()))
+            self.assertFalse(throttle.allow_request(self.request, FakeView()))
+
+        self.assertTrue(
+            ThrottleCounter.objects.filter(
+                key=f"throttle_catalogue_{self.user.pk}"
+            ).exists()
+        )
+
+    def test_api_returns_429_when_throttled(self):
+        self.client.force_authenticate(user=self.user)
+
+        with mock.patch.object(
+            ScopedSlidingWindowThrottle,
+            "THROTTLE_RATES",
+            {"catalogue": "2/hour"},
+        ):
+            responses = [self.client.get(GENRE_URL) for _ in range(3)]
+
+        self.assertEqual(responses[1].status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            responses[2].status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    def test_one_upsert_for_all_throttles_of_a_request(self):
+        self.client.force_authenticate(user=self.user)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(GENRE_URL)
+
+        throttle_queries = [
+            query["sql"]
+            for query in captured.captured_queries
+            if "theatre_throttlecounter" in query["sql"]
+        ]
+        self.assertEqual(len(throttle_queries), 1)
+        self.assertEqual(
+            set(ThrottleCounter.objects.values_list("key", "hits")),
+            {
+                (f"throttle_user_{self.user.pk}", 1),
+                (f"throttle_catalogue_{self.user.pk}", 1),
+            },
+        )
+
+    def test_user_quota_applies_with_scope(self):
+        self.client.force_authenticate(user=self.user)
+
+        with mock.patch.object(
+            UserSlidingWindowThrottle, "rate", "2/hour", create=True
+        ):
+            responses = [self.client.get(GENRE_URL) for _ in range(3)]
+
+        self.assertEqual(
+            responses[2].status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertIn("Retry-After", responses[2])
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.models import (
+    Play,
+    Performance,
+    Reservation,
+    SeatHold,
+    TheatreHall,
+    Ticket,
+    WaitlistEntry,
+)
+from theatre.waitlist import match_waitlist
+
+WAITLIST_URL = "/api/theatre/waitlist/"
+RESERVATION_URL = "/api/theatre/reservations/"
+PERFORMANCE_URL = "/api/theatre/performances/"
+
+Status = WaitlistEntry.Status
+
+
+class WaitlistTests(APITestCase):
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user(
+            email="owner@test.com", password="testPassword"
+        )
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{index}@test.com", password="testPassword"
+            )
+            for index in range(3)
+        ]
+        self.performance = Performance.objects.create(
+            play=Play.objects.create(title="Hamlet", description="Tragedy"),
+            theatre_hall=TheatreHall.objects.create(
+                name="Box", rows=1, seats_in_row=4
+            ),
+            show_time=datetime.now() + timedelta(days=7),
+        )
+        self.client.force_authenticate(user=self.owner)
+        self.reservation_id = self._book([1, 2, 3, 4]).data["id"]
+
+    def _book(self, seats):
+        return self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": 1,
+                        "seat": seat,
+                        "performance": self.performance.id,
+                    }
+                    for seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def _join(self, user, party_size):
+        self.client.force_authenticate(user=user)
+        return self.client.post(
+            WAITLIST_URL,
+            {"performance": self.performance.id, "party_size": party_size},
+        )
+
+    def _release(self, *seats):
+        self.client.force_authenticate(user=self.owner)
+        tickets = Ticket.objects.filter(seat__in=seats).values_list(
+            "id", flat=True
+        )
+        self.client.post(
+            f"{RESERVATION_URL}{self.reservation_id}/cancel/",
+            {"tickets": list(tickets)},
+            format="json",
+        )
+
+    def test_join_only_when_sold_out(self):
+        self._release(1, 2)
+
+        self.assertEqual(
+            self._join(self.users[0], 2).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self._join(self.users[0], 3).status_code, status.HTTP_201_CREATED
+        )
+        self.assertEqual(
+            self._join(self.users[0], 3).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_held_seats_do_not_count_as_available(self):
+        self._join(self.users[0], 2)
+        self._release(1, 2)
+        match_waitlist()
+
+        self.assertEqual(
+            self._join(self.users[1], 1).status_code, status.HTTP_201_CREATED
+        )
+
+    def test_listing_does_not_count_held_seats(self):
+        self._join(self.users[0], 2)
+        self._release(1, 2, 3)
+        match_waitlist()
+
+        response = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(response.data["results"][0]["tickets_available"], 1)
+
+    def test_offers_follow_queue_order(self):
+        for user, party_size in zip(self.users, (2, 2, 1)):
+            self.assertEqual(
+                self._join(user, party_size).status_code,
+                status.HTTP_201_CREATED,
+            )
+        self._release(1, 2, 3)
+
+        self.assertEqual(match_waitlist(), (0, 1))
+
+        entries = list(WaitlistEntry.objects.order_by("id"))
+        # The third user fits into the last seat but must not jump
+        # the second one
+        self.assertEqual(
+            [entry.status for entry in entries],
+            [Status.OFFERED, Status.WAITING, Status.WAITING],
+        )
+        self.assertEqual(
+            list(entries[0].holds.values_list("row", "seat")),
+            [(1, 1), (1, 2)],
+        )
+
+        # Held seats can not be booked by anybody else
+        self.client.force_authenticate(user=self.users[2])
+        response = self._book([1])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["conflicts"][0]["reason"], "held")
+
+    def test_accept_offer(self):
+        self._join(self.users[0], 2)
+        self._release(3, 4)
+        call_command("match_waitlist", stdout=StringIO())
+        entry = WaitlistEntry.objects.get()
+        self.client.force_authenticate(user=self.users[0])
+
+        response = self.client.post(f"{WAITLIST_URL}{entry.id}/accept/")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, Status.BOOKED)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(
+            Reservation.objects.get(user=self.users[0]).tickets.count(), 2
+        )
+
+    def test_expired_offer_moves_on(self):
+        self._join(self.users[0], 1)
+        self._join(self.users[1], 1)
+        self._release(4)
+        match_waitlist()
+
+        later = datetime.now() + timedelta(hours=1)
+        self.assertEqual(match_waitlist(now=later), (1, 1))
+        self.assertEqual(
+            WaitlistEntry.objects.get(user=self.users[1]).status,
+            Status.OFFERED,
+        )
+
+        self.client.force_authenticate(user=self.users[0])
+        entry = WaitlistEntry.objects.get(user=self.users[0])
+        response = self.client.post(f"{WAITLIST_URL}{entry.id}/accept/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_booking_held_seats_directly_fulfils_the_offer(self):
+        self._join(self.users[0], 2)
+        self._release(3, 4)
+        match_waitlist()
+        self.client.force_authenticate(user=self.users[0])
+
+        response = self._book([3, 4])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(WaitlistEntry.objects.get().status, Status.BOOKED)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_cancelled_performance_closes_the_waitlist(self):
+        self._join(self.users[0], 2)
+        self._join(self.users[1], 1)
+        self._release(4)
+        match_waitlist()
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_superuser(
+                email="admin@test.com", password="testPassword"
+            )
+        )
+
+        response = self.client.post(
+            f"{PERFORMANCE_URL}{self.performance.id}/cancel-tickets/"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(match_waitlist(), (0, 0))
+        self.assertEqual(
+            set(WaitlistEntry.objects.values_list("status", flat=True)),
+            {Status.CANCELLED},
+        )
+        self.assertFalse(SeatHold.objects.exists())
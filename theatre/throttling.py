@@ -0,0 +1,202 @@
+from django.db import connection
+from rest_framework.throttling import (
+    BaseThrottle,
+    SimpleRateThrottle,
+    AnonRateThrottle,
+    UserRateThrottle,
+    ScopedRateThrottle,
+)
+
+from theatre.models import ThrottleCounter
+
+
+def hit_counters(counters):
+    """
+    Count a hit for every `(key, window, expires_at)` with one upsert,
+    rolling their windows over when needed. Returns
+    `{key: (hits, previous_hits)}`
+    """
+
+    quote = connection.ops.quote_name
+    rows = ", ".join(["(%s, %s, 1, 0, %s)"] * len(counters))
+    sql = f"""
+        INSERT INTO {quote(ThrottleCounter._meta.db_table)} AS counter
+            (key, window_start, hits, previous_hits, expires_at)
+        VALUES {rows}
+        ON CONFLICT (key) DO UPDATE SET
+            previous_hits = CASE
+                WHEN counter.window_start = EXCLUDED.window_start
+                    THEN counter.previous_hits
+                WHEN counter.window_start = EXCLUDED.window_start - 1
+                    THEN counter.hits
+                ELSE 0
+            END,
+            hits = CASE
+                WHEN counter.window_start = EXCLUDED.window_start
+                    THEN counter.hits + 1
+                ELSE 1
+            END,
+            window_start = EXCLUDED.window_start,
+            expires_at = EXCLUDED.expires_at
+        RETURNING key, hits, previous_hits
+    """
+    params = [
+        value
+        for key, window, expires_at in counters
+        for value in (key, window, int(expires_at))
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {
+            key: (hits, previous_hits)
+            for key, hits, previous_hits in cursor.fetchall()
+        }
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter throttle backed by the `ThrottleCounter` table.
+
+    Each key keeps the hits of the current and the previous fixed window.
+    The request rate is estimated as the current hits plus the previous
+    hits weighted by the part of the previous window that still overlaps
+    the sliding window. Memory is constant per key and the hits are counted
+    with an atomic upsert, which also makes the limits shared across
+    workers. `SlidingWindowThrottle` counts the keys of all throttles of a
+    request with one upsert.
+    Rejected requests are counted too, so clients that keep hammering
+    stay throttled.
+    """
+
+    def allow_request(self, request, view):
+        if not self.prepare(request, view):
+            return True
+
+        window, expires_at = self.window()
+        self.record(*self.hit(self.key, window, expires_at))
+        return self.check()
+
+    def prepare(self, request, view):
+        """
+        Resolve the rate and the key of the request, False when the
+        request is not limited by this throttle
+        """
+
+        if self.rate is None:
+            return False
+        self.key = self.get_cache_key(request, view)
+        return self.key is not None
+
+    def window(self):
+        """
+        The current fixed window and the expiry of its counter
+        """
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        return window, (window + 2) * self.duration
+
+    def record(self, hits, previous_hits):
+        self.hits, self.previous_hits = hits, previous_hits
+        self.elapsed = (self.now % self.duration) / self.duration
+
+    def check(self):
+        if self.estimate(self.elapsed) > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def estimate(self, elapsed):
+        return self.hits + self.previous_hits * (1 - elapsed)
+
+    @staticmethod
+    def hit(key, window, expires_at):
+        """
+        Count a hit for the key and roll its windows over when needed.
+        Returns the hits of the current and of the previous window
+        """
+
+        return hit_counters([(key, window, expires_at)])[key]
+
+    def wait(self):
+        """
+        Returns the seconds until the estimated rate drops under the limit
+        """
+
+        if self.hits > self.num_requests:
+            return (1 - self.elapsed) * self.duration
+
+        # Time until the previous window's weight decays far enough
+        needed = 1 - (self.num_requests - self.hits) / self.previous_hits
+        return max(0.0, (needed - self.elapsed) * self.duration)
+
+
+class AnonSlidingWindowThrottle(AnonRateThrottle, SlidingWindowRateThrottle):
+    """
+    Limits anonymous requests by IP address, see `AnonRateThrottle`
+    """
+
+
+class UserSlidingWindowThrottle(UserRateThrottle, SlidingWindowRateThrottle):
+    """
+    Limits requests per user, see `UserRateThrottle`
+    """
+
+
+class ScopedSlidingWindowThrottle(
+    ScopedRateThrottle, SlidingWindowRateThrottle
+):
+    """
+    Limits requests per user and `throttle_scope` of the view,
+    so parts of the API can have different quotas
+    """
+
+    def prepare(self, request, view):
+        # The rate depends on the view, see `ScopedRateThrottle`
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return False
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().prepare(request, view)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Applies every throttle of `throttles` that limits the request, with
+    one upsert counting the hits of all their keys, so a request costs
+    a single round trip however many quotas it is subject to
+    """
+
+    throttles = (
+        AnonSlidingWindowThrottle,
+        UserSlidingWindowThrottle,
+        ScopedSlidingWindowThrottle,
+    )
+
+    def allow_request(self, request, view):
+        throttles = [throttle_class() for throttle_class in self.throttles]
+        self.applied = [
+            throttle
+            for throttle in throttles
+            if throttle.prepare(request, view)
+        ]
+        if not self.applied:
+            return True
+
+        counters = {}
+        for throttle in self.applied:
+            window, expires_at = throttle.window()
+            counters.setdefault(throttle.key, (window, expires_at))
+        hits = hit_counters(
+            [(key, *window) for key, window in counters.items()]
+        )
+
+        self.failed = []
+        for throttle in self.applied:
+            throttle.record(*hits[throttle.key])
+            if not throttle.check():
+                self.failed.append(throttle)
+        return not self.failed
+
+    def wait(self):
+        return max(throttle.wait() for throttle in self.failed)
@@ -8,6 +8,9 @@ from theatre.views import (
     TheatreHallViewSet,
     PerformanceViewSet,
     ReservationViewSet,
+    AnalyticsViewSet,
+    CheckInViewSet,
+    WaitlistViewSet,
 )
 
 app_name = "theatre"
@@ -19,5 +22,8 @@ router.register("plays", PlayViewSet)
 router.register("theatrehalls", TheatreHallViewSet)
 router.register("performances", PerformanceViewSet)
 router.register("reservations", ReservationViewSet)
+router.register("waitlist", WaitlistViewSet, basename="waitlist")
+router.register("checkin", CheckInViewSet, basename="checkin")
+router.register("analytics", AnalyticsViewSet, basename="analytics")
 
 urlpatterns = [path("", include(router.urls)), ]
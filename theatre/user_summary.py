@@ -0,0 +1,122 @@
+"""
+Reservation summary of a user profile.
+
+`UserPerformanceTickets` counts the tickets each user holds for each
+performance. Bookings and cancellations adjust the rows inside their own
+transaction and archiving keeps them, like the sales counters, so the
+summary reads a handful of rows of one user instead of walking their
+reservations and tickets. Whether a performance is upcoming or past is
+decided when reading, from its current show time.
+`rebuild_user_summary` recomputes the counters from the sales.
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.dispatch import receiver
+
+from theatre.analytics import increment_counters
+from theatre.models import ArchivedTicket, Ticket, UserPerformanceTickets
+from theatre.signals import tickets_booked, tickets_released
+
+NEXT_PERFORMANCE_FIELDS = {
+    "id": "performance_id",
+    "play_title": "performance__play__title",
+    "theatre_hall_name": "performance__theatre_hall__name",
+    "show_time": "performance__show_time",
+    "tickets": "tickets",
+}
+
+
+def record_tickets(tickets, sign):
+    deltas = Counter(
+        (ticket.reservation.user_id, ticket.performance_id)
+        for ticket in tickets
+    )
+    for (user_id, performance_id), count in sorted(deltas.items()):
+        increment_counters(
+            UserPerformanceTickets,
+            {"user_id": user_id, "performance_id": performance_id},
+            {"tickets": sign * count},
+        )
+
+
+@receiver(tickets_booked)
+def on_tickets_booked(sender, tickets, **kwargs):
+    record_tickets(tickets, 1)
+
+
+@receiver(tickets_released)
+def on_tickets_released(sender, tickets, **kwargs):
+    record_tickets(tickets, -1)
+
+
+def compute_counters():
+    """
+    `{(user_id, performance_id): tickets}` from the sales
+    """
+
+    counters = Counter()
+    for model in (Ticket, ArchivedTicket):
+        rows = (
+            model.objects
+            .values_list("reservation__user_id", "performance_id")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for user_id, performance_id, count in rows.iterator():
+            counters[(user_id, performance_id)] += count
+    return dict(counters)
+
+
+def stored_counters():
+    return {
+        (user_id, performance_id): tickets
+        for user_id, performance_id, tickets in UserPerformanceTickets
+        .objects
+        .exclude(tickets=0)
+        .values_list("user_id", "performance_id", "tickets")
+    }
+
+
+def rebuild_user_summary():
+    counters = compute_counters()
+    with transaction.atomic():
+        UserPerformanceTickets.objects.all().delete()
+        UserPerformanceTickets.objects.bulk_create(
+            UserPerformanceTickets(
+                user_id=user_id, performance_id=performance_id, tickets=count
+            )
+            for (user_id, performance_id), count in counters.items()
+        )
+    return len(counters)
+
+
+def reservation_summary(user, now=None):
+    """
+    Counts of the upcoming and past performances `user` holds tickets
+    for, and the next of them
+    """
+
+    now = now or datetime.now()
+    held = UserPerformanceTickets.objects.filter(user=user, tickets__gt=0)
+    upcoming = Q(performance__show_time__gte=now)
+    summary = held.aggregate(
+        upcoming=Count("id", filter=upcoming),
+        past=Count("id", filter=~upcoming),
+    )
+
+    row = None
+    if summary["upcoming"]:
+        row = (
+            held
+            .filter(upcoming)
+            .order_by("performance__show_time", "performance_id")
+            .values_list(*NEXT_PERFORMANCE_FIELDS.values())
+            .first()
+        )
+    summary["next_performance"] = (
+        dict(zip(NEXT_PERFORMANCE_FIELDS, row)) if row else None
+    )
+    return summary
@@ -1,22 +1,36 @@
-from datetime import datetime
+import csv
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import chain
 
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.db.models import Count, F
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status, mixins
+from rest_framework import generics, viewsets, status, mixins
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from theatre.archive import EXPORT_COLUMNS, export_rows
+from theatre.batch import run_batch
+from theatre.catalogue_cache import CachedListMixin
 from theatre.models import (
+    ArchivedTicket,
     Genre,
     Actor,
     Play,
     TheatreHall,
     Performance,
     Reservation,
-    Ticket
+    Ticket,
+    PerformanceListing,
+    PlayDailyStats,
+    HallDailyStats,
+    WaitlistEntry,
 )
 from theatre.permissions import IsAdminOrIfAuthenticatedReadOnly
 from theatre.serializers import (
@@ -33,10 +47,31 @@ from theatre.serializers import (
     PerformanceListSerializer,
     PerformanceDetailSerializer,
     ReservationListSerializer,
+    PlayDailyStatsSerializer,
+    HallDailyStatsSerializer,
+    PerformanceOccupancySerializer,
+    PerformanceScheduleSerializer,
+    ScheduleConflictSerializer,
+    ReleasedTicketsSerializer,
+    ReservationCancelSerializer,
+    WaitlistEntrySerializer,
+    CheckInSerializer,
+    CheckInResultSerializer,
+    SimilarPlaySerializer,
+    PopularPlaySerializer,
+    BatchSerializer,
+    BatchResponseSerializer,
 )
+from theatre.cancellation import release_tickets
+from theatre.checkin import check_in
+from theatre.popularity import DEFAULT_WINDOW, WINDOWS, leaderboard
+from theatre.recommendations import similar_to
+from theatre.scheduling import ScheduleConflict
+from theatre.waitlist import active_holds_count, close_waitlist
 
 
 class GenreViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -44,9 +79,11 @@ class GenreViewSet(
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    throttle_scope = "catalogue"
 
 
 class ActorViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -54,9 +91,11 @@ class ActorViewSet(
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    throttle_scope = "catalogue"
 
 
 class PlayViewSet(
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -65,6 +104,7 @@ class PlayViewSet(
     queryset = Play.objects.prefetch_related("genres", "actors")
     serializer_class = PlaySerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    throttle_scope = "catalogue"
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -78,6 +118,12 @@ class PlayViewSet(
         if self.action == "upload_image":
             serializer_class = PlayImageSerializer
 
+        if self.action == "similar":
+            serializer_class = SimilarPlaySerializer
+
+        if self.action == "popular":
+            serializer_class = PopularPlaySerializer
+
         return serializer_class
 
     @staticmethod
@@ -130,6 +176,58 @@ class PlayViewSet(
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "window",
+                type=OpenApiTypes.STR,
+                enum=list(WINDOWS),
+                description=f"Sales window (default: {DEFAULT_WINDOW})",
+            ),
+        ],
+        responses=PopularPlaySerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False)
+    def popular(self, request):
+        """
+        Plays with the most tickets booked in the last day, week or month
+        """
+
+        window = request.query_params.get("window", DEFAULT_WINDOW)
+        if window not in WINDOWS:
+            raise ValidationError(
+                {"window": f"window must be one of: {', '.join(WINDOWS)}"}
+            )
+        serializer = self.get_serializer(leaderboard(window), many=True)
+        return Response(serializer.data)
+
+    @extend_schema(responses=SimilarPlaySerializer(many=True))
+    @action(methods=["GET"], detail=True)
+    def similar(self, request, pk=None):
+        """
+        Plays with similar genres, cast and audience, most similar first.
+        Served from the precomputed lists held by every worker
+        """
+
+        try:
+            play_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        similar = similar_to(play_id)
+        plays = Play.objects.only("id", "title", "image").order_by().in_bulk(
+            [play_id, *(other_id for other_id, _ in similar)]
+        )
+        if play_id not in plays:
+            raise NotFound()
+
+        results = []
+        for other_id, score in similar:
+            if other_id in plays:
+                plays[other_id].score = score
+                results.append(plays[other_id])
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -158,6 +256,7 @@ class PlayViewSet(
 
 
 class TheatreHallViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -165,6 +264,7 @@ class TheatreHallViewSet(
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    throttle_scope = "catalogue"
 
 
 class PerformanceViewSet(viewsets.ModelViewSet):
@@ -172,15 +272,12 @@ class PerformanceViewSet(viewsets.ModelViewSet):
         Performance.objects
         .select_related("play", "theatre_hall")
         .annotate(
-            tickets_available=(
-                F("theatre_hall__rows")
-                * F("theatre_hall__seats_in_row")
-                - Count("tickets")
-            )
+            tickets_available=F("theatre_hall__capacity") - Count("tickets")
         ).order_by("show_time")
     )
     serializer_class = PerformanceSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    throttle_scope = "catalogue"
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -191,6 +288,9 @@ class PerformanceViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             serializer_class = PerformanceDetailSerializer
 
+        if self.action == "schedule":
+            serializer_class = PerformanceScheduleSerializer
+
         return serializer_class
 
     def get_queryset(self):
@@ -198,10 +298,18 @@ class PerformanceViewSet(viewsets.ModelViewSet):
         play_id_str = self.request.query_params.get("play")
 
         queryset = self.queryset
+        if self.action == "list":
+            # A single-table scan of the denormalized listing, seats held
+            # for waitlist offers are unsold but not available
+            queryset = PerformanceListing.objects.annotate(
+                tickets_held=active_holds_count("performance_id")
+            )
 
         if date:
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=date)
+            date = datetime.strptime(date, "%Y-%m-%d")
+            queryset = queryset.filter(
+                show_time__gte=date, show_time__lt=date + timedelta(days=1)
+            )
 
         if play_id_str:
             queryset = queryset.filter(play_id=int(play_id_str))
@@ -232,6 +340,62 @@ class PerformanceViewSet(viewsets.ModelViewSet):
 
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(request=None, responses=ReleasedTicketsSerializer)
+    @action(
+        methods=["POST"],
+        detail=True,
+        permission_classes=[IsAdminUser],
+        url_path="cancel-tickets",
+    )
+    def cancel_tickets(self, request, pk=None):
+        """
+        Cancel every ticket of a cancelled performance in one go
+        """
+
+        performance = self.get_object()
+        with transaction.atomic():
+            # Closed first, so the matcher can not offer the released seats
+            close_waitlist(performance)
+            released = release_tickets(performance.tickets.all())
+        return Response(
+            ReleasedTicketsSerializer({"released": len(released)}).data,
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        responses={
+            status.HTTP_200_OK: PerformanceScheduleSerializer,
+            status.HTTP_201_CREATED: PerformanceScheduleSerializer,
+            status.HTTP_409_CONFLICT: ScheduleConflictSerializer(many=True),
+        }
+    )
+    @action(methods=["POST"], detail=False, permission_classes=[IsAdminUser])
+    def schedule(self, request):
+        """
+        Create a season of performances from recurrence rules in one
+        insert. Nothing is created if any performance would overlap
+        another one in its hall. With `dry_run` only the check runs
+        """
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.save()
+        except ScheduleConflict as error:
+            return Response(
+                ScheduleConflictSerializer(error.conflicts, many=True).data,
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response(
+            serializer.data,
+            status=(
+                status.HTTP_200_OK
+                if serializer.validated_data["dry_run"]
+                else status.HTTP_201_CREATED
+            ),
+        )
+
 
 class ReservationViewSet(
     mixins.ListModelMixin,
@@ -239,13 +403,14 @@ class ReservationViewSet(
     GenericViewSet,
 ):
     queryset = Reservation.objects.prefetch_related(
-        "tickets__performance__play", "tickets__performance__theatre_hall"
+        "tickets__performance__listing"
     )
     serializer_class = ReservationSerializer
     permission_classes = (IsAuthenticated,)
+    throttle_scope = "reservations"
 
     def get_queryset(self):
-        return Reservation.objects.filter(user=self.request.user)
+        return self.queryset.filter(user=self.request.user)
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -253,7 +418,341 @@ class ReservationViewSet(
         if self.action == "list":
             serializer_class = ReservationListSerializer
 
+        if self.action == "cancel":
+            serializer_class = ReservationCancelSerializer
+
         return serializer_class
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @action(methods=["POST"], detail=True)
+    def cancel(self, request, pk=None):
+        """
+        Cancel the whole reservation or only the given tickets and
+        release their seats. An emptied reservation is deleted
+        """
+
+        serializer = self.get_serializer(self.get_object(), data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class WaitlistViewSet(
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    """
+    Waitlist for sold out performances. Released seats are offered in
+    FIFO order and held for a while, accept the offer to book them
+    """
+
+    queryset = WaitlistEntry.objects.all()
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = (IsAuthenticated,)
+    throttle_scope = "reservations"
+
+    def get_queryset(self):
+        return WaitlistEntry.objects.filter(
+            user=self.request.user
+        ).prefetch_related("holds")
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(request=None, responses=ReservationSerializer)
+    @action(methods=["POST"], detail=True)
+    def accept(self, request, pk=None):
+        """
+        Book the seats offered to this entry
+        """
+
+        entry = self.get_object()
+        if (
+            entry.status != WaitlistEntry.Status.OFFERED
+            or entry.offer_expires_at <= datetime.now()
+        ):
+            return Response(
+                {"detail": "There is no open offer for this entry"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = ReservationSerializer(
+            data={
+                "tickets": [
+                    {
+                        "row": hold.row,
+                        "seat": hold.seat,
+                        "performance": entry.performance_id,
+                    }
+                    for hold in entry.holds.all()
+                ]
+            },
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        # Booking the held seats uses the holds up and books the entry
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class CheckInViewSet(GenericViewSet):
+    """
+    Door check-in for staff scanners
+    """
+
+    serializer_class = CheckInSerializer
+    permission_classes = (IsAdminUser,)
+    # Thousands of scans arrive in the minutes before a show
+    throttle_classes = ()
+
+    @extend_schema(responses=CheckInResultSerializer(many=True))
+    def create(self, request):
+        """
+        Check in signed ticket codes, a single scan or the batch of an
+        offline scanner. Tickets are admitted once, uploading the same
+        scans again only reports them as already checked in
+        """
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scans = [
+            (scan["code"], scan.get("scanned_at"))
+            for scan in serializer.validated_data["scans"]
+        ]
+        performance = serializer.validated_data.get("performance")
+        results = check_in(
+            scans, performance.id if performance else None
+        )
+        return Response(
+            CheckInResultSerializer(
+                [
+                    {
+                        "code": code,
+                        "result": result,
+                        "ticket": ticket_id,
+                        "checked_in_at": checked_in_at,
+                    }
+                    for (code, _), (result, ticket_id, checked_in_at) in zip(
+                        scans, results
+                    )
+                ],
+                many=True,
+            ).data
+        )
+
+
+class Echo:
+    """
+    File-like object handing back what is written, for streaming CSV
+    """
+
+    def write(self, value):
+        return value
+
+
+# Leading characters that make spreadsheets evaluate a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value):
+    """
+    Prefix text a spreadsheet would run as a formula with `'`, so user
+    supplied titles and names are shown as typed
+    """
+
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+ANALYTICS_PARAMETERS = [
+    OpenApiParameter(
+        "from",
+        type=OpenApiTypes.DATE,
+        description="First show date (ex. ?from=2024-06-01)",
+    ),
+    OpenApiParameter(
+        "to",
+        type=OpenApiTypes.DATE,
+        description="Last show date (ex. ?to=2024-06-30)",
+    ),
+]
+
+
+class AnalyticsViewSet(GenericViewSet):
+    """
+    Sales & occupancy analytics for staff, served from summary tables
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get_serializer_class(self):
+        if self.action == "plays":
+            return PlayDailyStatsSerializer
+
+        if self.action == "halls":
+            return HallDailyStatsSerializer
+
+        return PerformanceOccupancySerializer
+
+    def _filter_dates(self, queryset, field):
+        date_from = self.request.query_params.get("from")
+        date_to = self.request.query_params.get("to")
+
+        if date_from:
+            date_from = datetime.strptime(date_from, "%Y-%m-%d")
+            queryset = queryset.filter(**{f"{field}__gte": date_from})
+
+        if date_to:
+            date_to = datetime.strptime(date_to, "%Y-%m-%d")
+            queryset = queryset.filter(
+                **{f"{field}__lt": date_to + timedelta(days=1)}
+            )
+
+        return queryset
+
+    def _paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=ANALYTICS_PARAMETERS + [
+            OpenApiParameter(
+                "play",
+                type=OpenApiTypes.INT,
+                description="Filter by play id (ex. ?play=2)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def plays(self, request):
+        """
+        Daily tickets sold & occupancy per play
+        """
+
+        queryset = self._filter_dates(
+            PlayDailyStats.objects.select_related("play"), "date"
+        )
+        play_id_str = request.query_params.get("play")
+        if play_id_str:
+            queryset = queryset.filter(play_id=int(play_id_str))
+
+        return self._paginated_response(queryset.order_by("date", "play_id"))
+
+    @extend_schema(
+        parameters=ANALYTICS_PARAMETERS + [
+            OpenApiParameter(
+                "theatre_hall",
+                type=OpenApiTypes.INT,
+                description="Filter by theatre hall id (ex. ?theatre_hall=2)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def halls(self, request):
+        """
+        Daily tickets sold & occupancy per theatre hall
+        """
+
+        queryset = self._filter_dates(
+            HallDailyStats.objects.select_related("theatre_hall"), "date"
+        )
+        hall_id_str = request.query_params.get("theatre_hall")
+        if hall_id_str:
+            queryset = queryset.filter(theatre_hall_id=int(hall_id_str))
+
+        return self._paginated_response(
+            queryset.order_by("date", "theatre_hall_id")
+        )
+
+    @extend_schema(parameters=ANALYTICS_PARAMETERS)
+    @action(methods=["GET"], detail=False)
+    def performances(self, request):
+        """
+        Tickets sold & occupancy per performance. Only the requested page
+        is aggregated, so the cost does not grow with history
+        """
+
+        queryset = self._filter_dates(
+            Performance.objects.select_related("play", "theatre_hall"),
+            "show_time",
+        ).order_by("show_time", "id")
+        page = self.paginate_queryset(queryset)
+        tickets_sold = Counter()
+        for model in (Ticket, ArchivedTicket):
+            tickets_sold.update(
+                dict(
+                    model.objects
+                    .filter(performance__in=page)
+                    .values_list("performance_id")
+                    .annotate(count=Count("id"))
+                    .order_by()
+                )
+            )
+        for performance in page:
+            performance.tickets_sold = tickets_sold[performance.id]
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=ANALYTICS_PARAMETERS,
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(methods=["GET"], detail=False)
+    def export(self, request):
+        """
+        Sold tickets of the performances in the date range as CSV,
+        archived sales included
+        """
+
+        performances = self._filter_dates(
+            Performance.objects.all(), "show_time"
+        )
+        writer = csv.writer(Echo())
+        rows = chain([EXPORT_COLUMNS], export_rows(performances))
+        response = StreamingHttpResponse(
+            (writer.writerow(map(csv_cell, row)) for row in rows),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = 'attachment; filename="sales.csv"'
+        return response
+
+
+class BatchView(generics.GenericAPIView):
+    """
+    Several read-only API requests in one round trip
+    """
+
+    serializer_class = BatchSerializer
+    # Every request of the batch is throttled by its own view
+    throttle_classes = ()
+
+    @extend_schema(responses=BatchResponseSerializer(many=True))
+    def post(self, request):
+        """
+        Run GET requests for API paths with the caller's credentials and
+        return their statuses and bodies in the order they were sent
+        """
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = run_batch(
+            request,
+            [sub["path"] for sub in serializer.validated_data["requests"]],
+            serializer.validated_data["parallel"],
+        )
+        return Response(
+            BatchResponseSerializer(
+                [
+                    {"status": status_code, "body": body}
+                    for status_code, body in results
+                ],
+                many=True,
+            ).data
+        )
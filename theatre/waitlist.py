@@ -0,0 +1,155 @@
+"""
+Waitlist for sold out performances.
+
+Users queue for a party size. `match_waitlist` (run in the background by
+the `match_waitlist` command) expires stale offers and walks the queue of
+every performance with waiting users in batches: the free seats are
+computed once per performance from its layout, tickets and active holds,
+then handed out in FIFO order and written with one bulk insert of
+`SeatHold` rows and one UPDATE of the offered entries. Booking the held
+seats, through the offer or directly, fulfils the entry, and cancelling
+every ticket of a performance closes its waitlist.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from theatre.booking import lock_performances
+from theatre.models import Performance, SeatHold, Ticket, WaitlistEntry
+
+Status = WaitlistEntry.Status
+
+
+def hold_window():
+    return timedelta(minutes=settings.WAITLIST_HOLD_MINUTES)
+
+
+def active_holds_count(performance="pk", now=None):
+    """
+    Subquery counting the unexpired holds of the outer performance
+    """
+
+    return Coalesce(
+        Subquery(
+            SeatHold.objects
+            .filter(
+                performance=OuterRef(performance),
+                expires_at__gt=now or datetime.now(),
+            )
+            .values("performance")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+def free_seats(performance, now):
+    """
+    `(row, seat)` of the free seats in layout order
+    """
+
+    taken = set(
+        Ticket.objects
+        .filter(performance=performance)
+        .values_list("row", "seat")
+    )
+    taken.update(
+        SeatHold.objects
+        .filter(performance=performance, expires_at__gt=now)
+        .values_list("row", "seat")
+    )
+    return [
+        (row, seat)
+        for row, seat, _ in performance.theatre_hall.seat_layout.seats()
+        if (row, seat) not in taken
+    ]
+
+
+def expire_offers(now):
+    with transaction.atomic():
+        SeatHold.objects.filter(expires_at__lte=now).delete()
+        return WaitlistEntry.objects.filter(
+            status=Status.OFFERED, offer_expires_at__lte=now
+        ).update(status=Status.EXPIRED)
+
+
+def close_waitlist(performance):
+    """
+    Cancel the open entries of a cancelled performance and drop their
+    holds, so its released seats are not offered. Returns the number of
+    closed entries
+    """
+
+    with transaction.atomic():
+        lock_performances([performance.pk])
+        SeatHold.objects.filter(performance=performance).delete()
+        return performance.waitlist.filter(
+            status__in=(Status.WAITING, Status.OFFERED)
+        ).update(status=Status.CANCELLED, offer_expires_at=None)
+
+
+def match_performance(performance, now, batch_size):
+    """
+    Offer free seats to the first `batch_size` waiting entries. The queue
+    stops at the first party that does not fit, so nobody is skipped.
+    Returns the number of offers
+    """
+
+    with transaction.atomic():
+        # Serializes matchers and bookings of this performance
+        lock_performances([performance.pk])
+        entries = list(
+            performance.waitlist
+            .filter(status=Status.WAITING)
+            .order_by("created_at", "id")[:batch_size]
+        )
+        seats = free_seats(performance, now)
+
+        expires_at = now + hold_window()
+        holds = []
+        offered = []
+        for entry in entries:
+            if entry.party_size > len(seats):
+                break
+            party, seats = seats[:entry.party_size], seats[entry.party_size:]
+            holds.extend(
+                SeatHold(
+                    entry=entry,
+                    performance=performance,
+                    row=row,
+                    seat=seat,
+                    expires_at=expires_at,
+                )
+                for row, seat in party
+            )
+            offered.append(entry.id)
+
+        SeatHold.objects.bulk_create(holds)
+        WaitlistEntry.objects.filter(id__in=offered).update(
+            status=Status.OFFERED, offer_expires_at=expires_at
+        )
+    return len(offered)
+
+
+def match_waitlist(batch_size=100, now=None):
+    """
+    One matcher pass. Returns `(expired, offered)` counts
+    """
+
+    now = now or datetime.now()
+    expired = expire_offers(now)
+    performances = (
+        Performance.objects
+        .filter(waitlist__status=Status.WAITING, show_time__gt=now)
+        .select_related("theatre_hall")
+        .distinct()
+    )
+    offered = sum(
+        match_performance(performance, now, batch_size)
+        for performance in performances
+    )
+    return expired, offered
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
+
+    def ready(self):
+        import user.checks  # noqa: F401
+        import user.signals  # noqa: F401
+
+        if "drf_spectacular" in settings.INSTALLED_APPS:
+            import user.schema  # noqa: F401
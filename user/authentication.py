@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from user.models import user_cache_key
+
+# Fields kept in the cache, what authentication and permissions read
+CACHED_FIELDS = ("id", "is_active", "is_staff", "is_superuser")
+
+
+def cached_fields(user) -> dict:
+    return {
+        **{field: getattr(user, field) for field in CACHED_FIELDS},
+        "password_hash": get_md5_hash_password(user.password),
+    }
+
+
+def user_from_cache(fields):
+    """
+    A user with only the cached fields loaded, any other field is
+    deferred and read from the db on first access
+    """
+
+    user_model = get_user_model()
+    names = [
+        field.attname
+        for field in user_model._meta.concrete_fields
+        if field.attname in fields
+    ]
+    return user_model.from_db(
+        router.db_for_read(user_model),
+        names,
+        [fields[name] for name in names],
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user from a short-TTL cache
+    instead of querying the db on every request. Only `CACHED_FIELDS`
+    and a digest of the password hash for the revoke check are cached.
+    Entries are dropped whenever users are saved, updated or deleted,
+    see `user.signals` and `UserQuerySet`. Workers that do not share the
+    cache backend miss the drop and serve their copy until it expires
+    after `AUTH_USER_CACHE_TIMEOUT` seconds
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        fields = cache.get(key)
+        if fields is None:
+            # Raises for missing and inactive users, so only active
+            # users end up in the cache
+            user = super().get_user(validated_token)
+            cache.set(
+                key, cached_fields(user), settings.AUTH_USER_CACHE_TIMEOUT
+            )
+            return user
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != fields["password_hash"]:
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+
+        return user_from_cache(fields)
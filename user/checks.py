@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cache invalidation, e.g. of users cached by `CachedJWTAuthentication`,
+    and version tokens, e.g. of the similar plays rebuilt by a command,
+    only reach the process that made the change unless the default cache
+    is shared between workers
+    """
+
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"The default cache {backend} is local to each process.",
+            hint=(
+                "Set REDIS_URL, otherwise other workers serve changed "
+                "users for up to AUTH_USER_CACHE_TIMEOUT seconds and miss "
+                "version tokens, e.g. of rebuilt similar plays."
+            ),
+            id="user.W001",
+        )
+    ]
@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+logger = logging.getLogger(__name__)
+
+_rejecting = ContextVar("rejecting_when_saturated", default=False)
+
+
+class HashingUnavailable(Exception):
+    """
+    The hashing pool is saturated
+    """
+
+
+@contextmanager
+def rejecting_when_saturated():
+    """
+    Hashes inside the block raise `HashingUnavailable` when the pool is
+    saturated, outside of it (admin login, management commands) they
+    wait for a slot
+    """
+
+    token = _rejecting.set(True)
+    try:
+        yield
+    finally:
+        _rejecting.reset(token)
+
+
+class HashingPool:
+    """
+    Bounded thread pool for password hashing. At most `workers` hashes
+    run at once and at most `queue_depth` more may wait, any further
+    request is rejected right away instead of piling up on the workers
+    serving other endpoints. The calling thread still blocks until its
+    hash is done: the pool bounds the CPU spent on hashing and the
+    threads waiting for it, not the time a request takes
+    """
+
+    def __init__(self, workers, queue_depth):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hashing"
+        )
+        self.slots = threading.BoundedSemaphore(workers + queue_depth)
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def run(self, func, *args, wait=False):
+        if not self.slots.acquire(blocking=wait):
+            with self.lock:
+                self.rejected += 1
+            logger.warning("Password hashing pool is saturated")
+            raise HashingUnavailable()
+
+        started = time.perf_counter()
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            self.slots.release()
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+            logger.debug("Password hashed in %.1f ms", elapsed * 1000)
+
+    def stats(self) -> dict:
+        """
+        Hash latency metrics, including time spent waiting in the queue
+        """
+
+        with self.lock:
+            return {
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "mean_ms": (
+                    self.total_seconds / self.completed * 1000
+                    if self.completed
+                    else 0.0
+                ),
+                "max_ms": self.max_seconds * 1000,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HashingPool:
+    """
+    Create the pool lazily, so every forked worker process gets its own
+    threads instead of inheriting dead ones from the parent
+    """
+
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = (
+                    settings.PASSWORD_HASHING_WORKERS or os.cpu_count() or 1
+                )
+                queue_depth = settings.PASSWORD_HASHING_QUEUE_DEPTH
+                if queue_depth is None:
+                    queue_depth = workers * 2
+                _pool = HashingPool(workers, queue_depth)
+    return _pool
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher that runs in the bounded hashing pool. `verify` goes
+    through `encode`, so sign-ups, password changes and token requests
+    are all covered, whether served by the WSGI or the ASGI application
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return get_pool().run(
+            super().encode,
+            password,
+            salt,
+            iterations,
+            wait=not _rejecting.get(),
+        )
@@ -1,9 +1,31 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 
+def user_cache_key(user_id) -> str:
+    """
+    Cache key of a user resolved by `CachedJWTAuthentication`
+    """
+
+    return f"auth:user:{user_id}"
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Drop the cached users, `update` sends no `post_save` for
+        `user.signals` to do it
+        """
+
+        user_ids = list(self.values_list("pk", flat=True))
+        updated = super().update(**kwargs)
+        cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+        return updated
+
+
 class UserManager(BaseUserManager):
     """
     Define a model manager for User model with no username field.
@@ -11,6 +33,9 @@ class UserManager(BaseUserManager):
 
     use_in_migrations = True
 
+    def get_queryset(self):
+        return UserQuerySet(self.model, using=self._db)
+
     def _create_user(self, email, password, **extra_fields):
         """
         Create and save a User with the given email and password.
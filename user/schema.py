@@ -0,0 +1,9 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Documents `CachedJWTAuthentication` as the regular JWT bearer scheme
+    """
+
+    target_class = "user.authentication.CachedJWTAuthentication"
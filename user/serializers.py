@@ -38,6 +38,46 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class NextPerformanceSerializer(serializers.Serializer):
+    id = serializers.IntegerField()  # noqa: VNE003
+    play_title = serializers.CharField()
+    theatre_hall_name = serializers.CharField()
+    show_time = serializers.DateTimeField()
+    tickets = serializers.IntegerField()
+
+
+class ReservationSummarySerializer(serializers.Serializer):
+    upcoming = serializers.IntegerField(
+        help_text="Upcoming performances the user holds tickets for"
+    )
+    past = serializers.IntegerField(
+        help_text="Past performances the user held tickets for"
+    )
+    next_performance = NextPerformanceSerializer(allow_null=True)
+
+
+class UserSummarySerializer(UserSerializer):
+    reservations = ReservationSummarySerializer(
+        read_only=True, required=False
+    )
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ("reservations",)
+
+
+class HashingStatsSerializer(serializers.Serializer):
+    completed = serializers.IntegerField(help_text="Passwords hashed")
+    rejected = serializers.IntegerField(
+        help_text="Hashes refused because the pool was saturated"
+    )
+    mean_ms = serializers.FloatField(
+        help_text="Mean hash latency, queueing included"
+    )
+    max_ms = serializers.FloatField(
+        help_text="Slowest hash, queueing included"
+    )
+
+
 class AuthTokenSerializer(serializers.Serializer):
     email = serializers.CharField(label=_("Email"), write_only=True)
     password = serializers.CharField(
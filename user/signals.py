@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from user.models import user_cache_key
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop the cached user used by `CachedJWTAuthentication` on any change,
+    e.g. profile updates or `is_active`/`is_staff` edits in the admin
+    """
+
+    cache.delete(user_cache_key(instance.pk))
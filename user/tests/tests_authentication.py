@@ -0,0 +1,145 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, models
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.checks import check_shared_cache
+from user.models import user_cache_key
+
+ME_URL = "/api/user/me/"
+STATS_URL = "/api/user/hashing-stats/"
+RESERVATION_URL = "/api/theatre/reservations/"
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def _user_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(RESERVATION_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            query["sql"]
+            for query in captured.captured_queries
+            if 'FROM "user_user"' in query["sql"]
+        ]
+
+    def test_user_is_cached_between_requests(self):
+        self.assertEqual(len(self._user_queries()), 1)
+        self.assertEqual(self._user_queries(), [])
+
+    def test_only_authentication_fields_are_cached(self):
+        self.client.get(RESERVATION_URL)
+
+        self.assertEqual(
+            set(cache.get(user_cache_key(self.user.pk))),
+            {"id", "is_active", "is_staff", "is_superuser", "password_hash"},
+        )
+
+    def test_me_reads_the_full_row(self):
+        self.user.first_name = "Ophelia"
+        self.user.save()
+        self.client.get(ME_URL)
+
+        response = self.client.patch(ME_URL, {"email": "new@test.com"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@test.com")
+        self.assertEqual(self.user.first_name, "Ophelia")
+        self.assertTrue(self.user.check_password("testPassword"))
+
+    def test_queryset_update_invalidates_cache(self):
+        self.client.get(ME_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_staff=True)
+
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(
+            self.client.get(STATS_URL).status_code, status.HTTP_200_OK
+        )
+
+    def test_update_through_me_invalidates_cache(self):
+        self.client.get(ME_URL)
+
+        response = self.client.patch(ME_URL, {"email": "new@test.com"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.client.get(ME_URL).data["email"], "new@test.com")
+
+    def test_staff_change_is_visible_on_next_request(self):
+        self.client.get(ME_URL)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        self.assertTrue(self.client.get(ME_URL).data["is_staff"])
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(ME_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+    def test_missed_invalidation_expires_after_timeout(self):
+        self.client.get(ME_URL)
+        # A write in a worker with its own cache, our entry is not dropped
+        models.QuerySet.update(
+            get_user_model().objects.filter(pk=self.user.pk), is_staff=True
+        )
+        now = time.time()
+
+        with mock.patch("time.time", return_value=now + 59):
+            self.assertEqual(
+                self.client.get(STATS_URL).status_code,
+                status.HTTP_403_FORBIDDEN,
+            )
+        with mock.patch("time.time", return_value=now + 61):
+            self.assertEqual(
+                self.client.get(STATS_URL).status_code, status.HTTP_200_OK
+            )
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_warns(self):
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                }
+            }
+        ):
+            self.assertEqual(
+                [warning.id for warning in check_shared_cache(None)],
+                ["user.W001"],
+            )
+
+    def test_shared_cache_passes(self):
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                    "LOCATION": "redis://localhost:6379/0",
+                }
+            }
+        ):
+            self.assertEqual(check_shared_cache(None), [])
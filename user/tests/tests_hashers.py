@@ -0,0 +1,110 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from user.hashers import HashingPool, HashingUnavailable
+
+TOKEN_URL = "/api/user/token/"
+REGISTER_URL = "/api/user/register/"
+STATS_URL = "/api/user/hashing-stats/"
+ADMIN_LOGIN_URL = "/admin/login/"
+
+
+class HashingPoolTests(APITestCase):
+    def test_hashes_run_in_pool_threads(self):
+        thread_names = []
+        pbkdf2 = hashers.pbkdf2
+
+        def record_thread(*args, **kwargs):
+            thread_names.append(threading.current_thread().name)
+            return pbkdf2(*args, **kwargs)
+
+        with mock.patch.object(hashers, "pbkdf2", side_effect=record_thread):
+            encoded = make_password("testPassword")
+            self.assertTrue(check_password("testPassword", encoded))
+
+        self.assertTrue(encoded.startswith("pbkdf2_sha256$"))
+        self.assertEqual(len(thread_names), 2)
+        for name in thread_names:
+            self.assertTrue(name.startswith("password-hashing"))
+
+    def test_saturated_pool_rejects_immediately(self):
+        pool = HashingPool(workers=1, queue_depth=0)
+        release = threading.Event()
+        running = threading.Thread(target=pool.run, args=(release.wait,))
+        running.start()
+
+        with self.assertRaises(HashingUnavailable):
+            pool.run(lambda: None)
+
+        release.set()
+        running.join()
+        self.assertEqual(pool.stats()["rejected"], 1)
+        self.assertEqual(pool.stats()["completed"], 1)
+
+    def test_token_endpoint_returns_503_when_saturated(self):
+        get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        busy_pool = HashingPool(workers=1, queue_depth=0)
+        busy_pool.slots.acquire()
+
+        with mock.patch("user.hashers.get_pool", return_value=busy_pool):
+            response = self.client.post(
+                TOKEN_URL,
+                {"email": "test@test.com", "password": "testPassword"},
+            )
+            register_response = self.client.post(
+                REGISTER_URL,
+                {"email": "new@test.com", "password": "testPassword"},
+            )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(
+            register_response.status_code,
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    def test_admin_login_waits_for_a_saturated_pool(self):
+        get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testPassword"
+        )
+        busy_pool = HashingPool(workers=1, queue_depth=0)
+        busy_pool.slots.acquire()
+        freed = threading.Timer(0.2, busy_pool.slots.release)
+        freed.start()
+
+        with mock.patch("user.hashers.get_pool", return_value=busy_pool):
+            response = self.client.post(
+                ADMIN_LOGIN_URL,
+                {"username": "admin@test.com", "password": "testPassword"},
+            )
+
+        freed.join()
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(busy_pool.stats()["rejected"], 0)
+
+    def test_stats_are_served_to_staff(self):
+        pool = HashingPool(workers=1, queue_depth=0)
+        pool.run(lambda: None)
+        user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=user)
+
+        with mock.patch("user.views.get_pool", return_value=pool):
+            forbidden = self.client.get(STATS_URL)
+            user.is_staff = True
+            response = self.client.get(STATS_URL)
+
+        self.assertEqual(forbidden.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["completed"], 1)
+        self.assertEqual(response.data["rejected"], 0)
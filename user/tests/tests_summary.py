@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from theatre.archive import archive_batch
+from theatre.booking import create_reservation
+from theatre.cancellation import cancel_reservations, release_tickets
+from theatre.models import (
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+ME_URL = "/api/user/me/"
+
+
+class ReservationSummaryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testPassword"
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@test.com", password="testPassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        hall = TheatreHall.objects.create(
+            name="Globe", rows=10, seats_in_row=10
+        )
+        play = Play.objects.create(title="Hamlet", description="Tragedy")
+        now = datetime.now().replace(microsecond=0)
+        self.past, self.soon, self.later = (
+            Performance.objects.create(
+                play=play, theatre_hall=hall, show_time=now + delta
+            )
+            for delta in (
+                timedelta(days=-3), timedelta(days=2), timedelta(days=9)
+            )
+        )
+
+    def _book(self, user, *seats):
+        return create_reservation(
+            user=user,
+            tickets=[
+                Ticket(performance=performance, row=1, seat=seat)
+                for performance, seat in seats
+            ],
+        )
+
+    def _summary(self):
+        response = self.client.get(ME_URL, {"summary": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], self.user.email)
+        return response.data["reservations"]
+
+    def assertCountersConsistent(self):
+        call_command("rebuild_user_summary", "--check", stdout=StringIO())
+
+    def test_profile_has_no_summary_by_default(self):
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("reservations", response.data)
+
+    def test_empty_summary(self):
+        self.assertEqual(
+            self._summary(),
+            {"upcoming": 0, "past": 0, "next_performance": None},
+        )
+
+    def test_summary_counts_upcoming_and_past_performances(self):
+        self._book(self.user, (self.past, 1), (self.later, 1))
+        self._book(self.user, (self.soon, 1), (self.soon, 2))
+        self._book(self.other, (self.soon, 3))
+
+        summary = self._summary()
+
+        self.assertEqual((summary["upcoming"], summary["past"]), (2, 1))
+        self.assertEqual(summary["next_performance"]["id"], self.soon.id)
+        self.assertEqual(summary["next_performance"]["play_title"], "Hamlet")
+        self.assertEqual(summary["next_performance"]["tickets"], 2)
+        self.assertCountersConsistent()
+
+    def test_cancellations_update_the_summary(self):
+        soon = self._book(self.user, (self.soon, 1), (self.soon, 2))
+        self._book(self.user, (self.later, 1))
+
+        release_tickets(Ticket.objects.filter(seat=2))
+        self.assertEqual(self._summary()["next_performance"]["tickets"], 1)
+
+        cancel_reservations(Reservation.objects.filter(id=soon.id))
+        summary = self._summary()
+        self.assertEqual((summary["upcoming"], summary["past"]), (1, 0))
+        self.assertEqual(summary["next_performance"]["id"], self.later.id)
+        self.assertCountersConsistent()
+
+    def test_archived_sales_stay_in_the_summary(self):
+        self._book(self.user, (self.past, 1))
+
+        archive_batch(before=datetime.now())
+
+        self.assertEqual(self._summary()["past"], 1)
+        self.assertCountersConsistent()
+
+    def test_summary_queries(self):
+        self._book(self.user, (self.past, 1), (self.soon, 1))
+
+        # Throttling, the user row, the counters and the next performance
+        with self.assertNumQueries(4):
+            self._summary()
+
+    def test_rebuild_restores_counters(self):
+        self._book(self.user, (self.soon, 1))
+        # Bypasses the booking signals
+        Ticket.objects.create(
+            performance=self.later,
+            row=2,
+            seat=2,
+            reservation=Reservation.objects.get(),
+        )
+
+        with self.assertRaises(CommandError):
+            self.assertCountersConsistent()
+        call_command("rebuild_user_summary", stdout=StringIO())
+
+        self.assertEqual(self._summary()["upcoming"], 2)
+        self.assertCountersConsistent()
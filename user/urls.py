@@ -1,12 +1,13 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (
+from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+
+from user.views import (
+    CreateUserView,
+    HashingStatsView,
+    ManageUserView,
     TokenObtainPairView,
-    TokenRefreshView,
-    TokenVerifyView
 )
 
-from user.views import CreateUserView, ManageUserView
-
 app_name = "user"
 
 urlpatterns = [
@@ -15,4 +16,7 @@ urlpatterns = [
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
     path("me/", ManageUserView.as_view(), name="manage"),
+    path(
+        "hashing-stats/", HashingStatsView.as_view(), name="hashing_stats"
+    ),
 ]
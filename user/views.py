@@ -1,17 +1,102 @@
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import generics, serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt import views as jwt_views
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from user.serializers import UserSerializer
+from theatre.user_summary import reservation_summary
+from user.hashers import (
+    HashingUnavailable,
+    get_pool,
+    rejecting_when_saturated,
+)
+from user.serializers import (
+    HashingStatsSerializer,
+    ReservationSummarySerializer,
+    UserSerializer,
+    UserSummarySerializer,
+)
 
 
-class CreateUserView(generics.CreateAPIView):
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many sign-ins right now, please retry shortly.")
+    default_code = "hashing_unavailable"
+
+
+# Answers 503 when the password hashing pool is saturated, instead of
+# waiting for a slot (not a docstring, the schema would show it as the
+# description of every view using it)
+class RejectWhenHashingSaturatedMixin:
+    def dispatch(self, request, *args, **kwargs):
+        with rejecting_when_saturated():
+            return super().dispatch(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, HashingUnavailable):
+            exc = HashingBusy()
+        return super().handle_exception(exc)
+
+
+class TokenObtainPairView(
+    RejectWhenHashingSaturatedMixin, jwt_views.TokenObtainPairView
+):
+    """
+    Takes a set of user credentials and returns an access and refresh JSON web
+    token pair to prove the authentication of those credentials.
+    """
+
+
+class CreateUserView(RejectWhenHashingSaturatedMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(
+    RejectWhenHashingSaturatedMixin, generics.RetrieveUpdateAPIView
+):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # The authenticated user only has the cached fields loaded
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "summary",
+                type=OpenApiTypes.BOOL,
+                description=(
+                    "Add counts of upcoming and past booked performances "
+                    "and the next one"
+                ),
+            ),
+        ],
+        responses=UserSummarySerializer,
+    )
+    def get(self, request, *args, **kwargs):
+        response = self.retrieve(request, *args, **kwargs)
+        summary = request.query_params.get("summary", "")
+        if summary in serializers.BooleanField.TRUE_VALUES:
+            response.data["reservations"] = ReservationSummarySerializer(
+                reservation_summary(request.user)
+            ).data
+        return response
+
+
+class HashingStatsView(generics.GenericAPIView):
+    serializer_class = HashingStatsSerializer
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        """
+        Password hashing metrics of the worker process that serves
+        the request
+        """
+
+        return Response(self.get_serializer(get_pool().stats()).data)